@@ -8,7 +8,41 @@ DATA_DIR = Path(os.getenv("PAC_TYLER_DATA_DIR", "/home/tyler/pac-tyler-data"))
 
 GEOJSON_FILE = DATA_DIR / "cleaned_output.geojson"
 DERIVED_ACTIVITY_JSON = DATA_DIR / "pac-tyler-activities.json"
+# just the dataset's aggregates section, for clients that only want the totals
+DERIVED_AGGREGATES_JSON = DATA_DIR / "pac-tyler-aggregates.json"
 TOKEN_FILE = DATA_DIR / "strava_token.json"
+# raw activities (metadata + full latlng stream) by strava id, so nothing is
+# fetched twice and --full-reclean can rebuild from raw data offline
+ACTIVITY_CACHE_FILE = DATA_DIR / "strava-activity-cache.sqlite"
+# the same tracks as delta-encoded int32 fixed point (utils/track_format.py),
+# written next to the GeoJSON as cleaned_output.tracks
+TRACKS_FILE_SUFFIX = ".tracks"
+TRACKS_FORMAT_VERSION = 1
+# per-feature bbox/date/type index behind the backend's /pac-tyler/features
+FEATURE_INDEX_FILE = DATA_DIR / "pac-tyler-index.sqlite"
+# every web-mercator cell at COVERAGE_ZOOM a track has passed through, plus
+# coverage stats (utils/coverage.py), behind the backend's /pac-tyler/coverage
+COVERAGE_FILE = DATA_DIR / "pac-tyler-coverage.json"
+# z/x/y tile pyramid; TILES_DIR is a symlink to the current build
+TILES_DIR = DATA_DIR / "tiles"
+# every save hard-links its outputs into generations/<n>/ and swaps in
+# manifest.json naming them (utils/data_manifest.py), so the backend never
+# serves the geojson from one run and the dataset from another
+WRITE_DATA_MANIFEST = True
+DATA_MANIFEST_FILE = DATA_DIR / "manifest.json"
+DATA_GENERATIONS_DIR = DATA_DIR / "generations"
+# older generations stay around for requests still reading them
+DATA_GENERATIONS_TO_KEEP = 3
+# every run writes where its time and memory went (utils/run_report.py): the
+# latest run as run-report.json, and one JSON line per run appended to
+# run-history.jsonl for graphing. neither is served
+RUN_REPORT_FILE = DATA_DIR / "run-report.json"
+RUN_HISTORY_FILE = DATA_DIR / "run-history.jsonl"
+RUN_HISTORY_MAX_RUNS = 1000
+# main.py --profile also runs under cProfile and dumps the stats here
+RUN_PROFILE_DIR = DATA_DIR / "profiles"
+RUN_PROFILES_TO_KEEP = 10
+RUN_PROFILE_TOP_FUNCTIONS = 25
 
 DOTENV_FILE = Path(__file__).resolve().parent / ".env"
 
@@ -18,6 +52,10 @@ REDIRECT_URI = f"http://localhost:{OAUTH_PORT}"
 DEFAULT_LOOKBACK_DAYS = 365
 RECENT_ACTIVITY_LOOKBACK_DAYS = 7
 BATCH_SIZE = 5
+# new batches are appended in memory; the full collection is written (and
+# re-compressed) only every this many batches and at the end of the run, so a
+# long backfill isnt re-serializing everything every 5 activities
+CHECKPOINT_INTERVAL_BATCHES = 10
 ACTIVITY_DATE_INCREMENT_SECONDS = 1
 
 LOOKBACK_DAYS_ENV_VAR = "PAC_TYLER_LOOKBACK_DAYS"
@@ -32,18 +70,135 @@ MIN_COORDINATES_PER_FEATURE = 2
 MIN_COORDINATE_DISTANCE_METERS = 0
 MAX_COORDINATES_PER_FEATURE = 0
 
+# how clean_feature thins tracks:
+#   "spacing"         -- MIN_COORDINATE_DISTANCE_METERS / MAX_COORDINATES_PER_FEATURE
+#   "douglas_peucker" -- drop points that sit within SIMPLIFY_TOLERANCE_METERS of
+#                        the simplified line, keeps corners, thins straightaways
+# run main.py --full-reclean after changing either to re-thin the stored archive
+REDUCTION_MODE_SPACING = "spacing"
+REDUCTION_MODE_DOUGLAS_PEUCKER = "douglas_peucker"
+COORDINATE_REDUCTION_MODE = REDUCTION_MODE_SPACING
+SIMPLIFY_TOLERANCE_METERS = 3.0
+
 PAUSE_SPLIT_THRESHOLD_KM = 2.0
 
+# whole-archive cleaning (--full-reclean) can shard the features across worker
+# processes (utils/process_pool.py). results come back in input order, so the
+# output is identical to 1 (in-process). worth setting to the pi's 4 cores
+# with douglas_peucker, which does ~8x more work per point than pickling the
+# point over to a worker and back; "spacing" does about as much as that round
+# trip, so it gains nothing (scripts/benchmark_parallel_clean.py).
+# a daily run's few new activities are always cleaned in-process, starting
+# workers would cost more than it saves
+CLEAN_WORKERS = 1
+# features per task handed to a worker, and tasks queued per worker -- keeps
+# the workers busy without reading the whole archive ahead
+CLEAN_CHUNK_FEATURES = 16
+CLEAN_CHUNKS_IN_FLIGHT_PER_WORKER = 2
+
 STRAVA_SCOPES = ["read_all", "activity:read_all"]
 STRAVA_STREAM_TYPES = ["latlng"]
 STRAVA_STREAM_RESOLUTION = "medium"
 
-RATE_LIMIT_SLEEP_SECONDS = 15 * 60
+# strava counts requests per quarter hour and per UTC day. these are the
+# default read limits for a personal app -- the real ones are picked up from
+# the X-ReadRateLimit-* headers on the first response. HEADROOM tokens are
+# held back in each window for requests in flight and other users of the app
+STRAVA_SHORT_TERM_LIMIT = 100
+STRAVA_DAILY_LIMIT = 1000
+STRAVA_SHORT_WINDOW_SECONDS = 15 * 60
+STRAVA_DAILY_WINDOW_SECONDS = 24 * 60 * 60
+STRAVA_RATE_LIMIT_HEADROOM = 5
+STRAVA_BUDGET_LOG_INTERVAL_REQUESTS = 50
+# a throttled request is retried after its window resets, this many times
+# before the run gives up
+STRAVA_THROTTLE_MAX_RETRIES = 3
+# strava requests in flight at once while fetching activity details and
+# streams. doesnt change how many requests a run makes, just overlaps the
+# round trips -- 1 fetches one request at a time
+STRAVA_FETCH_WORKERS = 4
+
+# main.py --from-export replays a strava bulk export (the zip from "download
+# your data", or it unzipped) instead of calling the API: activities.csv for
+# the metadata, the GPX/TCX/FIT files under activities/ for the tracks, parsed
+# on EXPORT_PARSE_WORKERS processes (utils/process_pool.py) -- parsing is
+# heavy enough per activity that every core helps, unlike cleaning
+EXPORT_PARSE_WORKERS = 4
+EXPORT_PARSE_CHUNK_ACTIVITIES = 4
+EXPORT_CSV_FILENAME = "activities.csv"
+# activities.csv dates are UTC in this format. the API dates are the local
+# start time, so they're converted to EXPORT_TIMEZONE (FIT files carry their
+# own offset, which wins)
+EXPORT_CSV_DATE_FORMAT = "%b %d, %Y, %I:%M:%S %p"
+EXPORT_TIMEZONE = "America/Los_Angeles"
+# newer exports have a second Distance column in meters, older ones only the
+# first, in kilometers
+EXPORT_SINGLE_DISTANCE_COLUMN_METERS = 1000.0
+# export files are the full recording; STRAVA_STREAM_RESOLUTION "medium"
+# streams are at most 1000 evenly spaced points, so tracks are thinned the
+# same way to come out as dense as fetched ones. None keeps every point
+EXPORT_MAX_POINTS_PER_ACTIVITY = 1000
 
 MIN_LATITUDE = -90.0
 MAX_LATITUDE = 90.0
 MIN_LONGITUDE = -180.0
 MAX_LONGITUDE = 180.0
 
-JSON_INDENT = 4
+# unit conversions, for the mile totals next to the meter ones
 METERS_PER_MILE = 1609.34
+
+JSON_INDENT = 4
+
+# served files are written compact (no whitespace) with coordinates rounded to
+# COORDINATE_DECIMAL_PLACES -- 6 places is ~0.1 m, well under GPS noise.
+# flip COMPACT_JSON_OUTPUT off to get indented files back when debugging
+COMPACT_JSON_OUTPUT = True
+COMPACT_JSON_SEPARATORS = (",", ":")
+COORDINATE_DECIMAL_PLACES = 6
+
+# served files also get pre-compressed .gz/.br siblings written next to them,
+# so the backend can send compressed bytes without compressing per request.
+# max levels are fine here -- compression runs once per update, not per hit
+GZIP_SUFFIX = ".gz"
+BROTLI_SUFFIX = ".br"
+GZIP_COMPRESSION_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# the stored GeoJSON is read and written a feature at a time in chunks of this
+# many characters (bytes when compressing), so memory doesnt grow with the archive
+GEOJSON_STREAM_CHUNK_CHARS = 1024 * 1024
+
+# temp files start out owner-only; the backend container reads these files as
+# a different user, so atomic writes reset the mode before renaming
+DATA_FILE_MODE = 0o644
+DATA_DIR_MODE = 0o755
+
+# pre-cut web-mercator tiles of the tracks, served at /pac-tyler/tiles for a
+# tile-aware map client. each zoom is douglas-peucker simplified to
+# TILE_SIMPLIFY_PIXELS of on-screen error (256 px tiles), so zoomed-out tiles
+# carry a fraction of the vertices. past TILE_MAX_ZOOM a client overzooms
+# the last level
+TILE_MIN_ZOOM = 8
+TILE_MAX_ZOOM = 14
+TILE_SIMPLIFY_PIXELS = 1.0
+TILE_SIZE_PIXELS = 256
+TILE_FILE_SUFFIX = ".geojson"
+TILE_METADATA_FILENAME = "metadata.json"
+# previous builds are deleted after the swap, but a reader that already
+# opened a tile keeps its file handle, so nothing breaks mid-request
+TILE_BUILD_DIR_PREFIX = "tiles-"
+
+# activity aggregates (utils/activity_aggregates.py) sum distances in units of
+# 10**-AGGREGATE_DISTANCE_DECIMALS m so incremental updates are exact. bump
+# AGGREGATES_VERSION when the layout changes, the next run recomputes them
+AGGREGATE_DISTANCE_DECIMALS = 1
+AGGREGATES_VERSION = 1
+
+# coverage grid cells are slippy map tiles at this zoom -- 17 is ~300 m across
+# at the equator (~250 m at san diego), the usual "squadrat" size. the stats
+# also count the coarser tiles at COVERAGE_SUMMARY_ZOOMS touched (14 is the
+# "explorer tile" size). changing the zoom or bumping COVERAGE_VERSION makes
+# the next run rasterize every track again
+COVERAGE_ZOOM = 17
+COVERAGE_SUMMARY_ZOOMS = (14,)
+COVERAGE_VERSION = 1
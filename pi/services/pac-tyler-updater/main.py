@@ -5,19 +5,30 @@ refresh token so no browser is needed. run auth_setup.py once first to
 bootstrap the token file.
 """
 
+import argparse
+import heapq
 import logging
 import os
 from datetime import datetime, timedelta, timezone
+from itertools import chain
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
 
 from dotenv import load_dotenv
 
 from config import (
+    ACTIVITY_CACHE_FILE,
     ACTIVITY_DATE_INCREMENT_SECONDS,
     BATCH_SIZE,
+    CHECKPOINT_INTERVAL_BATCHES,
+    CLEAN_WORKERS,
+    COVERAGE_FILE,
     DEFAULT_LOOKBACK_DAYS,
+    DERIVED_ACTIVITY_JSON,
+    DERIVED_AGGREGATES_JSON,
     DOTENV_FILE,
+    EXPORT_PARSE_WORKERS,
+    FEATURE_INDEX_FILE,
     GEOJSON_FILE,
     LOOKBACK_DAYS_ENV_VAR,
     PAUSE_SPLIT_THRESHOLD_KM,
@@ -25,12 +36,21 @@ from config import (
     REDIRECT_URI,
     SILENCE_TOKEN_WARNINGS_ENV_VAR,
     TOKEN_FILE,
+    WRITE_DATA_MANIFEST,
 )
-from utils.file_utils import load_existing_geojson, save_geojson
+from utils.activity_cache import ActivityCache
+from utils.coverage import save_coverage
+from utils.data_manifest import DataGeneration, remove_manifest
+from utils.file_utils import iter_geojson_features, load_geojson_properties, save_geojson_features
 from utils.activity_dataset import save_activity_dataset
-from utils.geojson_cleaner import clean_geojson
-from utils.separate_pauses import split_activities
-from utils.strava_client import StravaClient, activities_to_geojson
+from utils.feature_index import save_feature_index
+from utils.geojson_cleaner import iter_clean_features
+from utils.run_report import RUN_MODE_FULL_RECLEAN, RUN_MODE_REPLAY, RUN_MODE_UPDATE, profiled_run, run_profiler
+from utils.separate_pauses import iter_split_features
+from utils.strava_export import iter_export_activities, read_export_rows
+from utils.tiles import save_tiles
+from utils.track_format import tracks_path_for
+from utils.strava_client import StravaClient, iter_activity_features
 
 LOGGING_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
 
@@ -220,6 +240,26 @@ def get_existing_activity_keys(existing_geojson: Dict[str, Any]) -> Set[str]:
     return keys
 
 
+def get_existing_activity_ids(existing_geojson: Dict[str, Any]) -> Set[int]:
+    """Collect the Strava ids of every stored activity.
+
+    Passed to the fetch as skip_ids, so activities in the lookback overlap
+    are dropped before any detail or stream request is made.
+
+    Args:
+        existing_geojson (dict): Existing GeoJSON FeatureCollection.
+
+    Returns:
+        set: Activity ids (features without one are left out).
+    """
+    activity_ids: Set[int] = set()
+    for feature in existing_geojson.get("features", []):
+        activity_id = feature.get("properties", {}).get("activity_id")
+        if activity_id is not None:
+            activity_ids.add(activity_id)
+    return activity_ids
+
+
 def filter_new_features(
     features: List[Dict[str, Any]],
     existing_keys: Set[str],
@@ -244,46 +284,261 @@ def filter_new_features(
     return new_features
 
 
+def save_outputs(features: Iterable[Dict[str, Any]], include_tiles: bool = True) -> int:
+    """Write the GeoJSON file, activity dataset, feature index, coverage grid, and map tiles.
+
+    The features are streamed into the GeoJSON file, then each derived output
+    streams them back out of that file, so none of this holds the whole
+    collection in memory (the tile pyramid itself aside). Every file is
+    swapped in atomically, and once they're all written they're published
+    together as a new data generation (utils/data_manifest.py). tiles have
+    their own symlink swap.
+
+    Args:
+        features (iterable): Cleaned GeoJSON features, in stored order.
+        include_tiles (bool): Also rebuild the tile pyramid. checkpoints skip
+            it, the tiles only need to be right at the end of a run.
+
+    Returns:
+        int: Number of features saved.
+    """
+    with run_profiler.stage("write_geojson"):
+        feature_count = save_geojson_features(features, GEOJSON_FILE)
+    with run_profiler.stage("activity_dataset"):
+        save_activity_dataset(iter_stored_features())
+    with run_profiler.stage("feature_index"):
+        save_feature_index(iter_stored_features())
+    with run_profiler.stage("coverage"):
+        save_coverage(GEOJSON_FILE)
+    if include_tiles:
+        with run_profiler.stage("tiles"):
+            save_tiles(iter_stored_features())
+
+    if WRITE_DATA_MANIFEST:
+        with run_profiler.stage("manifest"):
+            publish_generation(feature_count)
+    else:
+        remove_manifest()
+    return feature_count
+
+
+def publish_generation(feature_count: int) -> None:
+    """Link every output that exists into a new data generation and commit it.
+
+    Args:
+        feature_count (int): Features in the GeoJSON just written.
+
+    Returns:
+        None
+    """
+    generation = DataGeneration()
+    outputs = (
+        GEOJSON_FILE,
+        tracks_path_for(GEOJSON_FILE),
+        DERIVED_ACTIVITY_JSON,
+        DERIVED_AGGREGATES_JSON,
+        FEATURE_INDEX_FILE,
+        COVERAGE_FILE,
+    )
+    for path in outputs:
+        if path.exists():
+            generation.add(path)
+    generation.commit(feature_count)
+
+
+def save_with_stored_features(new_features: List[Dict[str, Any]], include_tiles: bool = True) -> int:
+    """Append new features to the stored collection and rewrite every output.
+
+    The stored features stream from the current GeoJSON file into the new
+    one, only the new ones are in memory.
+
+    Args:
+        new_features (list): Cleaned features not yet in the stored file.
+        include_tiles (bool): Also rebuild the tile pyramid.
+
+    Returns:
+        int: Number of features in the stored collection now.
+    """
+    return save_outputs(chain(iter_stored_features(), new_features), include_tiles)
+
+
+def iter_stored_features() -> Iterator[Dict[str, Any]]:
+    """Stream the stored GeoJSON's features, timed as the read_geojson stage.
+
+    Returns:
+        iterator: Stored features.
+    """
+    return run_profiler.iter_stage("read_geojson", iter_geojson_features(GEOJSON_FILE))
+
+
+def iter_split_and_clean(features: Iterable[Dict[str, Any]], workers: int = 1) -> Iterator[Dict[str, Any]]:
+    """Split tracks at pauses, then normalize and reduce every feature.
+
+    Both steps are generators that work feature by feature, so running this
+    over just the new features and appending gives the same result as
+    running it over the whole collection, and a whole-archive run never
+    holds more than a few chunks of tracks at a time.
+
+    Args:
+        features (iterable): Raw GeoJSON features.
+        workers (int): Worker processes for the cleaning step (splitting is
+            one vectorized pass per track, not worth shipping to a worker).
+            1 cleans in this process, the output is the same either way.
+
+    Returns:
+        iterator: Cleaned features.
+    """
+    split_features = run_profiler.iter_stage("split", iter_split_features(features, PAUSE_SPLIT_THRESHOLD_KM))
+    return run_profiler.iter_stage("clean", iter_clean_features(split_features, workers=workers))
+
+
+def split_and_clean(geojson: Dict[str, Any]) -> Dict[str, Any]:
+    """Split and clean a whole FeatureCollection, see iter_split_and_clean.
+
+    Args:
+        geojson (dict): Raw GeoJSON FeatureCollection.
+
+    Returns:
+        dict: Cleaned GeoJSON FeatureCollection.
+    """
+    return {"type": "FeatureCollection", "features": list(iter_split_and_clean(geojson.get("features", [])))}
+
+
 def process_activity_batch(
     activities: List[Dict[str, Any]],
-    combined_geojson: Dict[str, Any],
+    new_features: List[Dict[str, Any]],
     existing_keys: Set[str],
 ) -> int:
-    """Convert a batch of activities to GeoJSON, dedupe, and write to disk.
+    """Convert a batch of activities to GeoJSON, dedupe, clean, and queue them.
+
+    only the new features are split and cleaned -- the stored collection is
+    already clean, so the cost of a batch doesnt grow with the archive.
+    nothing is written here, see update_geojson for checkpointing.
 
     Args:
         activities (list): Activity payloads fetched from Strava.
-        combined_geojson (dict): Current full GeoJSON collection (mutated in place).
+        new_features (list): Cleaned features waiting to be saved (appended to).
         existing_keys (set): Known activity keys for de-duplication.
 
     Returns:
-        int: Number of new features added.
+        int: Number of new activities added.
     """
-    batch_geojson = activities_to_geojson(activities)
-    new_features = filter_new_features(batch_geojson["features"], existing_keys)
-    if not new_features:
+    batch_features = filter_new_features(list(iter_activity_features(activities)), existing_keys)
+    if not batch_features:
         return 0
 
-    combined_geojson["features"].extend(new_features)
-    final_geojson = split_activities(combined_geojson, threshold_km=PAUSE_SPLIT_THRESHOLD_KM)
-    cleaned_geojson = clean_geojson(final_geojson)
-    save_geojson(cleaned_geojson)
-    save_activity_dataset(cleaned_geojson)
-    return len(new_features)
+    new_features.extend(iter_split_and_clean(batch_features))
+    return len(batch_features)
+
+
+def feature_date(feature: Dict[str, Any]) -> str:
+    """Sort key for date-ordered features (undated ones first)."""
+    return feature.get("properties", {}).get("date") or ""
+
+
+def iter_raw_features(cache: ActivityCache) -> Iterator[Dict[str, Any]]:
+    """Stream the unsplit, unreduced collection back out of the raw activity cache.
+
+    Activities fetched before the cache existed are only in the stored
+    GeoJSON, so those stored features are passed through as they are. both
+    sources come out in date order and are merged, not sorted, so nothing is
+    loaded in full.
+
+    Args:
+        cache (ActivityCache): Raw activity cache.
+
+    Returns:
+        iterator: GeoJSON features ready for iter_split_and_clean.
+    """
+    cached_ids = cache.ids()
+    logging.info("Rebuilding %s activities from the raw cache, the rest from the stored file.", len(cached_ids))
+    uncached_features = (
+        feature
+        for feature in iter_stored_features()
+        if feature.get("properties", {}).get("activity_id") not in cached_ids
+    )
+    raw_features = run_profiler.iter_stage("read_cache", iter_activity_features(cache.iter_activities()))
+    return heapq.merge(raw_features, uncached_features, key=feature_date)
+
+
+def reclean_geojson(cache: Optional[ActivityCache] = None, workers: int = CLEAN_WORKERS) -> int:
+    """Maintenance mode: re-split and re-clean the whole stored collection.
+
+    Normal runs only clean new activities. Run this (main.py --full-reclean)
+    after changing split/clean settings like PAUSE_SPLIT_THRESHOLD_KM or
+    MIN_COORDINATE_DISTANCE_METERS so the existing archive picks them up.
+    with a cache, cached activities start again from their raw streams
+    instead of the already-reduced stored tracks. no strava calls either way,
+    and the archive streams through one feature at a time.
+
+    Args:
+        cache (ActivityCache, optional): Raw activity cache.
+        workers (int): Cleaning worker processes, see iter_split_and_clean.
+
+    Returns:
+        int: Number of features in the re-cleaned collection (written to disk).
+    """
+    source_features = iter_raw_features(cache) if cache is not None else iter_stored_features()
+    feature_count = save_outputs(iter_split_and_clean(source_features, workers))
+    logging.info("Re-cleaned the archive into %s features.", feature_count)
+    return feature_count
+
+
+def replay_export(
+    export_path: Path,
+    parse_workers: int = EXPORT_PARSE_WORKERS,
+    clean_workers: int = CLEAN_WORKERS,
+) -> int:
+    """Maintenance mode: rebuild the archive from a Strava bulk export, offline.
+
+    every activity in the export goes through the same conversion, split and
+    clean as a fetched one (see utils/strava_export.py), so no strava calls
+    and no rate limit waits however many years it covers. stored features
+    of activities the export doesnt have -- newer than it, or stored
+    without an id -- are kept, merged in by date like iter_raw_features.
+
+    Args:
+        export_path (Path): Export zip or the directory it was unzipped to.
+        parse_workers (int): Worker processes decoding track files.
+        clean_workers (int): Cleaning worker processes, see iter_split_and_clean.
+
+    Returns:
+        int: Number of features in the rebuilt collection (written to disk).
+    """
+    with run_profiler.stage("read_export_csv"):
+        rows = read_export_rows(export_path)
+    export_ids = {row["id"] for row in rows}
+    kept_features = (
+        feature
+        for feature in iter_stored_features()
+        if feature.get("properties", {}).get("activity_id") not in export_ids
+    )
+    activities = run_profiler.iter_stage("parse_export", iter_export_activities(export_path, rows, parse_workers))
+    source_features = heapq.merge(iter_activity_features(activities), kept_features, key=feature_date)
+    feature_count = save_outputs(iter_split_and_clean(source_features, clean_workers))
+    logging.info("Rebuilt the archive from %s into %s features.", export_path, feature_count)
+    return feature_count
 
 
 def update_geojson(
     strava: StravaClient,
     existing_geojson: Dict[str, Any],
-) -> Dict[str, Any]:
+) -> int:
     """Fetch new activities from Strava and save an updated GeoJSON file.
 
+    new activities are cleaned and queued in batches of BATCH_SIZE, and
+    appended to the stored file every CHECKPOINT_INTERVAL_BATCHES batches so
+    a crash or rate-limit stall mid-backfill doesnt lose everything fetched
+    so far. only the activities since the last checkpoint are held in memory,
+    the stored tracks stream through from GEOJSON_FILE.
+
     Args:
         strava (StravaClient): Authenticated Strava client.
-        existing_geojson (dict): Existing GeoJSON FeatureCollection.
+        existing_geojson (dict): The stored collection's features -- only
+            properties are read, see load_geojson_properties.
 
     Returns:
-        dict: Updated GeoJSON FeatureCollection.
+        int: Number of features in the stored collection after the update.
     """
     lookback_days = get_lookback_days_from_env(RECENT_ACTIVITY_LOOKBACK_DAYS)
     most_recent_date = get_most_recent_activity_date(existing_geojson)
@@ -293,20 +548,22 @@ def update_geojson(
     logging.info("Lookback window: %s days", lookback_days)
     logging.info("Fetching activities after %s", start_date)
 
-    combined_geojson = {
-        "type": "FeatureCollection",
-        "features": list(existing_geojson.get("features", [])),
-    }
+    new_features: List[Dict[str, Any]] = []
     existing_keys = get_existing_activity_keys(existing_geojson)
 
     batch: List[Dict[str, Any]] = []
+    batches_since_checkpoint = 0
     new_feature_count = 0
     fetched_any = False
     fetched_count = 0
     earliest_fetched: Optional[datetime] = None
     latest_fetched: Optional[datetime] = None
 
-    for activity in strava.iter_detailed_activities(start_date):
+    skip_ids = get_existing_activity_ids(existing_geojson)
+    if strava.cache is not None:
+        skip_ids |= strava.cache.ids_without_coordinates()
+    fetched_activities = strava.iter_detailed_activities(start_date, skip_ids=skip_ids)
+    for activity in run_profiler.iter_stage("strava_fetch", fetched_activities):
         fetched_any = True
         fetched_count += 1
         activity_date = ensure_timezone_aware(activity["date"])
@@ -317,17 +574,24 @@ def update_geojson(
         if len(batch) < BATCH_SIZE:
             continue
 
-        added = process_activity_batch(batch, combined_geojson, existing_keys)
+        added = process_activity_batch(batch, new_features, existing_keys)
         new_feature_count += added
         if added:
-            logging.info("Saved %s new activities to GeoJSON.", added)
+            logging.info("Added %s new activities.", added)
+            batches_since_checkpoint += 1
         batch = []
 
+        if batches_since_checkpoint >= CHECKPOINT_INTERVAL_BATCHES:
+            stored_count = save_with_stored_features(new_features, include_tiles=False)
+            new_features.clear()
+            logging.info("Checkpoint: saved GeoJSON with %s features.", stored_count)
+            batches_since_checkpoint = 0
+
     if batch:
-        added = process_activity_batch(batch, combined_geojson, existing_keys)
+        added = process_activity_batch(batch, new_features, existing_keys)
         new_feature_count += added
         if added:
-            logging.info("Saved %s new activities to GeoJSON.", added)
+            logging.info("Added %s new activities.", added)
 
     if not fetched_any:
         logging.info("No new activities found after %s.", start_date)
@@ -337,27 +601,79 @@ def update_geojson(
         if not new_feature_count:
             logging.info("All fetched activities were already in the GeoJSON.")
 
-    # always re-clean and re-save the dataset even if nothing new, keeps files consistent
-    if not new_feature_count:
-        final_geojson = split_activities(combined_geojson, threshold_km=PAUSE_SPLIT_THRESHOLD_KM)
-        cleaned_geojson = clean_geojson(final_geojson)
-        save_geojson(cleaned_geojson)
-        save_activity_dataset(cleaned_geojson)
-        logging.info("Saved cleaned GeoJSON with %s features.", len(cleaned_geojson["features"]))
+    # always re-save even if nothing new, keeps the dataset and compressed
+    # copies consistent with the GeoJSON
+    stored_count = save_with_stored_features(new_features)
+    logging.info("Saved GeoJSON with %s features.", stored_count)
+
+    return stored_count
+
 
-    return combined_geojson
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line flags.
 
+    Args:
+        argv (list): Arguments to parse, defaults to sys.argv.
 
-def main() -> Optional[Dict[str, Any]]:
+    Returns:
+        argparse.Namespace: Parsed flags.
+    """
+    parser = argparse.ArgumentParser(description="Pac-Tyler Strava data updater")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument(
+        "--full-reclean",
+        action="store_true",
+        help="re-split and re-clean the whole stored GeoJSON instead of fetching from Strava",
+    )
+    source.add_argument(
+        "--from-export",
+        type=Path,
+        metavar="EXPORT",
+        help="rebuild from a Strava bulk export (zip or unzipped dir) instead of fetching from Strava",
+    )
+    parser.add_argument(
+        "--clean-workers",
+        type=int,
+        default=CLEAN_WORKERS,
+        help="worker processes for --full-reclean / --from-export's cleaning step (1 cleans in-process)",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=EXPORT_PARSE_WORKERS,
+        help="worker processes decoding --from-export's track files (1 decodes in-process)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="also run under cProfile, the dump goes to RUN_PROFILE_DIR and the top functions into the run report",
+    )
+    return parser.parse_args(argv)
+
+
+def run_update(args: argparse.Namespace) -> Optional[int]:
     """Run the headless Pac-Tyler update workflow.
 
     loads a saved strava token, refreshes it if needed, fetches new
     activities, and writes updated GeoJSON and activity dataset files.
+    with --full-reclean it skips strava and re-cleans the stored file instead,
+    with --from-export it rebuilds from a bulk export.
+
+    Args:
+        args (argparse.Namespace): Parsed flags, see parse_args.
 
     Returns:
-        dict: Updated GeoJSON data if successful, None on failure.
+        int: Number of stored features if successful, None on failure.
     """
-    configure_logging()
+    if args.full_reclean:
+        cache = ActivityCache(ACTIVITY_CACHE_FILE)
+        try:
+            return reclean_geojson(cache, args.clean_workers)
+        finally:
+            cache.close()
+
+    if args.from_export is not None:
+        return replay_export(args.from_export, args.parse_workers, args.clean_workers)
 
     try:
         client_id, client_secret = load_strava_credentials()
@@ -367,24 +683,51 @@ def main() -> Optional[Dict[str, Any]]:
 
     set_strava_env_credentials(client_id, client_secret)
 
+    cache = ActivityCache(ACTIVITY_CACHE_FILE)
     strava = StravaClient(
         client_id=client_id,
         client_secret=client_secret,
         redirect_uri=REDIRECT_URI,
+        cache=cache,
     )
 
-    if not strava.authenticate_from_token_file(TOKEN_FILE):
+    with run_profiler.stage("strava_auth"):
+        authenticated = strava.authenticate_from_token_file(TOKEN_FILE)
+    if not authenticated:
         logging.error(
             "No valid token at %s. Run auth_setup.py once to authorize with Strava, "
             "then try again.",
             TOKEN_FILE,
         )
+        cache.close()
         return None
 
-    existing_geojson = load_existing_geojson()
-    updated_geojson = update_geojson(strava, existing_geojson)
+    with run_profiler.stage("load_stored"):
+        existing_geojson = load_geojson_properties()
+    try:
+        stored_count = update_geojson(strava, existing_geojson)
+    finally:
+        cache.close()
     logging.info("Finished updating GeoJSON.")
-    return updated_geojson
+    return stored_count
+
+
+def main(argv: Optional[List[str]] = None) -> Optional[int]:
+    """Run the update (see run_update) and write its run report.
+
+    Args:
+        argv (list): Command line arguments, defaults to sys.argv.
+
+    Returns:
+        int: Number of stored features if successful, None on failure.
+    """
+    args = parse_args(argv)
+    configure_logging()
+
+    mode = RUN_MODE_FULL_RECLEAN if args.full_reclean else RUN_MODE_REPLAY if args.from_export else RUN_MODE_UPDATE
+    with profiled_run(mode, with_cprofile=args.profile) as run:
+        run["feature_count"] = run_update(args)
+    return run["feature_count"]
 
 
 if __name__ == "__main__":
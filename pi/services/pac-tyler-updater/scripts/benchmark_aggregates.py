@@ -0,0 +1,164 @@
+"""Time incremental vs from-scratch activity aggregates and check they agree.
+
+Builds a dataset of synthetic activities (20,000 by default: random gaps of
+0-3 days, a few per day at most, fractional distances, mixed types), then
+times build_aggregates two ways for a run that adds --new activities:
+
+scratch     -- every activity counted again
+incremental -- the previous dataset's aggregates patched with only the new
+               ones (plus, on its own line, parsing the previous dataset,
+               which a real run reads from disk)
+
+and checks:
+- incremental gives exactly the from-scratch aggregates, for activities
+  after the last one, on the same day as it, and backdated into the middle
+- dropping activities (what a --full-reclean can do) falls back to from
+  scratch and still matches
+- totals, per-type counts and the longest daily streak match a plain
+  recount of the activity list
+
+Exits non-zero on any mismatch, so it doubles as the regression check.
+
+    python scripts/benchmark_aggregates.py
+    python scripts/benchmark_aggregates.py --activities 50000 --new 20
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator, List
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scripts.synthetic_activities import ACTIVITY_TYPES, DEFAULT_SEED, FIRST_ACTIVITY_DATE
+from utils.activity_aggregates import build_aggregates
+from utils.activity_dataset import build_activity_dataset
+
+DEFAULT_ACTIVITY_COUNT = 20000
+DEFAULT_NEW_ACTIVITY_COUNT = 5
+DEFAULT_REPEATS = 5
+DROPPED_ACTIVITY_COUNT = 3
+MAX_GAP_HOURS = 72
+MIN_DISTANCE_METERS = 500.0
+MAX_DISTANCE_METERS = 120000.0
+MS_PER_S = 1000
+
+
+def iter_activity_features(activity_count: int, seed: int = DEFAULT_SEED) -> Iterator[Dict[str, Any]]:
+    """Yield coordinate-less features with irregular dates, enough for the dataset."""
+    rng = random.Random(seed)
+    started_at = FIRST_ACTIVITY_DATE
+    for index in range(activity_count):
+        started_at += timedelta(hours=rng.randint(1, MAX_GAP_HOURS))
+        yield {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": []},
+            "properties": {
+                "name": f"Synthetic activity {index}",
+                "date": started_at.isoformat(),
+                "distance": rng.uniform(MIN_DISTANCE_METERS, MAX_DISTANCE_METERS),
+                "type": ACTIVITY_TYPES[rng.randrange(len(ACTIVITY_TYPES))],
+                "activity_id": 10_000_000 + index,
+            },
+        }
+
+
+def best_ms(function, *args, repeats: int = DEFAULT_REPEATS) -> float:
+    """Fastest of a few runs, in ms."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(*args)
+        timings.append((time.perf_counter() - started) * MS_PER_S)
+    return min(timings)
+
+
+def incremental_ms(activities: List[Dict[str, Any]], previous_text: str, repeats: int = DEFAULT_REPEATS) -> float:
+    """Fastest incremental run, each on a freshly parsed previous dataset (it's patched in place)."""
+    timings = []
+    for _ in range(repeats):
+        previous = json.loads(previous_text)
+        started = time.perf_counter()
+        build_aggregates(activities, previous)
+        timings.append((time.perf_counter() - started) * MS_PER_S)
+    return min(timings)
+
+
+def incremental_matches(stored: List[Dict[str, Any]], added: List[Dict[str, Any]]) -> bool:
+    """Save-and-reload a dataset of `stored`, add `added`, compare with from scratch."""
+    previous = json.loads(json.dumps(build_activity_dataset(stored)))
+    features = stored + added
+    return build_activity_dataset(features, previous)["aggregates"] == build_activity_dataset(features)["aggregates"]
+
+
+def recount_matches(activities: List[Dict[str, Any]], aggregates: Dict[str, Any]) -> bool:
+    """Check the aggregates against a plain recount of the activity list."""
+    totals = aggregates["totals"]
+    total_meters = math.fsum(activity["distance_m"] for activity in activities)
+    type_counts = Counter(activity["type"] for activity in activities)
+
+    days = sorted({datetime.fromisoformat(activity["date"]).date() for activity in activities})
+    longest = current = 1
+    for previous, day in zip(days, days[1:]):
+        current = current + 1 if day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+
+    return (
+        totals["count"] == len(activities)
+        and math.isclose(totals["distance_m"], total_meters, abs_tol=len(activities) * 0.05)
+        and {name: values["count"] for name, values in aggregates["types"].items()} == dict(type_counts)
+        and totals["active_days"] == len(days)
+        and aggregates["streaks"]["daily"]["longest"]["length"] == longest
+    )
+
+
+def main() -> None:
+    """Parse args, print timings, and check incremental against from scratch."""
+    parser = argparse.ArgumentParser(description="Incremental activity aggregates benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="activities already stored")
+    parser.add_argument("--new", type=int, default=DEFAULT_NEW_ACTIVITY_COUNT, help="activities added by the run")
+    args = parser.parse_args()
+
+    features = list(iter_activity_features(args.activities + args.new))
+    stored, added = features[:args.activities], features[args.activities:]
+    previous_text = json.dumps(build_activity_dataset(stored))
+    current = build_activity_dataset(features)
+    activities = current["activities"]
+    print(f"{args.activities} stored + {args.new} new activities, "
+          f"{current['aggregates']['totals']['active_days']} active days")
+
+    scratch = best_ms(build_aggregates, activities)
+    incremental = incremental_ms(activities, previous_text)
+    print(f"scratch                {scratch:8.1f} ms")
+    print(f"incremental            {incremental:8.1f} ms  ({scratch / incremental:.1f}x)")
+    print(f"parse previous dataset {best_ms(json.loads, previous_text):8.1f} ms")
+
+    last = stored[-1]["properties"]
+    same_day = {**added[0], "properties": {**added[0]["properties"], "date": last["date"], "name": "same day"}}
+    middle_date = stored[len(stored) // 2]["properties"]["date"]
+    backdated = {**added[0], "properties": {**added[0]["properties"], "date": middle_date, "name": "backdated"}}
+    dropped = activities[DROPPED_ACTIVITY_COUNT:]
+    checks = {
+        "appended": incremental_matches(stored, added),
+        "same day as last": incremental_matches(stored, [same_day]),
+        "backdated": incremental_matches(stored, [backdated] + added),
+        "nothing new": incremental_matches(features, []),
+        "removal falls back": build_aggregates(dropped, json.loads(json.dumps(current))) == build_aggregates(dropped),
+        "matches recount": recount_matches(activities, current["aggregates"]),
+    }
+    failures = 0
+    for name, matched in checks.items():
+        print(f"{name:<20} {'ok' if matched else 'MISMATCH'}")
+        failures += not matched
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
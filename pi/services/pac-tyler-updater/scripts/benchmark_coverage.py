@@ -0,0 +1,191 @@
+"""Time incremental vs from-scratch coverage grids and check they agree.
+
+Saves a synthetic archive (1,000 activities by default, thinned to a point
+every ~30 m, roughly what simplification leaves of a wiggly track) and
+times build_coverage for a run that adds --new activities:
+
+scratch     -- every track rasterized again
+incremental -- the previous coverage reused, only the new tracks rasterized
+               (the stored file is still streamed once to check it's the
+               same archive; that read is on its own line)
+
+and checks:
+- incremental gives exactly the from-scratch cells and stats, for appended
+  tracks and for a run that adds nothing
+- a changed archive (what --full-reclean does) and a zoom change fall back
+  to from scratch and still match
+- segment_cells returns exactly the cells a segment passes through: every
+  cell it returns touches the segment, and every cell a dense sampling of
+  the segment lands in is returned
+- max square / max cluster on a known shape
+
+Exits non-zero on any mismatch, so it doubles as the regression check.
+
+    python scripts/benchmark_coverage.py
+    python scripts/benchmark_coverage.py --activities 10000 --new 10
+
+Uses a temp dir, doesnt touch DATA_DIR.
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import COVERAGE_ZOOM
+from scripts.synthetic_activities import DEFAULT_SEED, iter_synthetic_features
+from utils.coverage import build_coverage, max_cluster, max_square, segment_cells
+from utils.file_utils import iter_geojson_features
+
+DEFAULT_ACTIVITY_COUNT = 1000
+DEFAULT_NEW_ACTIVITY_COUNT = 5
+DEFAULT_POINTS_PER_ACTIVITY = 1000
+# keep every 3rd ~10 m step
+THINNING_STEP = 3
+DEFAULT_REPEATS = 3
+RANDOM_SEGMENTS = 5000
+MAX_SEGMENT_CELLS = 6.0
+SAMPLES_PER_CELL = 200
+MS_PER_S = 1000
+
+
+def thinned_features(activity_count: int, points: int, seed: int = DEFAULT_SEED) -> List[Dict[str, Any]]:
+    """Synthetic tracks with only every THINNING_STEP-th point kept."""
+    features = []
+    for feature in iter_synthetic_features(activity_count, points, seed):
+        feature["geometry"]["coordinates"] = feature["geometry"]["coordinates"][::THINNING_STEP]
+        features.append(feature)
+    return features
+
+
+def write_geojson(features: List[Dict[str, Any]], path: Path) -> None:
+    """Plain FeatureCollection dump -- build_coverage only streams it back, no .tracks/.gz/.br needed."""
+    path.write_text(json.dumps({"type": "FeatureCollection", "features": features}), encoding="utf-8")
+
+
+def without_timestamp(coverage: Dict[str, Any]) -> Dict[str, Any]:
+    """Coverage minus generated_at, for comparing two builds."""
+    return {key: value for key, value in coverage.items() if key != "generated_at"}
+
+
+def best_ms(function, *args, repeats: int = DEFAULT_REPEATS) -> float:
+    """Fastest of a few runs, in ms."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(*args)
+        timings.append((time.perf_counter() - started) * MS_PER_S)
+    return min(timings)
+
+
+def incremental_matches(path: Path, stored: List[Dict[str, Any]], current: List[Dict[str, Any]], zoom=None) -> bool:
+    """Coverage of `stored`, saved and reloaded, updated to `current`, vs `current` from scratch."""
+    zoom = zoom or COVERAGE_ZOOM
+    write_geojson(stored, path)
+    previous = json.loads(json.dumps(build_coverage(path)))
+    write_geojson(current, path)
+    incremental = build_coverage(path, previous, zoom)
+    return without_timestamp(incremental) == without_timestamp(build_coverage(path, None, zoom))
+
+
+def segment_touches_cell(start: Tuple[float, float], end: Tuple[float, float], cell: Tuple[int, int]) -> bool:
+    """Whether a segment meets a unit cell (edges included), by clipping it to the cell."""
+    low, high = 0.0, 1.0
+    for axis in (0, 1):
+        delta = end[axis] - start[axis]
+        lower, upper = cell[axis] - start[axis], cell[axis] + 1 - start[axis]
+        if delta == 0:
+            if lower > 0 or upper < 0:
+                return False
+            continue
+        first, second = sorted((lower / delta, upper / delta))
+        low, high = max(low, first), min(high, second)
+    return low <= high
+
+
+def segments_match(rng: random.Random) -> bool:
+    """Check segment_cells against the clipping test and dense sampling for random segments."""
+    segments = [((0.5, 0.5), (3.5, 3.5)), ((0.2, 0.7), (0.2, 4.1)), ((5.9, 1.5), (0.1, 1.5))]
+    for _ in range(RANDOM_SEGMENTS):
+        start = (rng.uniform(0, 10), rng.uniform(0, 10))
+        angle = rng.uniform(0, 2 * math.pi)
+        length = rng.uniform(0, MAX_SEGMENT_CELLS)
+        segments.append((start, (start[0] + length * math.cos(angle), start[1] + length * math.sin(angle))))
+
+    for start, end in segments:
+        cells = segment_cells(*start, *end)
+        if len(set(cells)) != len(cells) or not all(segment_touches_cell(start, end, cell) for cell in cells):
+            return False
+        samples = int(SAMPLES_PER_CELL * (math.dist(start, end) + 1))
+        for index in range(samples + 1):
+            fraction = index / samples
+            point = (start[0] + fraction * (end[0] - start[0]), start[1] + fraction * (end[1] - start[1]))
+            if (math.floor(point[0]), math.floor(point[1])) not in cells:
+                return False
+    return True
+
+
+def records_match() -> bool:
+    """A 5x5 block with a tail: max square 5 at its corner, cluster of the 3x3 inside plus where the tail joins."""
+    cells = {(x, y) for x in range(10, 15) for y in range(20, 25)} | {(15, 22), (16, 22), (17, 22)}
+    return max_square(cells) == {"size": 5, "x": 10, "y": 20} and max_cluster(cells) == 10
+
+
+def main() -> None:
+    """Parse args, print timings, and check incremental against from scratch."""
+    parser = argparse.ArgumentParser(description="Incremental coverage grid benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="activities already stored")
+    parser.add_argument("--new", type=int, default=DEFAULT_NEW_ACTIVITY_COUNT, help="activities added by the run")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS_PER_ACTIVITY, help="~10 m steps per activity")
+    args = parser.parse_args()
+
+    features = thinned_features(args.activities + args.new, args.points)
+    stored, added = features[:args.activities], features[args.activities:]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "cleaned_output.geojson"
+        write_geojson(stored, path)
+        previous_text = json.dumps(build_coverage(path))
+        write_geojson(features, path)
+        current = build_coverage(path)
+        stats = current["stats"]
+        print(f"{args.activities} stored + {args.new} new activities, {stats['cells']} cells at z{current['zoom']}, "
+              f"{stats['area_km2']:.1f} km2, max square {stats['max_square']['size']}, "
+              f"max cluster {stats['max_cluster']}")
+
+        scratch = best_ms(build_coverage, path)
+        incremental = best_ms(lambda: build_coverage(path, json.loads(previous_text)))
+        print(f"scratch                {scratch:8.1f} ms")
+        print(f"incremental            {incremental:8.1f} ms  ({scratch / incremental:.1f}x)")
+        print(f"  of which reading     {best_ms(lambda: sum(1 for _ in iter_geojson_features(path))):8.1f} ms")
+
+        rethinned = [
+            {**feature, "geometry": {**feature["geometry"], "coordinates": feature["geometry"]["coordinates"][::2]}}
+            for feature in stored[:1]
+        ] + stored[1:]
+        checks = {
+            "appended": incremental_matches(path, stored, features),
+            "nothing new": incremental_matches(path, features, features),
+            "reclean falls back": incremental_matches(path, stored, rethinned + added),
+            "zoom change": incremental_matches(path, stored, features, COVERAGE_ZOOM - 1),
+            "segment cells": segments_match(random.Random(DEFAULT_SEED)),
+            "records": records_match(),
+        }
+    failures = 0
+    for name, matched in checks.items():
+        print(f"{name:<20} {'ok' if matched else 'MISMATCH'}")
+        failures += not matched
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+"""Benchmark the NumPy distance kernel against the old per-point loops.
+
+For synthetic tracks of 1k, 10k, and 100k points (GPS-like wandering paths
+with a few injected pauses, some of them right at the split threshold) this
+times:
+
+split  -- old: geopy geodesic() per consecutive pair
+          new: split_activities (one vectorized haversine over the track)
+reduce -- old: math haversine_meters per point against the last kept one
+          new: reduce_coordinates (vectorized candidate search + pointer chase)
+
+and checks the results agree: reduce must keep exactly the same points, and
+split indices must match except where a gap is within SPLIT_TOLERANCE of the
+threshold (geodesic is ellipsoidal, haversine spherical -- they differ by up
+to ~0.5%). Exits non-zero on a mismatch, so it doubles as the regression check.
+
+    python scripts/benchmark_distance.py
+    python scripts/benchmark_distance.py --sizes 1000 10000 100000 --min-distance 5 25
+"""
+
+import argparse
+import math
+import os
+import random
+import sys
+import time
+from typing import List
+
+from geopy.distance import geodesic
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import PAUSE_SPLIT_THRESHOLD_KM
+from utils.geojson_cleaner import haversine_meters, reduce_coordinates
+from utils.separate_pauses import split_activities
+
+DEFAULT_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_MIN_DISTANCES_METERS = (5, 25)
+# relative difference allowed between geodesic and haversine at a split
+SPLIT_TOLERANCE = 0.005
+# pauses injected per track, as gap lengths in km -- two sit right at the
+# default 2 km threshold to exercise the tolerance
+PAUSE_GAPS_KM = (0.5, 1.995, 2.005, 3.0, 12.0)
+STEP_DEGREES = 0.0001
+HEADING_DRIFT_RADIANS = 0.15
+GPS_JITTER = 0.3
+KM_PER_DEGREE_LATITUDE = 111.2
+SEED = 11
+MS_PER_S = 1000
+
+
+def synthetic_track(point_count: int, seed: int = SEED) -> List[List[float]]:
+    """GPS-like [lon, lat] track with PAUSE_GAPS_KM jumps spread along it.
+
+    ~10 m steps with a slowly wandering heading plus a little jitter, so it
+    curves and occasionally doubles back like a real ride.
+
+    Args:
+        point_count (int): Number of points.
+        seed (int): Random seed.
+
+    Returns:
+        list: Track coordinates.
+    """
+    rng = random.Random(seed)
+    pause_at = {
+        (index + 1) * point_count // (len(PAUSE_GAPS_KM) + 1): gap_km
+        for index, gap_km in enumerate(PAUSE_GAPS_KM)
+    }
+    longitude, latitude = -117.15, 32.75
+    heading = 0.0
+    track = []
+    for index in range(point_count):
+        if index in pause_at:
+            latitude += pause_at[index] / KM_PER_DEGREE_LATITUDE
+        else:
+            heading += rng.gauss(0, HEADING_DRIFT_RADIANS)
+            latitude += STEP_DEGREES * (math.sin(heading) + rng.uniform(-GPS_JITTER, GPS_JITTER))
+            longitude += STEP_DEGREES * (math.cos(heading) + rng.uniform(-GPS_JITTER, GPS_JITTER))
+        track.append([longitude, latitude])
+    return track
+
+
+def legacy_split_indices(coordinates: List[List[float]], threshold_km: float) -> List[int]:
+    """Old split_activities loop, returning the indices where new segments start."""
+    starts = []
+    for index in range(1, len(coordinates)):
+        prev_point = coordinates[index - 1]
+        current_point = coordinates[index]
+        distance_km = geodesic((prev_point[1], prev_point[0]), (current_point[1], current_point[0])).km
+        if distance_km > threshold_km:
+            starts.append(index)
+    return starts
+
+
+def new_split_indices(coordinates: List[List[float]], threshold_km: float) -> List[int]:
+    """Run split_activities on one track and recover the segment start indices."""
+    geojson = {
+        "type": "FeatureCollection",
+        "features": [{"type": "Feature", "geometry": {"coordinates": coordinates}, "properties": {}}],
+    }
+    split = split_activities(geojson, threshold_km=threshold_km)
+    starts, offset = [], 0
+    for feature in split["features"][:-1]:
+        offset += len(feature["geometry"]["coordinates"])
+        starts.append(offset)
+    return starts
+
+
+def legacy_reduce(coordinates: List[List[float]], min_distance_meters: float) -> List[List[float]]:
+    """Old reduce_coordinates spacing loop (no max_points cap)."""
+    reduced = [coordinates[0]]
+    for point in coordinates[1:-1]:
+        if haversine_meters(reduced[-1], point) < min_distance_meters:
+            continue
+        reduced.append(point)
+    if reduced[-1] != coordinates[-1]:
+        reduced.append(coordinates[-1])
+    return reduced
+
+
+def timed(function, *args):
+    """Run a function once and return (result, elapsed ms)."""
+    started = time.perf_counter()
+    result = function(*args)
+    return result, (time.perf_counter() - started) * MS_PER_S
+
+
+def splits_agree(coordinates: List[List[float]], old: List[int], new: List[int], threshold_km: float) -> bool:
+    """True if every index in only one of the lists is a gap within SPLIT_TOLERANCE of the threshold."""
+    for index in set(old) ^ set(new):
+        prev_point, current_point = coordinates[index - 1], coordinates[index]
+        gap_km = geodesic((prev_point[1], prev_point[0]), (current_point[1], current_point[0])).km
+        if not math.isclose(gap_km, threshold_km, rel_tol=SPLIT_TOLERANCE):
+            return False
+    return True
+
+
+def main() -> None:
+    """Parse args, run each size, and print old vs new timings."""
+    parser = argparse.ArgumentParser(description="NumPy distance kernel benchmark")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="track lengths in points")
+    parser.add_argument(
+        "--min-distance", type=float, nargs="+", default=DEFAULT_MIN_DISTANCES_METERS,
+        help="reduce_coordinates spacings to test (meters)",
+    )
+    args = parser.parse_args()
+
+    failures = 0
+    for size in args.sizes:
+        track = synthetic_track(size)
+        print(f"{size} points")
+
+        old_splits, old_ms = timed(legacy_split_indices, track, PAUSE_SPLIT_THRESHOLD_KM)
+        new_splits, new_ms = timed(new_split_indices, track, PAUSE_SPLIT_THRESHOLD_KM)
+        agree = splits_agree(track, old_splits, new_splits, PAUSE_SPLIT_THRESHOLD_KM)
+        failures += not agree
+        print(
+            f"  split            old {old_ms:9.1f} ms  new {new_ms:8.1f} ms  ({old_ms / new_ms:6.1f}x)  "
+            f"splits old={len(old_splits)} new={len(new_splits)} {'ok' if agree else 'MISMATCH'}"
+        )
+
+        for min_distance in args.min_distance:
+            old_points, old_ms = timed(legacy_reduce, track, min_distance)
+            new_points, new_ms = timed(reduce_coordinates, track, min_distance, 0)
+            agree = old_points == new_points
+            failures += not agree
+            print(
+                f"  reduce {min_distance:>5g} m  old {old_ms:9.1f} ms  new {new_ms:8.1f} ms  "
+                f"({old_ms / new_ms:6.1f}x)  kept {len(new_points)} {'ok' if agree else 'MISMATCH'}"
+            )
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+"""Time parsing a Strava bulk export with 1-4 worker processes and check it gives the API path's features.
+
+Writes a synthetic export to a temp dir (600 activities x 1,500 points by
+default) the way Strava lays one out: activities.csv with its duplicated
+Elapsed Time / Distance columns and display-name types, and one track file
+per activity under activities/, cycling through GPX, TCX and FIT, gzipped
+and plain. the FIT files use both byte orders, compressed timestamp headers
+and a developer field, and carry a local time offset; the GPX/TCX ones
+dont. a few activities are manual (no file), missing or corrupt. the same
+export is also zipped.
+
+Then for each worker count it times iter_export_activities over the zip,
+and checks:
+- the features are exactly activities_to_geojson of the activity dicts the
+  API would have given (local start time, API type name, meters, [lat, lon]
+  coordinates thinned to EXPORT_MAX_POINTS_PER_ACTIVITY)
+- every worker count, and the unzipped directory, give the same output
+- thinned tracks keep the first and last point and the rest in order
+
+Exits non-zero on any mismatch, so it doubles as the regression check.
+
+    python scripts/benchmark_export_replay.py
+    python scripts/benchmark_export_replay.py --activities 3000 --max-workers 4
+"""
+
+import argparse
+import csv
+import gzip
+import os
+import random
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import EXPORT_CSV_FILENAME, EXPORT_MAX_POINTS_PER_ACTIVITY, EXPORT_TIMEZONE
+from scripts.synthetic_activities import DEFAULT_SEED, iter_synthetic_features
+from utils.strava_client import activities_to_geojson
+from utils.strava_export import SEMICIRCLES_TO_DEGREES, downsample_coordinates, iter_export_activities
+
+DEFAULT_ACTIVITY_COUNT = 600
+DEFAULT_POINTS_PER_ACTIVITY = 1500
+DEFAULT_MAX_WORKERS = 4
+MANUAL_EVERY_N_ACTIVITIES = 50
+# activities whose file is listed but broken: (index, what's wrong)
+BROKEN_FILES = {7: "missing", 13: "corrupt"}
+EXPORT_TYPES = {"Ride": "Ride", "Run": "Run", "Virtual Ride": "VirtualRide", "E-Bike Ride": "EBikeRide"}
+TRACK_FORMATS = (".gpx.gz", ".tcx.gz", ".fit.gz", ".gpx", ".fit")
+FIT_UTC_OFFSETS_HOURS = (-7, -8, 1)
+FIT_EPOCH = datetime(1989, 12, 31, tzinfo=timezone.utc)
+FIT_PROFILE_VERSION = 2132
+FIT_PROTOCOL_VERSION = 0x20
+FIT_HEADER_SIZE = 14
+FIT_CRC_TABLE = (
+    0x0000, 0xCC01, 0xD801, 0x1400, 0xF001, 0x3C00, 0x2800, 0xE401,
+    0xA001, 0x6C00, 0x7800, 0xB401, 0x5000, 0x9C01, 0x8801, 0x4400,
+)
+CSV_HEADER = [
+    "Activity ID", "Activity Date", "Activity Name", "Activity Type", "Activity Description",
+    "Elapsed Time", "Distance", "Commute", "Filename", "Elapsed Time", "Moving Time", "Distance",
+]
+SECONDS_PER_POINT = 3
+
+
+def fit_crc(data: bytes) -> int:
+    """FIT's CRC-16 of some bytes."""
+    crc = 0
+    for byte in data:
+        for nibble in (byte & 0x0F, byte >> 4):
+            low = FIT_CRC_TABLE[crc & 0x0F]
+            crc = ((crc >> 4) & 0x0FFF) ^ low ^ FIT_CRC_TABLE[nibble]
+    return crc
+
+
+def fit_timestamp(moment: datetime) -> int:
+    """Seconds since the FIT epoch."""
+    return int((moment - FIT_EPOCH).total_seconds())
+
+
+def write_fit(semicircles: List[List[int]], started_at: datetime, utc_offset: timedelta) -> bytes:
+    """A FIT activity file with these positions (one dropped out) and a local time offset."""
+    record_definition = struct.pack("<BBBHB", 0x60, 0, 0, 20, 3) + bytes([253, 4, 0x86, 0, 4, 0x85, 1, 4, 0x85])
+    # developer field the parser has to step over
+    record_definition += bytes([1, 0, 2, 0])
+    compressed_definition = struct.pack("<BBBHB", 0x41, 0, 0, 20, 2) + bytes([0, 4, 0x85, 1, 4, 0x85])
+    # big-endian activity message: timestamp, local_timestamp, num_sessions
+    activity_definition = struct.pack(">BBBHB", 0x42, 0, 1, 34, 3) + bytes([253, 4, 0x86, 5, 4, 0x86, 1, 2, 0x84])
+    body = [record_definition, compressed_definition, activity_definition]
+    timestamp = fit_timestamp(started_at)
+    for index, (latitude, longitude) in enumerate(semicircles):
+        timestamp += SECONDS_PER_POINT
+        if index % 2:
+            body.append(struct.pack("<Bii", 0x80 | (1 << 5) | (timestamp & 0x1F), latitude, longitude))
+        else:
+            body.append(struct.pack("<BIiiH", 0x00, timestamp, latitude, longitude, 0))
+    # a record with no fix yet
+    body.append(struct.pack("<BIiiH", 0x00, timestamp, 0x7FFFFFFF, 0x7FFFFFFF, 0))
+    offset_seconds = int(utc_offset.total_seconds())
+    body.append(struct.pack(">BIIH", 0x02, timestamp, timestamp + offset_seconds, 1))
+    data = b"".join(body)
+    header = struct.pack("<BBHI4s", FIT_HEADER_SIZE, FIT_PROTOCOL_VERSION, FIT_PROFILE_VERSION, len(data), b".FIT")
+    header += struct.pack("<H", fit_crc(header))
+    return header + data + struct.pack("<H", fit_crc(header + data))
+
+
+def write_gpx(coordinates: List[List[float]], started_at: datetime, name: str) -> bytes:
+    """A GPX track with these [lat, lon] points, leading whitespace and all."""
+    points = "".join(
+        f'<trkpt lat="{latitude!r}" lon="{longitude!r}">'
+        f"<time>{(started_at + timedelta(seconds=index * SECONDS_PER_POINT)):%Y-%m-%dT%H:%M:%SZ}</time></trkpt>"
+        for index, (latitude, longitude) in enumerate(coordinates)
+    )
+    return (
+        '  <?xml version="1.0" encoding="UTF-8"?>\n'
+        '<gpx creator="benchmark" version="1.1" xmlns="http://www.topografix.com/GPX/1/1">'
+        f"<trk><name>{name}</name><trkseg>{points}</trkseg></trk></gpx>"
+    ).encode("utf-8")
+
+
+def write_tcx(coordinates: List[List[float]], started_at: datetime) -> bytes:
+    """A TCX activity with these [lat, lon] points plus one trackpoint without a position."""
+    points = [f"<Trackpoint><Time>{started_at:%Y-%m-%dT%H:%M:%SZ}</Time><HeartRateBpm><Value>90</Value>"
+              "</HeartRateBpm></Trackpoint>"]
+    points.extend(
+        f"<Trackpoint><Position><LatitudeDegrees>{latitude!r}</LatitudeDegrees>"
+        f"<LongitudeDegrees>{longitude!r}</LongitudeDegrees></Position></Trackpoint>"
+        for latitude, longitude in coordinates
+    )
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        '<TrainingCenterDatabase xmlns="http://www.garmin.com/xmlschemas/TrainingCenterDatabase/v2">'
+        f'<Activities><Activity Sport="Biking"><Lap><Track>{"".join(points)}</Track></Lap></Activity>'
+        "</Activities></TrainingCenterDatabase>"
+    ).encode("utf-8")
+
+
+def export_date_text(moment: datetime) -> str:
+    """activities.csv's date format, e.g. "Jan 5, 2025, 3:04:05 PM"."""
+    return f"{moment:%b} {moment.day}, {moment.year}, {moment.hour % 12 or 12}:{moment:%M:%S %p}"
+
+
+def write_export(export_dir: Path, activity_count: int, points: int, seed: int = DEFAULT_SEED) -> List[Dict[str, Any]]:
+    """Write a synthetic export and return the activity dicts the API would give for it.
+
+    Args:
+        export_dir (Path): Empty directory to write into.
+        activity_count (int): Activities in activities.csv.
+        points (int): Track points per activity.
+        seed (int): Random seed.
+
+    Returns:
+        list: Expected activity dicts, oldest first (no coordinates for
+            the manual and broken ones).
+    """
+    rng = random.Random(seed)
+    (export_dir / "activities").mkdir(parents=True)
+    export_types = list(EXPORT_TYPES)
+    expected = []
+    rows = []
+    for index, feature in enumerate(iter_synthetic_features(activity_count, points, seed)):
+        properties = feature["properties"]
+        started_at = datetime.fromisoformat(properties["date"]).replace(tzinfo=timezone.utc)
+        # quantized to FIT's semicircles so every format carries the exact same floats
+        semicircles = [
+            [round(latitude / SEMICIRCLES_TO_DEGREES), round(longitude / SEMICIRCLES_TO_DEGREES)]
+            for longitude, latitude in feature["geometry"]["coordinates"]
+        ]
+        coordinates = [[latitude * SEMICIRCLES_TO_DEGREES, longitude * SEMICIRCLES_TO_DEGREES]
+                       for latitude, longitude in semicircles]
+        name = f'{properties["name"]}, "with" a comma & ampersand'
+        export_type = export_types[index % len(export_types)]
+        distance = round(rng.uniform(1000, 90000), 1)
+        local_date = started_at.astimezone(ZoneInfo(EXPORT_TIMEZONE)).replace(tzinfo=None)
+
+        filename = ""
+        if index % MANUAL_EVERY_N_ACTIVITIES:
+            extension = TRACK_FORMATS[index % len(TRACK_FORMATS)]
+            filename = f"activities/{properties['activity_id']}{extension}"
+            if ".fit" in extension:
+                utc_offset = timedelta(hours=FIT_UTC_OFFSETS_HOURS[index % len(FIT_UTC_OFFSETS_HOURS)])
+                data = write_fit(semicircles, started_at, utc_offset)
+                local_date = (started_at + utc_offset).replace(tzinfo=None)
+            elif ".tcx" in extension:
+                data = write_tcx(coordinates, started_at)
+            else:
+                data = write_gpx(coordinates, started_at, properties["name"])
+            if extension.endswith(".gz"):
+                data = gzip.compress(data, mtime=0)
+            if BROKEN_FILES.get(index) == "corrupt":
+                data = data[: len(data) // 3]
+            if BROKEN_FILES.get(index) != "missing":
+                (export_dir / filename).write_bytes(data)
+
+        has_track = filename and index not in BROKEN_FILES
+        expected.append(
+            {
+                "id": properties["activity_id"],
+                "name": name,
+                "type": EXPORT_TYPES[export_type],
+                "date": local_date,
+                "distance": distance,
+                "coordinates": downsample_coordinates(coordinates) if has_track else [],
+            }
+        )
+        rows.append([
+            properties["activity_id"], export_date_text(started_at), name, export_type, "",
+            "3600", f"{distance / 1000:.2f}", "false", filename, "3600.0", "3500.0", f"{distance}",
+        ])
+
+    with (export_dir / EXPORT_CSV_FILENAME).open("w", encoding="utf-8", newline="") as file_handle:
+        writer = csv.writer(file_handle)
+        writer.writerow(CSV_HEADER)
+        writer.writerows(rows)
+    return expected
+
+
+def check_thinning(original_points: int) -> Optional[str]:
+    """Problem with downsample_coordinates on a track this long, or None."""
+    points = [[float(index), 0.0] for index in range(original_points)]
+    thinned = downsample_coordinates(points)
+    if original_points <= EXPORT_MAX_POINTS_PER_ACTIVITY:
+        return None if thinned == points else "short track was thinned"
+    indices = [int(point[0]) for point in thinned]
+    if len(indices) != EXPORT_MAX_POINTS_PER_ACTIVITY:
+        return f"{len(indices)} points kept, expected {EXPORT_MAX_POINTS_PER_ACTIVITY}"
+    if indices[0] != 0 or indices[-1] != original_points - 1:
+        return "first or last point dropped"
+    if any(later <= earlier for earlier, later in zip(indices, indices[1:])):
+        return "points out of order or repeated"
+    return None
+
+
+def main() -> None:
+    """Parse args, print parse timings per worker count, and check the output."""
+    parser = argparse.ArgumentParser(description="Strava bulk export replay benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="activities in the export")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS_PER_ACTIVITY, help="points per activity")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="largest worker count to time")
+    args = parser.parse_args()
+
+    failures = 0
+    work_dir = Path(tempfile.mkdtemp(prefix="export-replay-"))
+    try:
+        export_dir = work_dir / "export"
+        expected_activities = write_export(export_dir, args.activities, args.points)
+        export_zip = Path(shutil.make_archive(str(work_dir / "export"), "zip", export_dir))
+        print(f"{args.activities} activities x {args.points} points, {os.cpu_count()} cores available, "
+              f"export zip {export_zip.stat().st_size / 1024 / 1024:.1f} MiB")
+
+        expected = activities_to_geojson(expected_activities)
+        results = {}
+        for workers in range(1, args.max_workers + 1):
+            started = time.perf_counter()
+            results[f"zip, {workers} workers"] = activities_to_geojson(
+                list(iter_export_activities(export_zip, workers=workers))
+            )
+            seconds = time.perf_counter() - started
+            print(f"{workers} workers: {seconds:6.2f} s  ({args.activities / seconds:6.0f} activities/s)")
+        results["directory, 1 worker"] = activities_to_geojson(list(iter_export_activities(export_dir, workers=1)))
+
+        for label, result in results.items():
+            if result != expected:
+                print(f"MISMATCH: {label} differs from the API path's features")
+                failures += 1
+        print(f"{len(expected['features'])} features from {args.activities} activities")
+
+        track_lengths = (10, EXPORT_MAX_POINTS_PER_ACTIVITY, EXPORT_MAX_POINTS_PER_ACTIVITY + 1, 2 * args.points)
+        for original_points in track_lengths:
+            problem = check_thinning(original_points)
+            if problem:
+                print(f"MISMATCH: thinning {original_points} points: {problem}")
+                failures += 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    print("outputs match" if not failures else f"{failures} mismatches")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
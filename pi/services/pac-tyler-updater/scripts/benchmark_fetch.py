@@ -0,0 +1,178 @@
+"""Time StravaClient.iter_detailed_activities against a local fake Strava.
+
+Runs the fetch once per worker count (1 is the old serial behaviour) against
+scripts/fake_strava.py, which adds a fixed delay to every request in place
+of the round trip to Strava, and prints wall-clock time and speedup over
+the serial run. Also checks every run yields the same activities in the
+same order.
+
+Then, in a subprocess with a temp DATA_DIR, runs main.update_geojson with a
+warm activity cache -- a run that fetched everything and crashed before
+its first checkpoint, with two activities that have no GPS track -- and
+checks:
+- cached activities come back exactly as fetched (dates as datetimes)
+- the update loads the rest from the cache and saves them all
+- the trackless ones are skipped, not loaded from the cache, on that run
+  and the next
+
+Exits non-zero if any check fails.
+
+    python scripts/benchmark_fetch.py
+    python scripts/benchmark_fetch.py --activities 200 --latency 0.15 --workers 1 2 4 8
+
+Never talks to the real Strava API.
+"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from typing import List, Optional
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import SILENCE_TOKEN_WARNINGS_ENV_VAR
+from scripts.fake_strava import DEFAULT_LATENCY_SECONDS, DEFAULT_POINTS_PER_ACTIVITY, FakeStrava
+from scripts.synthetic_activities import iter_synthetic_features
+from utils.activity_cache import ActivityCache
+from utils.strava_client import StravaClient
+
+DEFAULT_ACTIVITY_COUNT = 100
+DEFAULT_WORKER_COUNTS = (1, 2, 4, 8)
+FETCH_AFTER = datetime(2024, 1, 1, tzinfo=timezone.utc)
+MS_PER_S = 1000
+# warm cache check: the first few activities are already stored, and these
+# (counted from the newest) have no latlng stream
+UPDATE_CHECK_ACTIVITIES = 40
+UPDATE_CHECK_STORED = 10
+UPDATE_CHECK_TRACKLESS = (5, 10)
+UPDATE_CHECK_LATENCY_SECONDS = 0.0
+BENCHMARK_BROTLI_QUALITY = 5
+
+
+class RecordingCache(ActivityCache):
+    """ActivityCache that remembers which ids were looked up."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Open the cache like ActivityCache, with nothing looked up yet."""
+        super().__init__(*args, **kwargs)
+        self.looked_up: List[int] = []
+
+    def get(self, activity_id: int):
+        """ActivityCache.get, also appending the id to looked_up."""
+        self.looked_up.append(activity_id)
+        return super().get(activity_id)
+
+
+def fake_strava_client(fake: FakeStrava, cache: Optional[ActivityCache] = None) -> StravaClient:
+    """StravaClient pointed at the fake."""
+    strava = StravaClient(client_id="fake", client_secret="fake", redirect_uri="http://localhost", cache=cache)
+    strava.client = fake.client(strava.budget)
+    return strava
+
+
+def run_update_check() -> None:
+    """Child process: run update_geojson against a warm cache in DATA_DIR, print results, exit 1 on a failure."""
+    import main
+    from config import ACTIVITY_CACHE_FILE, GEOJSON_FILE
+    from utils import file_utils
+
+    file_utils.BROTLI_QUALITY = BENCHMARK_BROTLI_QUALITY
+    failures = []
+    with FakeStrava(activity_count=UPDATE_CHECK_ACTIVITIES, latency_seconds=UPDATE_CHECK_LATENCY_SECONDS) as fake:
+        activity_ids = sorted(fake.activities)
+        trackless_ids = {activity_ids[-index] for index in UPDATE_CHECK_TRACKLESS}
+        for activity_id in trackless_ids:
+            fake.activities[activity_id]["latlng"] = []
+        synthetic = iter_synthetic_features(UPDATE_CHECK_ACTIVITIES, DEFAULT_POINTS_PER_ACTIVITY)
+        stored = islice(synthetic, UPDATE_CHECK_STORED)
+        file_utils.save_geojson_features(stored, GEOJSON_FILE)
+
+        cache = RecordingCache(ACTIVITY_CACHE_FILE)
+        strava = fake_strava_client(fake, cache)
+        fetched = list(strava.iter_detailed_activities(FETCH_AFTER))
+        cached = list(strava.iter_detailed_activities(FETCH_AFTER))
+        if cached != fetched:
+            failures.append("cached activities differ from the fetched ones")
+
+        expected_count = UPDATE_CHECK_ACTIVITIES - len(trackless_ids)
+        for run in ("first", "second"):
+            cache.looked_up.clear()
+            try:
+                stored_count = main.update_geojson(strava, file_utils.load_geojson_properties())
+            except Exception as exc:
+                failures.append(f"{run} update with a warm cache failed: {exc!r}")
+                continue
+            if stored_count != expected_count:
+                failures.append(f"{run} update stored {stored_count} features, expected {expected_count}")
+            if trackless_ids & set(cache.looked_up):
+                failures.append(f"{run} update loaded trackless activities from the cache")
+            print(f"  warm cache, {run} update: {stored_count} features, {len(cache.looked_up)} cache loads")
+        cache.close()
+
+    for failure in failures:
+        print(f"  MISMATCH: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+def main() -> None:
+    """Parse args and print one timing row per worker count."""
+    parser = argparse.ArgumentParser(description="Concurrent Strava fetch benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="activities on the fake account")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY_SECONDS, help="seconds added to every request")
+    parser.add_argument("--workers", type=int, nargs="+", default=DEFAULT_WORKER_COUNTS, help="worker counts to time")
+    parser.add_argument("--update-check", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    os.environ.setdefault(SILENCE_TOKEN_WARNINGS_ENV_VAR, "true")
+    logging.getLogger("stravalib").setLevel(logging.ERROR)
+    if args.update_check:
+        run_update_check()
+        return
+
+    baseline_seconds = None
+    baseline_activities = None
+    failures = 0
+    with FakeStrava(activity_count=args.activities, latency_seconds=args.latency) as fake:
+        print(f"{args.activities} activities, {args.latency * MS_PER_S:.0f} ms per request")
+        for workers in args.workers:
+            strava = fake_strava_client(fake)
+            requests_before = fake.request_count
+
+            started = time.perf_counter()
+            activities = list(strava.iter_detailed_activities(FETCH_AFTER, workers=workers))
+            elapsed = time.perf_counter() - started
+
+            baseline_seconds = baseline_seconds or elapsed
+            baseline_activities = baseline_activities or activities
+            agree = activities == baseline_activities
+            failures += not agree
+            print(
+                f"  workers {workers:>2}: {elapsed:7.2f} s  ({baseline_seconds / elapsed:5.1f}x)  "
+                f"{len(activities)} activities, {fake.request_count - requests_before} requests  "
+                f"{'ok' if agree else 'MISMATCH'}"
+            )
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        completed = subprocess.run(
+            [sys.executable, __file__, "--update-check"],
+            env={**os.environ, "PAC_TYLER_DATA_DIR": data_dir},
+            capture_output=True,
+            text=True,
+        )
+    print(completed.stdout, end="")
+    if completed.returncode:
+        print(completed.stderr[-2000:], end="")
+        failures += 1
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+"""Time split_activities / clean_geojson with 1-4 worker processes and check the output is identical.
+
+Builds a synthetic collection (1,000 activities x 1,000 points by default,
+every 5th track with a pause gap to split at and a few invalid points to
+drop), then for each worker count times:
+
+split   -- split_activities over the collection
+clean   -- clean_geojson over the split collection, once per reduction mode
+           ("spacing" with the configured distances, and douglas_peucker)
+
+and checks every multi-worker result is exactly the 1-worker result, same
+features in the same order. worker startup is included in the timings --
+that's what a --full-reclean pays.
+
+The speedup is bounded by the cores actually available (printed first) and
+by the parent process pickling every feature out and every result back.
+"spacing" with the default (no) thinning does about as much work per point
+as that round trip, so it only shows off with douglas_peucker.
+
+Exits non-zero on any mismatch, so it doubles as the regression check.
+
+    python scripts/benchmark_parallel_clean.py
+    python scripts/benchmark_parallel_clean.py --activities 3000 --max-workers 4
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, List
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import PAUSE_SPLIT_THRESHOLD_KM, REDUCTION_MODE_DOUGLAS_PEUCKER, REDUCTION_MODE_SPACING
+from scripts.synthetic_activities import DEFAULT_SEED, synthetic_geojson
+from utils.geojson_cleaner import clean_geojson
+from utils.separate_pauses import split_activities
+
+DEFAULT_ACTIVITY_COUNT = 1000
+DEFAULT_POINTS_PER_ACTIVITY = 1000
+DEFAULT_MAX_WORKERS = 4
+GAP_EVERY_N_ACTIVITIES = 5
+# ~5 km, well past PAUSE_SPLIT_THRESHOLD_KM
+GAP_DEGREES = 0.05
+INVALID_POINTS_PER_ACTIVITY = 3
+# numeric but out of range -- splitting runs first and expects numbers
+INVALID_POINTS = ([-117.1, 123.0], [-200.0, 32.7])
+
+
+def benchmark_geojson(activity_count: int, points: int, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """Synthetic collection with some pause gaps and invalid points mixed in."""
+    rng = random.Random(seed)
+    geojson = synthetic_geojson(activity_count, points, seed)
+    for index, feature in enumerate(geojson["features"]):
+        coordinates = feature["geometry"]["coordinates"]
+        if index % GAP_EVERY_N_ACTIVITIES == 0:
+            middle = len(coordinates) // 2
+            coordinates[middle:] = [[lon + GAP_DEGREES, lat] for lon, lat in coordinates[middle:]]
+        for _ in range(INVALID_POINTS_PER_ACTIVITY):
+            coordinates.insert(rng.randrange(len(coordinates)), rng.choice(INVALID_POINTS))
+    return geojson
+
+
+def timed(function, *args, **kwargs):
+    """(result, seconds) of one call."""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - started
+
+
+def main() -> None:
+    """Parse args, print a timing table per step, and check every worker count agrees."""
+    parser = argparse.ArgumentParser(description="Process-pool split/clean benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="activities in the collection")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS_PER_ACTIVITY, help="points per activity")
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS, help="largest worker count to time")
+    args = parser.parse_args()
+
+    geojson = benchmark_geojson(args.activities, args.points)
+    print(f"{args.activities} activities x {args.points} points, {os.cpu_count()} cores available")
+
+    failures = 0
+    baselines: Dict[str, Any] = {}
+    timings: Dict[str, List[float]] = {}
+    split = None
+    for workers in range(1, args.max_workers + 1):
+        results = {}
+        results["split"], split_s = timed(split_activities, geojson, PAUSE_SPLIT_THRESHOLD_KM, workers)
+        split = results["split"]
+        timings.setdefault("split", []).append(split_s)
+        for mode in (REDUCTION_MODE_SPACING, REDUCTION_MODE_DOUGLAS_PEUCKER):
+            results[f"clean {mode}"], clean_s = timed(clean_geojson, split, mode, workers)
+            timings.setdefault(f"clean {mode}", []).append(clean_s)
+
+        for step, result in results.items():
+            baseline = baselines.setdefault(step, result)
+            if result != baseline:
+                print(f"MISMATCH: {step} with {workers} workers differs from 1 worker")
+                failures += 1
+
+    # speedup is per worker count against 1 worker, below 1.0x means the pool made it slower
+    header = "".join(f"{workers:>17} w" for workers in range(1, args.max_workers + 1))
+    print(f"{'step':<24}{header}")
+    for step, seconds in timings.items():
+        row = "".join(f"{value:>9.2f} s {seconds[0] / value:>5.2f}x" for value in seconds)
+        print(f"{step:<24}{row}")
+    print(f"split into {len(split['features'])} features, "
+          f"{len(baselines[f'clean {REDUCTION_MODE_DOUGLAS_PEUCKER}']['features'])} after cleaning")
+    print("outputs match" if not failures else f"{failures} mismatches")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
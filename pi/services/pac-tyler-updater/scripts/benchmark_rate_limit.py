@@ -0,0 +1,130 @@
+"""Check the Strava rate budget paces requests and retries throttled ones.
+
+Runs a fetch against scripts/fake_strava.py with its rate window shrunk from
+15 minutes to a few seconds and a limit well below what the fetch needs, so
+the budget has to wait for several window resets. Three runs:
+
+paced     -- StravaClient's budget only; Strava should never answer 429
+contended -- another "app user" burns most of the window mid-fetch; the
+             budget should see it in the usage headers and wait (requests
+             already in flight may still get a 429 and be retried)
+unpaced   -- budget told the limit is far higher than it is and never
+             corrected (no rate headers read), to show what 429s cost
+             without pacing; still retried, just slower
+
+Each run prints wall time, requests, 429s, and the budget's own log line,
+and must yield every activity in order -- exits non-zero otherwise.
+
+    python scripts/benchmark_rate_limit.py
+    python scripts/benchmark_rate_limit.py --activities 30 --limit 20 --window 2
+
+Never talks to the real Strava API.
+"""
+
+import argparse
+import logging
+import os
+import sys
+import threading
+import time
+import warnings
+from datetime import datetime, timezone
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import SILENCE_TOKEN_WARNINGS_ENV_VAR
+from scripts.fake_strava import FakeStrava
+from utils.rate_limiter import StravaRateBudget
+from utils.strava_client import StravaClient
+
+DEFAULT_ACTIVITY_COUNT = 40
+DEFAULT_LIMIT = 30
+DEFAULT_WINDOW_SECONDS = 3.0
+DEFAULT_LATENCY_SECONDS = 0.02
+DEFAULT_WORKERS = 4
+HEADROOM = 2
+# how much of the window the other app user takes, and when
+CONTENDING_SHARE = 0.8
+CONTENDING_DELAY_SECONDS = 0.5
+UNPACED_LIMIT_MULTIPLIER = 100
+FETCH_AFTER = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+class HeaderBlindBudget(StravaRateBudget):
+    """Budget that ignores the rate headers, for the unpaced comparison."""
+
+    def __call__(self, response_headers, method) -> None:
+        """Ignore the response's rate limit headers, so only the local count paces requests."""
+        return None
+
+
+def run(label: str, args: argparse.Namespace, budget: StravaRateBudget, contend: bool) -> bool:
+    """Fetch every activity from a fresh fake and print how it went.
+
+    Args:
+        label (str): Row label.
+        args (argparse.Namespace): Parsed flags.
+        budget (StravaRateBudget): Budget to pace the fetch with.
+        contend (bool): Have another user burn part of the window mid-fetch.
+
+    Returns:
+        bool: True if every activity came back, in order.
+    """
+    with FakeStrava(
+        activity_count=args.activities,
+        latency_seconds=args.latency,
+        short_limit=args.limit,
+        window_seconds=args.window,
+    ) as fake:
+        strava = StravaClient(client_id="fake", client_secret="fake", redirect_uri="http://localhost")
+        strava.budget = budget
+        strava.client = fake.client(budget)
+        if contend:
+            threading.Timer(CONTENDING_DELAY_SECONDS, fake.use_quota, [int(args.limit * CONTENDING_SHARE)]).start()
+
+        started = time.perf_counter()
+        activities = list(strava.iter_detailed_activities(FETCH_AFTER, workers=args.workers))
+        elapsed = time.perf_counter() - started
+
+        expected = sorted(fake.activities)
+        complete = [activity["id"] for activity in activities] == expected
+        print(
+            f"  {label:>9}: {elapsed:6.1f} s  {fake.request_count:4d} requests  {fake.throttled_count:3d} x 429  "
+            f"waited {budget.waited_seconds:5.1f} s  {len(activities)}/{len(expected)} activities "
+            f"{'ok' if complete else 'MISSING/OUT OF ORDER'}"
+        )
+        return complete
+
+
+def main() -> None:
+    """Parse args and run the paced, contended, and unpaced fetches."""
+    parser = argparse.ArgumentParser(description="Strava rate budget check against a fake API")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="activities on the fake account")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help="requests per window")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW_SECONDS, help="window length in seconds")
+    parser.add_argument("--latency", type=float, default=DEFAULT_LATENCY_SECONDS, help="seconds added to every request")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="fetch threads")
+    args = parser.parse_args()
+
+    os.environ.setdefault(SILENCE_TOKEN_WARNINGS_ENV_VAR, "true")
+    logging.basicConfig(level=logging.WARNING, format="    %(levelname)s %(message)s")
+    logging.getLogger("stravalib").setLevel(logging.ERROR)
+    # stravalib warns about the resolution param on every stream call
+    warnings.filterwarnings("ignore", category=FutureWarning)
+    print(f"{args.activities} activities, limit {args.limit} per {args.window:g} s window, {args.workers} workers")
+
+    def budget(limit: int, budget_class=StravaRateBudget) -> StravaRateBudget:
+        """A fresh budget with the benchmark's window and headroom."""
+        return budget_class(short_limit=limit, headroom=HEADROOM, short_window_seconds=args.window)
+
+    results = [
+        run("paced", args, budget(args.limit), contend=False),
+        run("contended", args, budget(args.limit), contend=True),
+        run("unpaced", args, budget(args.limit * UNPACED_LIMIT_MULTIPLIER, HeaderBlindBudget), contend=False),
+    ]
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Compare indented vs compact GeoJSON output: file size and serialize/parse time.
+
+Builds a synthetic FeatureCollection (5,000 activities by default), then for
+the old indented format and the compact format (no whitespace, coordinates
+rounded to COORDINATE_DECIMAL_PLACES) times json.dumps and json.loads and
+reports the size, plus the gzip size since compressed bytes are what
+actually goes over the wire (brotli is left out -- at the updater's quality
+setting it takes minutes on the indented file).
+
+    python scripts/benchmark_serialization.py
+    python scripts/benchmark_serialization.py --activities 5000 --points 300 --decimals 5
+
+Doesnt touch DATA_DIR.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import COORDINATE_DECIMAL_PLACES, GZIP_COMPRESSION_LEVEL
+from scripts.synthetic_activities import synthetic_geojson
+from utils.file_utils import json_dump_kwargs, round_geojson_coordinates
+
+DEFAULT_ACTIVITY_COUNT = 5000
+DEFAULT_POINTS_PER_ACTIVITY = 200
+BYTES_PER_MIB = 1024 * 1024
+MS_PER_S = 1000
+
+
+def time_call(function, *args, **kwargs):
+    """Run a function once and return (result, elapsed ms)."""
+    started = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, (time.perf_counter() - started) * MS_PER_S
+
+
+def main() -> None:
+    """Parse args and print a size/timing row per output format."""
+    parser = argparse.ArgumentParser(description="GeoJSON serialization benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="synthetic activity count")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS_PER_ACTIVITY, help="coordinates per activity")
+    parser.add_argument("--decimals", type=int, default=COORDINATE_DECIMAL_PLACES, help="compact coordinate precision")
+    args = parser.parse_args()
+
+    geojson = synthetic_geojson(args.activities, args.points)
+    print(f"{args.activities} activities x {args.points} points")
+
+    rows = []
+    text, serialize_ms = time_call(json.dumps, geojson, **json_dump_kwargs(compact=False))
+    rows.append(("indented", text, serialize_ms))
+
+    rounded, round_ms = time_call(round_geojson_coordinates, geojson, args.decimals)
+    text, dump_ms = time_call(json.dumps, rounded, **json_dump_kwargs(compact=True))
+    rows.append((f"compact ({args.decimals} dp)", text, round_ms + dump_ms))
+
+    baseline_bytes = None
+    for label, text, serialize_ms in rows:
+        data = text.encode("utf-8")
+        _, parse_ms = time_call(json.loads, data)
+        gzip_bytes = len(gzip.compress(data, compresslevel=GZIP_COMPRESSION_LEVEL))
+        baseline_bytes = baseline_bytes or len(data)
+        print(
+            f"  {label:>16}: {len(data) / BYTES_PER_MIB:8.1f} MiB ({len(data) / baseline_bytes:6.1%})  "
+            f"gzip {gzip_bytes / BYTES_PER_MIB:6.1f} MiB  "
+            f"serialize {serialize_ms:8.0f} ms  parse {parse_ms:8.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
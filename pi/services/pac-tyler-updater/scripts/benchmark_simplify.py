@@ -0,0 +1,88 @@
+"""Report what Douglas-Peucker simplification does to the served GeoJSON.
+
+For each tolerance, simplifies every track and prints the vertex count, the
+share of vertices removed, the served (compact, rounded) file size and its
+gzip size, and how long simplification took. Tolerance 0 is the current
+unsimplified output, for reference.
+
+Runs on synthetic activities by default, or on a real file:
+
+    python scripts/benchmark_simplify.py
+    python scripts/benchmark_simplify.py --input /home/tyler/pac-tyler-data/cleaned_output.geojson
+    python scripts/benchmark_simplify.py --tolerances 1 3 10
+
+Doesnt write anything.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import COORDINATE_DECIMAL_PLACES, GZIP_COMPRESSION_LEVEL
+from scripts.synthetic_activities import synthetic_geojson
+from utils.file_utils import json_dump_kwargs, load_existing_geojson, round_geojson_coordinates
+from utils.geojson_cleaner import simplify_coordinates
+
+DEFAULT_TOLERANCES_METERS = (0, 1, 2, 3, 5, 10, 20)
+DEFAULT_ACTIVITY_COUNT = 500
+DEFAULT_POINTS_PER_ACTIVITY = 1000
+BYTES_PER_MIB = 1024 * 1024
+MS_PER_S = 1000
+
+
+def simplify_collection(geojson: dict, tolerance_meters: float) -> dict:
+    """Copy a FeatureCollection with every track simplified at one tolerance."""
+    features = []
+    for feature in geojson["features"]:
+        coordinates = simplify_coordinates(feature["geometry"]["coordinates"], tolerance_meters)
+        features.append({**feature, "geometry": {**feature["geometry"], "coordinates": coordinates}})
+    return {**geojson, "features": features}
+
+
+def main() -> None:
+    """Parse args and print one row per tolerance."""
+    parser = argparse.ArgumentParser(description="Douglas-Peucker tolerance report")
+    parser.add_argument("--input", type=Path, help="GeoJSON file to measure (default: synthetic activities)")
+    parser.add_argument(
+        "--tolerances", type=float, nargs="+", default=DEFAULT_TOLERANCES_METERS, help="tolerances in meters"
+    )
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="synthetic activity count")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS_PER_ACTIVITY, help="synthetic points per activity")
+    args = parser.parse_args()
+
+    if args.input:
+        geojson = load_existing_geojson(args.input)
+    else:
+        geojson = synthetic_geojson(args.activities, args.points)
+
+    baseline_vertices = sum(len(feature["geometry"]["coordinates"]) for feature in geojson["features"])
+    baseline_bytes = None
+    print(f"{len(geojson['features'])} features, {baseline_vertices} vertices")
+
+    for tolerance in args.tolerances:
+        started = time.perf_counter()
+        simplified = simplify_collection(geojson, tolerance)
+        elapsed_ms = (time.perf_counter() - started) * MS_PER_S
+
+        vertices = sum(len(feature["geometry"]["coordinates"]) for feature in simplified["features"])
+        served = json.dumps(
+            round_geojson_coordinates(simplified, COORDINATE_DECIMAL_PLACES), **json_dump_kwargs(compact=True)
+        ).encode("utf-8")
+        gzip_bytes = len(gzip.compress(served, compresslevel=GZIP_COMPRESSION_LEVEL))
+        baseline_bytes = baseline_bytes or len(served)
+        print(
+            f"  tolerance {tolerance:>5g} m: {vertices:9d} vertices ({1 - vertices / baseline_vertices:6.1%} removed)  "
+            f"file {len(served) / BYTES_PER_MIB:7.2f} MiB ({len(served) / baseline_bytes:6.1%})  "
+            f"gzip {gzip_bytes / BYTES_PER_MIB:6.2f} MiB  {elapsed_ms:7.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
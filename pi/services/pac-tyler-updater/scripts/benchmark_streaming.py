@@ -0,0 +1,146 @@
+"""Measure peak memory of the whole-collection vs streaming clean-and-save pipeline.
+
+Writes a large synthetic raw GeoJSON file (3,000 activities x 600 points by
+default, full precision like the Strava streams), then runs it through
+split -> clean -> save GeoJSON -> activity dataset -> feature index twice,
+each in a fresh subprocess so the peak RSS figures dont mix:
+
+in-memory -- the old way: json.load the file, split and clean into new
+             collections, round a copy for the compact file and json.dump it
+streaming -- iter_geojson_features -> iter_split_and_clean ->
+             save_outputs, one feature at a time
+
+and prints each run's peak RSS and time. Also checks both runs wrote the
+same GeoJSON bytes and the same activity dataset, and exits non-zero if not.
+Tiles are left out of both runs -- the pyramid is held in memory either way.
+
+Brotli is turned down to BENCHMARK_BROTLI_QUALITY while this runs (quality
+11 takes minutes on a file this size); it streams the same way at any level.
+
+    python scripts/benchmark_streaming.py
+    python scripts/benchmark_streaming.py --activities 10000 --points 600
+
+Uses a temp dir, doesnt touch DATA_DIR.
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scripts.synthetic_activities import iter_synthetic_features
+
+DEFAULT_ACTIVITY_COUNT = 3000
+DEFAULT_POINTS_PER_ACTIVITY = 600
+BENCHMARK_BROTLI_QUALITY = 5
+PIPELINES = ("in-memory", "streaming")
+BYTES_PER_MIB = 1024 * 1024
+# ru_maxrss is in KiB on linux
+BYTES_PER_MAXRSS_UNIT = 1024
+
+
+def write_raw_input(path: Path, activity_count: int, points_per_activity: int) -> None:
+    """Write the synthetic raw FeatureCollection a feature at a time."""
+    with path.open("w", encoding="utf-8") as file_handle:
+        file_handle.write('{"type":"FeatureCollection","features":[')
+        for index, feature in enumerate(iter_synthetic_features(activity_count, points_per_activity)):
+            file_handle.write(("," if index else "") + json.dumps(feature, separators=(",", ":")))
+        file_handle.write("]}")
+
+
+def peak_rss_mib() -> float:
+    """Peak resident set size of this process so far."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * BYTES_PER_MAXRSS_UNIT / BYTES_PER_MIB
+
+
+def run_pipeline(pipeline: str, input_path: Path, brotli_quality: int) -> None:
+    """Child process: run one pipeline into DATA_DIR and print a JSON result line."""
+    import main
+    from config import COORDINATE_DECIMAL_PLACES, GEOJSON_FILE
+    from utils import file_utils
+    from utils.activity_dataset import save_activity_dataset
+    from utils.feature_index import save_feature_index
+
+    file_utils.BROTLI_QUALITY = brotli_quality
+    baseline_mib = peak_rss_mib()
+    started = time.perf_counter()
+
+    if pipeline == "streaming":
+        main.save_outputs(main.iter_split_and_clean(file_utils.iter_geojson_features(input_path)), include_tiles=False)
+    else:
+        with input_path.open("r", encoding="utf-8") as file_handle:
+            geojson = json.load(file_handle)
+        cleaned = main.split_and_clean(geojson)
+        rounded = file_utils.round_geojson_coordinates(cleaned, COORDINATE_DECIMAL_PLACES)
+        with GEOJSON_FILE.open("w", encoding="utf-8") as file_handle:
+            json.dump(rounded, file_handle, **file_utils.json_dump_kwargs(compact=True))
+        data = GEOJSON_FILE.read_bytes()
+        for suffix, compressed in file_utils.compressed_variants(data).items():
+            GEOJSON_FILE.with_name(GEOJSON_FILE.name + suffix).write_bytes(compressed)
+        save_activity_dataset(cleaned["features"])
+        save_feature_index(cleaned["features"])
+
+    print(json.dumps({
+        "seconds": time.perf_counter() - started,
+        "baseline_mib": baseline_mib,
+        "peak_mib": peak_rss_mib(),
+    }))
+
+
+def main() -> None:
+    """Parse args and print one peak memory row per pipeline."""
+    parser = argparse.ArgumentParser(description="Streaming pipeline peak memory benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="synthetic activity count")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS_PER_ACTIVITY, help="coordinates per activity")
+    parser.add_argument("--brotli-quality", type=int, default=BENCHMARK_BROTLI_QUALITY, help=argparse.SUPPRESS)
+    parser.add_argument("--pipeline", choices=PIPELINES, help=argparse.SUPPRESS)
+    parser.add_argument("--input", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.pipeline:
+        run_pipeline(args.pipeline, args.input, args.brotli_quality)
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        input_path = Path(work_dir) / "raw.geojson"
+        write_raw_input(input_path, args.activities, args.points)
+        input_mib = input_path.stat().st_size / BYTES_PER_MIB
+        print(f"{args.activities} activities x {args.points} points, raw file {input_mib:.1f} MiB")
+
+        outputs = {}
+        print(f"{'pipeline':<10} {'time s':>7} {'baseline MiB':>13} {'peak MiB':>9} {'growth MiB':>11}")
+        for pipeline in PIPELINES:
+            data_dir = Path(work_dir) / pipeline
+            data_dir.mkdir()
+            completed = subprocess.run(
+                [sys.executable, __file__, "--pipeline", pipeline, "--input", str(input_path),
+                 "--brotli-quality", str(args.brotli_quality)],
+                env={**os.environ, "PAC_TYLER_DATA_DIR": str(data_dir)},
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            result = json.loads(completed.stdout.strip().splitlines()[-1])
+            print(
+                f"{pipeline:<10} {result['seconds']:>7.1f} {result['baseline_mib']:>13.0f} "
+                f"{result['peak_mib']:>9.0f} {result['peak_mib'] - result['baseline_mib']:>11.0f}"
+            )
+            dataset = json.loads((data_dir / "pac-tyler-activities.json").read_text(encoding="utf-8"))
+            outputs[pipeline] = ((data_dir / "cleaned_output.geojson").read_bytes(), dataset["activities"])
+
+        if outputs["streaming"] != outputs["in-memory"]:
+            print("MISMATCH: streaming output differs from the in-memory pipeline")
+            sys.exit(1)
+        print("outputs match")
+
+
+if __name__ == "__main__":
+    main()
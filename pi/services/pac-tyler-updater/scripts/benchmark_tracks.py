@@ -0,0 +1,138 @@
+"""Compare the binary .tracks file with the GeoJSON: size, decode time, round trip.
+
+Saves a synthetic collection (1,000 activities x 300 points by default)
+with save_geojson_features, which writes cleaned_output.geojson and
+cleaned_output.tracks in one pass, then reports:
+
+size   -- plain, gzip and brotli bytes of each file (the siblings the
+          backend actually sends)
+decode -- json.loads of the GeoJSON vs decode_tracks back into the same
+          nested lists, and vs just viewing the int32 deltas and
+          prefix-summing them (what a browser does with an Int32Array)
+
+and checks the round trip: decode_tracks has to give back exactly the
+features in the compact GeoJSON, for the synthetic file plus a few edge
+cases (no features, a single point, tracks crossing the antimeridian).
+Exits non-zero on a mismatch, so it doubles as the regression check.
+
+    python scripts/benchmark_tracks.py
+    python scripts/benchmark_tracks.py --activities 5000 --points 300
+
+Uses a temp dir, doesnt touch DATA_DIR.
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import numpy as np
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from config import BROTLI_SUFFIX, GZIP_SUFFIX
+from scripts.synthetic_activities import synthetic_geojson
+from utils.file_utils import save_geojson_features
+from utils.track_format import COORDINATE_DTYPE, HEADER, decode_tracks, tracks_path_for
+
+DEFAULT_ACTIVITY_COUNT = 1000
+DEFAULT_POINTS_PER_ACTIVITY = 300
+DEFAULT_REPEATS = 5
+BYTES_PER_KIB = 1024
+MS_PER_S = 1000
+
+EDGE_CASES: Dict[str, List[Dict[str, Any]]] = {
+    "empty": [],
+    "single point": [
+        {"type": "Feature", "geometry": {"type": "LineString", "coordinates": [[-117.1611, 32.7157]]},
+         "properties": {"name": "one", "activity_id": 1}},
+    ],
+    "antimeridian": [
+        {"type": "Feature",
+         "geometry": {"type": "LineString", "coordinates": [[179.999999, -89.5], [-179.999999, 89.5], [0.0, 0.0]]},
+         "properties": {"name": "ünïcode \" name", "date": None}},
+    ],
+}
+
+
+def best_ms(function, *args, repeats: int = DEFAULT_REPEATS) -> float:
+    """Fastest of a few runs, in ms."""
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        function(*args)
+        timings.append((time.perf_counter() - started) * MS_PER_S)
+    return min(timings)
+
+
+def view_and_sum(data: bytes) -> np.ndarray:
+    """Decode the coordinates the way a browser would: one view, one running sum.
+
+    Sums across feature boundaries too, which a client undoes by subtracting
+    at each feature's first point -- cheap next to the sum, left out here.
+    """
+    _, _, _, feature_count, properties_length = HEADER.unpack_from(data)
+    offset = HEADER.size + properties_length + 4 * feature_count
+    return np.cumsum(np.frombuffer(data, dtype=COORDINATE_DTYPE, offset=offset).reshape(-1, 2), axis=0)
+
+
+def round_trips(work_dir: Path, name: str, features: List[Dict[str, Any]]) -> bool:
+    """Save features, decode the .tracks file, and compare with the GeoJSON."""
+    geojson_path = work_dir / f"{name.replace(' ', '-')}.geojson"
+    save_geojson_features(features, geojson_path)
+    expected = json.loads(geojson_path.read_text(encoding="utf-8"))
+    decoded = decode_tracks(tracks_path_for(geojson_path).read_bytes())
+    return decoded == expected
+
+
+def main() -> None:
+    """Parse args, print size and decode-time rows, and check round trips."""
+    parser = argparse.ArgumentParser(description="Binary track format benchmark")
+    parser.add_argument("--activities", type=int, default=DEFAULT_ACTIVITY_COUNT, help="synthetic activity count")
+    parser.add_argument("--points", type=int, default=DEFAULT_POINTS_PER_ACTIVITY, help="coordinates per activity")
+    args = parser.parse_args()
+
+    failures = 0
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = Path(temp_dir)
+        geojson_path = work_dir / "cleaned_output.geojson"
+        tracks_path = tracks_path_for(geojson_path)
+        save_geojson_features(synthetic_geojson(args.activities, args.points)["features"], geojson_path)
+        print(f"{args.activities} activities x {args.points} points")
+
+        print(f"{'file':<10} {'plain KiB':>10} {'gzip KiB':>9} {'brotli KiB':>11}")
+        for label, path in (("geojson", geojson_path), ("tracks", tracks_path)):
+            sizes = [
+                path.stat().st_size,
+                path.with_name(path.name + GZIP_SUFFIX).stat().st_size,
+                path.with_name(path.name + BROTLI_SUFFIX).stat().st_size,
+            ]
+            print(f"{label:<10} " + " ".join(f"{size / BYTES_PER_KIB:>{width}.0f}"
+                                              for size, width in zip(sizes, (10, 9, 11))))
+
+        geojson_text = geojson_path.read_text(encoding="utf-8")
+        tracks_data = tracks_path.read_bytes()
+        parse_ms = best_ms(json.loads, geojson_text)
+        decode_ms = best_ms(decode_tracks, tracks_data)
+        view_ms = best_ms(view_and_sum, tracks_data)
+        print(f"json.loads geojson      {parse_ms:8.1f} ms")
+        print(f"decode_tracks to lists  {decode_ms:8.1f} ms  ({parse_ms / decode_ms:.1f}x)")
+        print(f"int32 view + cumsum     {view_ms:8.1f} ms  ({parse_ms / view_ms:.0f}x)")
+
+        checks = {"synthetic": decode_tracks(tracks_data) == json.loads(geojson_text)}
+        for name, features in EDGE_CASES.items():
+            checks[name] = round_trips(work_dir, name, features)
+        for name, matched in checks.items():
+            print(f"round trip {name:<14} {'ok' if matched else 'MISMATCH'}")
+            failures += not matched
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+"""Local fake of the three Strava endpoints the updater calls, for benchmarks.
+
+Serves the synthetic activities from synthetic_activities.py as
+/athlete/activities (paged, oldest first when `after` is given, like
+Strava), /activities/{id}, and /activities/{id}/streams, with a fixed delay
+per request to stand in for the round trip to Strava. Each request is
+handled on its own thread, so concurrent fetches overlap like they would
+against the real API.
+
+Rate limits work like Strava's, just with a shorter window: usage is
+reported in X-ReadRateLimit-* headers and requests over the limit get a 429.
+
+    with FakeStrava(activity_count=100, latency_seconds=0.08) as fake:
+        strava.client = fake.client(strava.budget)
+"""
+
+import json
+import re
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from stravalib.client import Client
+
+from scripts.synthetic_activities import synthetic_geojson
+from utils.rate_limiter import BudgetedSession, StravaRateBudget
+
+DEFAULT_ACTIVITY_COUNT = 100
+DEFAULT_POINTS_PER_ACTIVITY = 300
+DEFAULT_LATENCY_SECONDS = 0.08
+DEFAULT_PER_PAGE = 30
+# far above what a benchmark uses unless a test lowers them
+DEFAULT_SHORT_LIMIT = 10000
+DEFAULT_DAILY_LIMIT = 100000
+DEFAULT_WINDOW_SECONDS = 15 * 60
+API_PREFIX = "/api/v3"
+ACTIVITY_PATTERN = re.compile(rf"^{API_PREFIX}/activities/(\d+)(/streams)?$")
+HTTP_OK = 200
+HTTP_NOT_FOUND = 404
+HTTP_TOO_MANY_REQUESTS = 429
+
+
+class _PlainHTTPAdapter(HTTPAdapter):
+    """Send stravalib's https:// URLs to the fake server over plain http."""
+
+    def send(self, request, **kwargs):
+        """HTTPAdapter.send with the URL's scheme swapped to http."""
+        request.url = request.url.replace("https://", "http://", 1)
+        return super().send(request, **kwargs)
+
+
+class FakeStrava:
+    """Threaded HTTP server answering like the Strava API, started as a context manager."""
+
+    def __init__(
+        self,
+        activity_count: int = DEFAULT_ACTIVITY_COUNT,
+        points_per_activity: int = DEFAULT_POINTS_PER_ACTIVITY,
+        latency_seconds: float = DEFAULT_LATENCY_SECONDS,
+        short_limit: int = DEFAULT_SHORT_LIMIT,
+        daily_limit: int = DEFAULT_DAILY_LIMIT,
+        window_seconds: float = DEFAULT_WINDOW_SECONDS,
+    ) -> None:
+        """Build the fake's activity data.
+
+        Args:
+            activity_count (int): Number of activities on the fake account.
+            points_per_activity (int): latlng points per activity stream.
+            latency_seconds (float): Delay added to every response.
+            short_limit (int): Requests allowed per window before 429s.
+            daily_limit (int): Requests allowed in total before 429s.
+            window_seconds (float): Short window length (Strava's is 15 min).
+                windows start at multiples of this in epoch time.
+
+        Returns:
+            None
+        """
+        self.latency_seconds = latency_seconds
+        self.short_limit = short_limit
+        self.daily_limit = daily_limit
+        self.window_seconds = window_seconds
+        self.request_count = 0
+        self.throttled_count = 0
+        self.window_usage = 0
+        self.daily_usage = 0
+        self._window_index = None
+        self._count_lock = threading.Lock()
+        self.activities: Dict[int, Dict[str, Any]] = {}
+        for feature in synthetic_geojson(activity_count, points_per_activity)["features"]:
+            properties = feature["properties"]
+            start_date = datetime.fromisoformat(properties["date"]).replace(tzinfo=timezone.utc)
+            self.activities[properties["activity_id"]] = {
+                "id": properties["activity_id"],
+                "name": properties["name"],
+                "type": properties["type"],
+                "sport_type": properties["type"],
+                "distance": properties["distance"],
+                "start_date": start_date.isoformat().replace("+00:00", "Z"),
+                "start_date_local": start_date.replace(tzinfo=None).isoformat() + "Z",
+                "latlng": [[lat, lon] for lon, lat in feature["geometry"]["coordinates"]],
+            }
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler_class())
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FakeStrava":
+        """Start serving on a background thread.
+
+        Returns:
+            FakeStrava: This fake.
+        """
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        """Stop the server and close its socket.
+
+        Args:
+            *exc_info: Exception details from the with block (unused).
+
+        Returns:
+            None
+        """
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def server(self) -> str:
+        """host:port the fake is listening on."""
+        host, port = self._server.server_address[:2]
+        return f"{host}:{port}"
+
+    def client(self, budget: Optional[StravaRateBudget] = None) -> Client:
+        """A stravalib Client that talks to this fake instead of strava.com.
+
+        Args:
+            budget (StravaRateBudget): Pace requests through this budget, the
+                way StravaClient wires up the real client. None leaves
+                stravalib's default limiter in place.
+
+        Returns:
+            Client: stravalib client.
+        """
+        session = BudgetedSession(budget) if budget else requests.Session()
+        session.mount("https://", _PlainHTTPAdapter())
+        client = Client(access_token="fake-token", requests_session=session, rate_limiter=budget)
+        client.protocol.server = self.server
+        return client
+
+    def use_quota(self, request_count: int) -> None:
+        """Count requests against the limits as if another app user made them."""
+        with self._count_lock:
+            self._roll_window()
+            self.window_usage += request_count
+            self.daily_usage += request_count
+
+    def _roll_window(self) -> None:
+        """Reset the short window count at each window boundary. Caller holds the lock."""
+        window_index = int(time.time() // self.window_seconds)
+        if window_index != self._window_index:
+            self._window_index = window_index
+            self.window_usage = 0
+
+    def summary(self, activity: Dict[str, Any]) -> Dict[str, Any]:
+        """Activity JSON without the stream."""
+        return {key: value for key, value in activity.items() if key != "latlng"}
+
+    def list_activities(self, query: Dict[str, List[str]]) -> List[Dict[str, Any]]:
+        """One page of /athlete/activities, oldest first after `after`."""
+        after = float(query.get("after", ["0"])[0])
+        page = int(query.get("page", ["1"])[0])
+        per_page = int(query.get("per_page", [str(DEFAULT_PER_PAGE)])[0])
+        matching = [
+            self.summary(activity)
+            for activity in self.activities.values()
+            if datetime.fromisoformat(activity["start_date"].replace("Z", "+00:00")).timestamp() > after
+        ]
+        return matching[(page - 1) * per_page:page * per_page]
+
+    def respond(self, path: str, query: Dict[str, List[str]]) -> Any:
+        """Response body for a request path, or None for a 404."""
+        if path == f"{API_PREFIX}/athlete/activities":
+            return self.list_activities(query)
+        match = ACTIVITY_PATTERN.match(path)
+        if not match or int(match.group(1)) not in self.activities:
+            return None
+        activity = self.activities[int(match.group(1))]
+        if match.group(2):
+            latlng = activity["latlng"]
+            return {"latlng": {"type": "latlng", "data": latlng, "series_type": "distance",
+                               "original_size": len(latlng), "resolution": "medium"}}
+        return self.summary(activity)
+
+    def _handler_class(self):
+        """Request handler bound to this fake."""
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            """Answers every GET from the fake's state."""
+
+            def do_GET(self) -> None:
+                """Count the request against the fake's windows, then send a 429 or fake.respond's JSON.
+
+                Every response carries X-ReadRateLimit-* headers like Strava's.
+                """
+                with fake._count_lock:
+                    fake._roll_window()
+                    fake.request_count += 1
+                    fake.window_usage += 1
+                    fake.daily_usage += 1
+                    throttled = fake.window_usage > fake.short_limit or fake.daily_usage > fake.daily_limit
+                    fake.throttled_count += throttled
+                    usage = f"{fake.window_usage},{fake.daily_usage}"
+                time.sleep(fake.latency_seconds)
+                url = urlparse(self.path)
+                if throttled:
+                    status, body = HTTP_TOO_MANY_REQUESTS, {"message": "Rate Limit Exceeded", "errors": []}
+                else:
+                    body = fake.respond(url.path, parse_qs(url.query))
+                    status = HTTP_OK if body is not None else HTTP_NOT_FOUND
+                    body = body if body is not None else {"message": "Record Not Found"}
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("X-ReadRateLimit-Limit", f"{fake.short_limit},{fake.daily_limit}")
+                self.send_header("X-ReadRateLimit-Usage", usage)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args) -> None:
+                """Keep the per-request access log off stderr."""
+
+        return Handler
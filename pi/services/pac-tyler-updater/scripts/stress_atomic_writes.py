@@ -0,0 +1,196 @@
+"""Hammer the data files with readers while the updater keeps rewriting them.
+
+One writer process rewrites the GeoJSON and activity dataset over and over
+(a different number of synthetic activities each time) while several reader
+processes read them as fast as they can, the way the backend does. Run
+twice:
+
+in-place -- the old way: open(..., "w") and json.dump straight over the
+            served files
+atomic   -- main.save_outputs: temp file + fsync + rename for every file,
+            then a new generation in manifest.json
+
+Every read counts as a failure if
+
+torn      -- the GeoJSON or dataset doesnt parse (a reader caught it half
+             written)
+mixed     -- the GeoJSON and dataset it read hold different activity counts
+             (read from two different saves)
+manifest  -- (atomic only) a file listed in manifest.json doesnt match the
+             size/sha256 recorded for it, or the generation's GeoJSON and
+             dataset disagree
+
+In atomic mode readers check the top-level files and the manifest's
+generation. the top-level pair can still come from two saves (each file is
+atomic, the set isnt -- that's what the manifest is for), so "mixed" is
+reported for it but doesnt fail the run. Exits non-zero if atomic mode sees
+any torn or manifest failure.
+
+    python scripts/stress_atomic_writes.py
+    python scripts/stress_atomic_writes.py --seconds 20 --readers 8
+
+Uses a temp dir, doesnt touch DATA_DIR.
+"""
+
+import argparse
+import hashlib
+import json
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict
+
+# make config/utils importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from scripts.synthetic_activities import synthetic_geojson
+
+DEFAULT_SECONDS = 10.0
+DEFAULT_READERS = 4
+MIN_ACTIVITY_COUNT = 100
+MAX_ACTIVITY_COUNT = 200
+POINTS_PER_ACTIVITY = 100
+BENCHMARK_BROTLI_QUALITY = 5
+MODES = ("in-place", "atomic")
+GEOJSON_FILENAME = "cleaned_output.geojson"
+DATASET_FILENAME = "pac-tyler-activities.json"
+MANIFEST_FILENAME = "manifest.json"
+STOP_FILENAME = "stop"
+COUNTERS = ("reads", "torn", "mixed", "manifest")
+
+
+def run_writer(mode: str, data_dir: Path) -> None:
+    """Child process: rewrite the data files until the stop file shows up."""
+    import main
+    from utils import file_utils
+    from utils.activity_dataset import build_activity_dataset
+
+    file_utils.BROTLI_QUALITY = BENCHMARK_BROTLI_QUALITY
+    collections = [
+        synthetic_geojson(count, POINTS_PER_ACTIVITY)["features"]
+        for count in range(MIN_ACTIVITY_COUNT, MAX_ACTIVITY_COUNT + 1, MIN_ACTIVITY_COUNT // 2)
+    ]
+    saves = 0
+    while not (data_dir / STOP_FILENAME).exists():
+        features = collections[saves % len(collections)]
+        if mode == "atomic":
+            main.save_outputs(features, include_tiles=False)
+        else:
+            with (data_dir / GEOJSON_FILENAME).open("w", encoding="utf-8") as file_handle:
+                json.dump({"type": "FeatureCollection", "features": features}, file_handle)
+            with (data_dir / DATASET_FILENAME).open("w", encoding="utf-8") as file_handle:
+                json.dump(build_activity_dataset(features), file_handle)
+        saves += 1
+    print(json.dumps({"saves": saves}))
+
+
+def activity_counts(geojson_data: bytes, dataset_data: bytes) -> tuple:
+    """Feature count of a GeoJSON file and activity count of a dataset file."""
+    return len(json.loads(geojson_data)["features"]), json.loads(dataset_data)["activity_count"]
+
+
+def check_manifest(data_dir: Path) -> bool:
+    """Read the current generation's files and check them against the manifest."""
+    manifest = json.loads((data_dir / MANIFEST_FILENAME).read_bytes())
+    contents = {}
+    for name, entry in manifest["files"].items():
+        data = (data_dir / entry["path"]).read_bytes()
+        if len(data) != entry["size"] or hashlib.sha256(data).hexdigest() != entry["sha256"]:
+            return False
+        contents[name] = data
+    feature_count, activity_count = activity_counts(contents[GEOJSON_FILENAME], contents[DATASET_FILENAME])
+    return feature_count == activity_count
+
+
+def run_reader(mode: str, data_dir: Path, results: multiprocessing.Queue) -> None:
+    """Read the data files in a loop until the stop file shows up, then report counts."""
+    counts = dict.fromkeys(COUNTERS, 0)
+    while not (data_dir / STOP_FILENAME).exists():
+        counts["reads"] += 1
+        try:
+            geojson_data = (data_dir / GEOJSON_FILENAME).read_bytes()
+            dataset_data = (data_dir / DATASET_FILENAME).read_bytes()
+            feature_count, activity_count = activity_counts(geojson_data, dataset_data)
+            counts["mixed"] += feature_count != activity_count
+        except ValueError:
+            counts["torn"] += 1
+        if mode == "atomic":
+            try:
+                counts["manifest"] += not check_manifest(data_dir)
+            except (ValueError, KeyError, FileNotFoundError):
+                counts["manifest"] += 1
+    results.put(counts)
+
+
+def stress(mode: str, seconds: float, reader_count: int) -> Dict[str, int]:
+    """Run one writer and `reader_count` readers against a fresh data dir."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        data_dir = Path(temp_dir)
+        writer_command = [sys.executable, __file__, "--writer", mode, "--data-dir", str(data_dir)]
+        writer_env = {**os.environ, "PAC_TYLER_DATA_DIR": str(data_dir)}
+        writer = subprocess.Popen(writer_command, env=writer_env, stdout=subprocess.PIPE, text=True)
+
+        # readers start once a first complete save is on disk
+        ready_file = data_dir / (MANIFEST_FILENAME if mode == "atomic" else DATASET_FILENAME)
+        while not ready_file.exists():
+            time.sleep(0.05)
+        time.sleep(0.5)
+
+        results: multiprocessing.Queue = multiprocessing.Queue()
+        readers = [
+            multiprocessing.Process(target=run_reader, args=(mode, data_dir, results))
+            for _ in range(reader_count)
+        ]
+        for reader in readers:
+            reader.start()
+        time.sleep(seconds)
+        (data_dir / STOP_FILENAME).touch()
+
+        totals = dict.fromkeys(COUNTERS, 0)
+        for _ in readers:
+            for name, count in results.get().items():
+                totals[name] += count
+        for reader in readers:
+            reader.join()
+        stdout, _ = writer.communicate()
+        if writer.returncode:
+            raise RuntimeError(f"{mode} writer exited with {writer.returncode}")
+        totals["saves"] = json.loads(stdout.strip().splitlines()[-1])["saves"]
+        return totals
+
+
+def main() -> None:
+    """Parse args, run both modes, and print one row of failure counts per mode."""
+    parser = argparse.ArgumentParser(description="Concurrent reader/writer stress test of the data files")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_SECONDS, help="how long readers run per mode")
+    parser.add_argument("--readers", type=int, default=DEFAULT_READERS, help="reader processes")
+    parser.add_argument("--writer", choices=MODES, help=argparse.SUPPRESS)
+    parser.add_argument("--data-dir", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.writer:
+        run_writer(args.writer, args.data_dir)
+        return
+
+    print(f"{args.readers} readers, {args.seconds:.0f} s per mode")
+    print(f"{'mode':<9} {'saves':>6} {'reads':>7} {'torn':>6} {'mixed':>6} {'manifest':>9}")
+    results = {}
+    for mode in MODES:
+        results[mode] = totals = stress(mode, args.seconds, args.readers)
+        manifest = totals["manifest"] if mode == "atomic" else "-"
+        print(f"{mode:<9} {totals['saves']:>6} {totals['reads']:>7} {totals['torn']:>6} "
+              f"{totals['mixed']:>6} {manifest:>9}")
+
+    atomic = results["atomic"]
+    if atomic["torn"] or atomic["manifest"]:
+        print("FAIL: readers saw a torn or inconsistent generation with atomic writes")
+        sys.exit(1)
+    print("atomic writes: no torn reads, every manifest generation consistent")
+
+
+if __name__ == "__main__":
+    main()
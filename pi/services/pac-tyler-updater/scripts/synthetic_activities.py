@@ -0,0 +1,79 @@
+"""Synthetic Strava-like activities for the updater benchmarks.
+
+Tracks are seeded random walks around San Diego with realistic GPS spacing
+(~10 m between points, full float precision like the Strava streams), in
+the same FeatureCollection shape activities_to_geojson produces. Seeded, so
+every benchmark run sees identical data.
+"""
+
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterator
+
+START_LATITUDE = 32.75
+START_LONGITUDE = -117.15
+START_SPREAD_DEGREES = 0.3
+# ~10 m per step at this latitude
+STEP_DEGREES = 0.0001
+FIRST_ACTIVITY_DATE = datetime(2025, 1, 1, 8, 0, 0)
+ACTIVITY_TYPES = ("Ride", "Run", "Walk", "Hike")
+DEFAULT_SEED = 7
+METERS_PER_STEP = 10
+
+
+def iter_synthetic_features(
+    activity_count: int,
+    points_per_activity: int,
+    seed: int = DEFAULT_SEED,
+) -> Iterator[Dict[str, Any]]:
+    """Yield random-walk LineString activities one at a time.
+
+    Same features as synthetic_geojson, without building the collection, so
+    a large file can be written without holding it all.
+
+    Args:
+        activity_count (int): Number of features.
+        points_per_activity (int): Coordinates per feature.
+        seed (int): Random seed.
+
+    Yields:
+        dict: GeoJSON feature.
+    """
+    rng = random.Random(seed)
+    for index in range(activity_count):
+        latitude = START_LATITUDE + rng.uniform(-START_SPREAD_DEGREES, START_SPREAD_DEGREES)
+        longitude = START_LONGITUDE + rng.uniform(-START_SPREAD_DEGREES, START_SPREAD_DEGREES)
+        heading_lat, heading_lon = rng.uniform(-1, 1), rng.uniform(-1, 1)
+        coordinates = []
+        for _ in range(points_per_activity):
+            latitude += STEP_DEGREES * (heading_lat + rng.uniform(-0.5, 0.5))
+            longitude += STEP_DEGREES * (heading_lon + rng.uniform(-0.5, 0.5))
+            coordinates.append([longitude, latitude])
+        yield {
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": coordinates},
+            "properties": {
+                "name": f"Synthetic activity {index}",
+                "date": (FIRST_ACTIVITY_DATE + timedelta(hours=index * 7)).isoformat(),
+                "distance": float(points_per_activity * METERS_PER_STEP),
+                "type": ACTIVITY_TYPES[index % len(ACTIVITY_TYPES)],
+                "activity_id": 10_000_000 + index,
+            },
+        }
+
+
+def synthetic_geojson(activity_count: int, points_per_activity: int, seed: int = DEFAULT_SEED) -> Dict[str, Any]:
+    """Build a FeatureCollection of random-walk LineString activities.
+
+    Args:
+        activity_count (int): Number of features.
+        points_per_activity (int): Coordinates per feature.
+        seed (int): Random seed.
+
+    Returns:
+        dict: GeoJSON FeatureCollection.
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": list(iter_synthetic_features(activity_count, points_per_activity, seed)),
+    }
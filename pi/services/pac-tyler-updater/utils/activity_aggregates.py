@@ -0,0 +1,288 @@
+"""Precomputed analytics over the activity dataset.
+
+Worked out once per run and stored in the dataset's "aggregates" section:
+distance/count totals per day/week/month/year, a rollup per activity type,
+the cumulative distance series, and the longest (and latest) daily/weekly
+streaks. they're also written on their own to pac-tyler-aggregates.json,
+which the backend serves at /pac-tyler/aggregates for any client that wants
+the totals without downloading the whole activity list.
+
+A run usually only adds a handful of activities after the last one, so the
+previous dataset's aggregates are patched in place: only the period and type
+entries the new activities fall in are touched, and the cumulative series
+and streaks are extended from their tail. (an activity dated before the
+previous last day rebuilds those two from the day table; an activity that
+went missing since the previous dataset starts over from nothing.) from
+scratch is the same code run over an empty section. distances are summed as
+integer decimeters, so the order they're added in doesnt change a bit of
+the result and incremental == from scratch exactly.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections import Counter
+from datetime import date, timedelta
+from operator import itemgetter
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import AGGREGATE_DISTANCE_DECIMALS, AGGREGATES_VERSION, METERS_PER_MILE
+
+DISTANCE_SCALE = 10**AGGREGATE_DISTANCE_DECIMALS
+ISO_DATE_LENGTH = len("YYYY-MM-DD")
+MONTH_KEY_LENGTH = len("YYYY-MM")
+YEAR_KEY_LENGTH = len("YYYY")
+PERIODS = ("day", "week", "month", "year")
+UNKNOWN_TYPE = "Unknown"
+ONE_DAY = timedelta(days=1)
+ONE_WEEK = timedelta(weeks=1)
+
+# identity of a dataset entry, for telling which ones a run added
+entry_key = itemgetter("activity_id", "name", "date", "distance_m", "type")
+
+
+def activity_day(date_value: str) -> Optional[date]:
+    """Calendar day of an activity's local start time, or None if unparseable."""
+    try:
+        return date.fromisoformat(date_value[:ISO_DATE_LENGTH])
+    except ValueError:
+        return None
+
+
+def week_start(day: date) -> date:
+    """Monday of a day's ISO week."""
+    return day - timedelta(days=day.weekday())
+
+
+def period_keys(day: date) -> Dict[str, str]:
+    """Key of each period a day falls in, e.g. 2026-05-09 / 2026-W19 / 2026-05 / 2026."""
+    iso_day = day.isoformat()
+    iso_year, iso_week, _ = day.isocalendar()
+    return {
+        "day": iso_day,
+        "week": f"{iso_year}-W{iso_week:02d}",
+        "month": iso_day[:MONTH_KEY_LENGTH],
+        "year": iso_day[:YEAR_KEY_LENGTH],
+    }
+
+
+def distance_units(distance_meters: float) -> int:
+    """Distance as an integer count of 10**-AGGREGATE_DISTANCE_DECIMALS meters."""
+    return round(distance_meters * DISTANCE_SCALE)
+
+
+def distance_fields(units: int, prefix: str = "distance") -> Dict[str, float]:
+    """<prefix>_m and <prefix>_mi for a total in distance units."""
+    meters = units / DISTANCE_SCALE
+    return {f"{prefix}_m": meters, f"{prefix}_mi": meters / METERS_PER_MILE}
+
+
+def empty_streak() -> Dict[str, Dict[str, Any]]:
+    """Longest and latest run of nothing."""
+    return {
+        "longest": {"length": 0, "start": None, "end": None},
+        "latest": {"length": 0, "start": None, "end": None},
+    }
+
+
+def empty_aggregates() -> Dict[str, Any]:
+    """Aggregates section with nothing counted yet."""
+    return {
+        "version": AGGREGATES_VERSION,
+        "totals": {"count": 0, **distance_fields(0), "first_date": None, "last_date": None, "active_days": 0},
+        "periods": {period: {} for period in PERIODS},
+        "types": {},
+        "cumulative": [],
+        "streaks": {"daily": empty_streak(), "weekly": empty_streak()},
+    }
+
+
+def add_to_entry(table: Dict[str, Dict[str, Any]], key: str, count: int, units: int) -> bool:
+    """Add count and distance to one totals entry, creating it if needed.
+
+    Args:
+        table (dict): Period or type table.
+        key (str): Entry key.
+        count (int): Activities to add.
+        units (int): Distance to add, in distance units.
+
+    Returns:
+        bool: True if the entry is new.
+    """
+    entry = table.get(key)
+    if entry is None:
+        table[key] = {"count": count, **distance_fields(units)}
+        return True
+    entry["count"] += count
+    entry.update(distance_fields(distance_units(entry["distance_m"]) + units))
+    return False
+
+
+def extend_streak(streak: Dict[str, Any], starts: Iterable[date], step: timedelta) -> None:
+    """Carry a streak forward over later active periods.
+
+    Args:
+        streak (dict): {"longest", "latest"} runs, updated in place. latest is
+            the run ending at the last period counted so far.
+        starts (iterable): First day of each active period to add, sorted,
+            none before the latest run's end.
+        step (timedelta): Length of one period.
+
+    Returns:
+        None
+    """
+    latest = streak["latest"]
+    for start in starts:
+        iso_start = start.isoformat()
+        if latest["end"] == iso_start:
+            continue
+        if latest["end"] is not None and start - date.fromisoformat(latest["end"]) == step:
+            latest = {**latest, "length": latest["length"] + 1, "end": iso_start}
+        else:
+            latest = {"length": 1, "start": iso_start, "end": iso_start}
+        # strictly longer, so ties keep the earliest stretch
+        if latest["length"] > streak["longest"]["length"]:
+            streak["longest"] = dict(latest)
+    streak["latest"] = latest
+
+
+def add_activities(aggregates: Dict[str, Any], activities: Iterable[Dict[str, Any]]) -> None:
+    """Count activities into an aggregates section, in place.
+
+    Args:
+        aggregates (dict): Section to update (empty_aggregates() or a previous
+            run's).
+        activities (iterable): Dataset entries not yet counted in it.
+            entries whose date doesnt parse arent counted anywhere.
+
+    Returns:
+        None
+    """
+    totals = aggregates["totals"]
+    periods = aggregates["periods"]
+    types = aggregates["types"]
+    previous_last = totals["last_date"]
+
+    # tally in integers first, so each entry's floats are redone once
+    day_deltas: Dict[date, List[int]] = {}
+    type_deltas: Dict[str, List[int]] = {}
+    for activity in activities:
+        day = activity_day(activity["date"])
+        if day is None:
+            continue
+        units = distance_units(activity["distance_m"])
+        day_delta = day_deltas.setdefault(day, [0, 0])
+        day_delta[0] += 1
+        day_delta[1] += units
+        type_delta = type_deltas.setdefault(activity.get("type") or UNKNOWN_TYPE, [0, 0, 0])
+        type_delta[0] += 1
+        type_delta[1] += units
+        type_delta[2] = max(type_delta[2], units)
+
+    if not day_deltas:
+        return
+
+    period_deltas: Dict[str, Dict[str, List[int]]] = {period: {} for period in PERIODS}
+    for day, (count, units) in day_deltas.items():
+        for period, key in period_keys(day).items():
+            period_delta = period_deltas[period].setdefault(key, [0, 0])
+            period_delta[0] += count
+            period_delta[1] += units
+    for period, deltas in period_deltas.items():
+        table = periods[period]
+        grown = False
+        for key, (count, units) in deltas.items():
+            grown |= add_to_entry(table, key, count, units)
+        if grown:
+            # keys stay in date order, new ones may have landed anywhere
+            periods[period] = dict(sorted(table.items()))
+
+    for type_name, (count, units, longest) in type_deltas.items():
+        is_new = add_to_entry(types, type_name, count, units)
+        type_entry = types[type_name]
+        if is_new or longest > distance_units(type_entry["longest_m"]):
+            type_entry.update(distance_fields(longest, "longest"))
+    aggregates["types"] = dict(sorted(types.items()))
+
+    day_keys = list(periods["day"])
+    added_units = sum(units for _, units in day_deltas.values())
+    totals["count"] += sum(count for count, _ in day_deltas.values())
+    totals.update(distance_fields(distance_units(totals["distance_m"]) + added_units))
+    totals.update({"first_date": day_keys[0], "last_date": day_keys[-1], "active_days": len(day_keys)})
+
+    cumulative = aggregates["cumulative"]
+    streaks = aggregates["streaks"]
+    if previous_last is not None and min(day_deltas).isoformat() < previous_last:
+        # something landed mid-history, everything after it shifts
+        cumulative.clear()
+        streaks.update({"daily": empty_streak(), "weekly": empty_streak()})
+    elif cumulative and cumulative[-1]["date"] == previous_last:
+        # the previous last day may have gained activities, redo its point
+        cumulative.pop()
+
+    tail_keys = day_keys[len(cumulative):]
+    tail_days = [date.fromisoformat(key) for key in tail_keys]
+    running_units = distance_units(cumulative[-1]["distance_m"]) if cumulative else 0
+    for key in tail_keys:
+        running_units += distance_units(periods["day"][key]["distance_m"])
+        cumulative.append({"date": key, **distance_fields(running_units)})
+    extend_streak(streaks["daily"], tail_days, ONE_DAY)
+    extend_streak(streaks["weekly"], sorted({week_start(day) for day in tail_days}), ONE_WEEK)
+
+
+def activities_added_since(
+    previous_activities: List[Dict[str, Any]],
+    activities: List[Dict[str, Any]],
+) -> Optional[List[Dict[str, Any]]]:
+    """The entries of `activities` that the previous dataset didnt have.
+
+    Entries are matched by entry_key, counting duplicates.
+
+    Args:
+        previous_activities (list): The previous dataset's activity entries.
+        activities (list): The new dataset's activity entries.
+
+    Returns:
+        Optional[list]: New entries in dataset order, or None if a previous
+        entry is missing from the new dataset (so patching isnt possible).
+    """
+    previous_keys = Counter(map(entry_key, previous_activities))
+    current_keys = Counter(map(entry_key, activities))
+    if previous_keys - current_keys:
+        return None
+    new_keys = current_keys - previous_keys
+    added = []
+    for activity in activities:
+        key = entry_key(activity)
+        if new_keys[key] > 0:
+            new_keys[key] -= 1
+            added.append(activity)
+    return added
+
+
+def build_aggregates(
+    activities: List[Dict[str, Any]],
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Aggregates for a dataset's activities, patching the previous run's where possible.
+
+    Args:
+        activities (list): The new dataset's activity entries.
+        previous (dict): The previous dataset (activities + aggregates), or
+            None. its aggregates section is updated in place and returned.
+
+    Returns:
+        dict: Aggregates section.
+    """
+    previous_aggregates = (previous or {}).get("aggregates") or {}
+    if previous_aggregates.get("version") == AGGREGATES_VERSION:
+        added = activities_added_since(previous.get("activities", []), activities)
+        if added is not None:
+            logging.info("Adding %s new activities to the previous aggregates.", len(added))
+            add_activities(previous_aggregates, added)
+            return previous_aggregates
+        logging.info("Activities changed since the last dataset, recomputing aggregates from scratch.")
+
+    aggregates = empty_aggregates()
+    add_activities(aggregates, activities)
+    return aggregates
@@ -0,0 +1,155 @@
+"""On-disk cache of raw Strava activities, so nothing is downloaded twice.
+
+Every activity fetched from Strava is stored by id with its metadata and
+full-resolution latlng stream (zlib-compressed JSON) in a SQLite file under
+DATA_DIR. The fetch loop serves repeats from here instead of the network,
+and --full-reclean rebuilds the archive from the raw streams offline.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Set
+
+from config import ACTIVITY_CACHE_FILE, DATE_TIME_OUTPUT_TIMESPEC
+from utils.file_utils import ensure_parent_dir
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS activities (
+        id INTEGER PRIMARY KEY,
+        name TEXT,
+        type TEXT,
+        date TEXT,
+        distance REAL,
+        coordinates BLOB NOT NULL,
+        fetched_at TEXT NOT NULL
+    )
+"""
+COLUMNS = "id, name, type, date, distance, coordinates"
+# what put() stores for an activity without a latlng stream (indoor, manual)
+EMPTY_COORDINATES = zlib.compress(json.dumps([]).encode("utf-8"))
+
+
+def _activity_from_row(row: tuple) -> Dict[str, Any]:
+    """Turn a cache row back into the dict iter_detailed_activities yields."""
+    activity_id, name, activity_type, date_value, distance, coordinates = row
+    return {
+        "id": activity_id,
+        "name": name,
+        "type": activity_type,
+        # stored as ISO text, fetched activities carry a datetime
+        "date": datetime.fromisoformat(date_value) if date_value else None,
+        "distance": distance,
+        "coordinates": json.loads(zlib.decompress(coordinates)),
+    }
+
+
+class ActivityCache:
+    """SQLite store of raw activity dicts keyed by Strava activity id."""
+
+    def __init__(self, filename: Path = ACTIVITY_CACHE_FILE) -> None:
+        """Open (creating if needed) the cache database.
+
+        Args:
+            filename (Path): Cache database path.
+
+        Returns:
+            None
+        """
+        ensure_parent_dir(filename)
+        self.filename = filename
+        self.connection = sqlite3.connect(filename)
+        self.connection.execute(SCHEMA)
+        self.connection.commit()
+
+    def __contains__(self, activity_id: int) -> bool:
+        """Whether an activity is cached, without loading its coordinates.
+
+        Args:
+            activity_id (int): Strava activity id.
+
+        Returns:
+            bool: True if the cache has it.
+        """
+        row = self.connection.execute("SELECT 1 FROM activities WHERE id = ?", (activity_id,)).fetchone()
+        return row is not None
+
+    def __len__(self) -> int:
+        """Number of cached activities."""
+        return self.connection.execute("SELECT COUNT(*) FROM activities").fetchone()[0]
+
+    def ids(self) -> Set[int]:
+        """Ids of every cached activity."""
+        return {row[0] for row in self.connection.execute("SELECT id FROM activities")}
+
+    def ids_without_coordinates(self) -> Set[int]:
+        """Ids of cached activities with no GPS track.
+
+        They never make it into the GeoJSON, so the stored ids dont cover
+        them -- pass these as skip_ids too or every run in their lookback
+        window loads them again for nothing.
+        """
+        rows = self.connection.execute("SELECT id FROM activities WHERE coordinates = ?", (EMPTY_COORDINATES,))
+        return {row[0] for row in rows}
+
+    def get(self, activity_id: int) -> Optional[Dict[str, Any]]:
+        """Look up one cached activity.
+
+        Args:
+            activity_id (int): Strava activity id.
+
+        Returns:
+            Optional[dict]: Activity dict, or None if it isnt cached.
+        """
+        row = self.connection.execute(
+            f"SELECT {COLUMNS} FROM activities WHERE id = ?", (activity_id,)
+        ).fetchone()
+        return _activity_from_row(row) if row else None
+
+    def put(self, activity: Dict[str, Any]) -> None:
+        """Store a freshly fetched activity, replacing any older copy.
+
+        Args:
+            activity (dict): Activity dict from iter_detailed_activities.
+
+        Returns:
+            None
+        """
+        date_value = activity["date"]
+        if isinstance(date_value, datetime):
+            date_value = date_value.isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC)
+        coordinates = zlib.compress(json.dumps(activity["coordinates"]).encode("utf-8"))
+        with self.connection:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO activities VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    activity["id"],
+                    activity["name"],
+                    activity["type"],
+                    date_value,
+                    activity["distance"],
+                    coordinates,
+                    datetime.now().isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC),
+                ),
+            )
+
+    def iter_activities(self) -> Iterator[Dict[str, Any]]:
+        """Yield every cached activity, oldest first.
+
+        Yields:
+            dict: Activity dict, same shape as iter_detailed_activities yields.
+        """
+        for row in self.connection.execute(f"SELECT {COLUMNS} FROM activities ORDER BY date, id"):
+            yield _activity_from_row(row)
+
+    def close(self) -> None:
+        """Close the database connection.
+
+        Returns:
+            None
+        """
+        self.connection.close()
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
+import json
+import logging
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, Iterable, List, Optional
 
-from config import DATE_TIME_OUTPUT_TIMESPEC, DERIVED_ACTIVITY_JSON, METERS_PER_MILE
+from config import DATE_TIME_OUTPUT_TIMESPEC, DERIVED_ACTIVITY_JSON, DERIVED_AGGREGATES_JSON, METERS_PER_MILE
+from utils.activity_aggregates import build_aggregates
 from utils.file_utils import save_json_data
 
 
@@ -24,20 +27,28 @@ def normalize_activity_id(value: Any) -> Optional[str]:
     return str(value)
 
 
-def build_activity_dataset(geojson: Dict[str, Any]) -> Dict[str, Any]:
-    """Build a normalized activity dataset from GeoJSON input.
+def build_activity_dataset(
+    features: Iterable[Dict[str, Any]],
+    previous: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Build a normalized activity dataset from GeoJSON features.
 
     strips out coordinate data and produces a flat list of activity
-    records suitable for the frontend analytics chart.
+    records suitable for the frontend analytics chart, plus precomputed
+    aggregates over them (utils/activity_aggregates.py). features are read
+    one at a time, so they can stream straight from the stored file.
 
     Args:
-        geojson (dict): GeoJSON FeatureCollection of activities.
+        features (iterable): GeoJSON activity features.
+        previous (dict): Last saved dataset, so the aggregates only have to
+            take in the new activities. None computes them from scratch.
 
     Returns:
-        dict: Derived dataset with generated_at, activity_count, and activities list.
+        dict: Derived dataset with generated_at, activity_count, activities
+            list, and aggregates.
     """
     activities: List[Dict[str, Any]] = []
-    for feature in geojson.get("features", []):
+    for feature in features:
         properties = feature.get("properties", {})
         date_value = properties.get("date")
         distance_meters = properties.get("distance")
@@ -62,22 +73,51 @@ def build_activity_dataset(geojson: Dict[str, Any]) -> Dict[str, Any]:
         "generated_at": datetime.now(timezone.utc).isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC),
         "activity_count": len(activities),
         "activities": activities,
+        "aggregates": build_aggregates(activities, previous),
     }
 
 
+def load_activity_dataset(path: Path = DERIVED_ACTIVITY_JSON) -> Optional[Dict[str, Any]]:
+    """Load the previously saved dataset, or None if there isnt a readable one.
+
+    Args:
+        path (Path): Dataset file.
+
+    Returns:
+        Optional[dict]: Parsed dataset.
+    """
+    try:
+        with path.open("r", encoding="utf-8") as file_handle:
+            return json.load(file_handle)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        logging.warning("Couldnt parse %s, recomputing aggregates from scratch.", path)
+        return None
+
+
 def save_activity_dataset(
-    geojson: Dict[str, Any],
+    features: Iterable[Dict[str, Any]],
     output_path: Path = DERIVED_ACTIVITY_JSON,
+    aggregates_path: Path = DERIVED_AGGREGATES_JSON,
 ) -> Dict[str, Any]:
-    """Build and save the derived activity dataset to disk.
+    """Build and save the derived activity dataset, and its aggregates on their own.
+
+    The aggregates are updated from the dataset already at output_path.
 
     Args:
-        geojson (dict): GeoJSON FeatureCollection of activities.
+        features (iterable): GeoJSON activity features.
         output_path (Path): Destination file path.
+        aggregates_path (Path): Where the aggregates section alone is saved,
+            for the backend's /pac-tyler/aggregates.
 
     Returns:
         dict: The dataset that was written.
     """
-    dataset = build_activity_dataset(geojson)
+    dataset = build_activity_dataset(features, load_activity_dataset(output_path))
     save_json_data(dataset, output_path)
+    save_json_data(
+        {"generated_at": dataset["generated_at"], **dataset["aggregates"]},
+        aggregates_path,
+    )
     return dataset
@@ -0,0 +1,98 @@
+"""Crash-safe replacement of the files the backend serves.
+
+The backend reads DATA_DIR over a read-only mount while the updater rewrites
+it, so a served file must never be written in place. Everything goes to a
+temp file in the same directory, is fsynced, then renamed over the old one
+(atomic within a filesystem), and the directory is fsynced so the rename
+itself survives a power cut. a reader sees the whole old file or the whole
+new one, and a crash mid-write leaves the old one untouched.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator
+
+from config import DATA_FILE_MODE
+
+TEMP_SUFFIX = ".tmp"
+
+
+def fsync_file(path: Path) -> None:
+    """Flush a file's contents to disk.
+
+    Args:
+        path (Path): File to flush.
+
+    Returns:
+        None
+    """
+    with open(path, "rb") as file_handle:
+        os.fsync(file_handle.fileno())
+
+
+def fsync_directory(directory: Path) -> None:
+    """Flush a directory entry change (a rename or new link) to disk.
+
+    Args:
+        directory (Path): Directory that changed.
+
+    Returns:
+        None
+    """
+    file_descriptor = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(file_descriptor)
+    finally:
+        os.close(file_descriptor)
+
+
+@contextmanager
+def atomic_path(filename: Path) -> Iterator[Path]:
+    """Yield a temp path to build a file at, renamed over `filename` on success.
+
+    For writers that need a path rather than a file handle (sqlite). the
+    caller closes whatever it opened before the block ends; the temp file is
+    then fsynced, made world-readable, and renamed into place. on an
+    exception it's deleted and `filename` is left as it was.
+
+    Args:
+        filename (Path): Destination path.
+
+    Yields:
+        Path: Temp file in the same directory (already exists, empty).
+    """
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    file_descriptor, temp_name = tempfile.mkstemp(dir=filename.parent, prefix=f".{filename.name}.", suffix=TEMP_SUFFIX)
+    os.close(file_descriptor)
+    temp_path = Path(temp_name)
+    try:
+        yield temp_path
+        fsync_file(temp_path)
+        # mkstemp is owner-only, the backend container reads as another user
+        os.chmod(temp_path, DATA_FILE_MODE)
+        os.replace(temp_path, filename)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    fsync_directory(filename.parent)
+
+
+@contextmanager
+def atomic_write(filename: Path, text: bool = False) -> Iterator[IO]:
+    """Open a temp file for writing that replaces `filename` when the block ends.
+
+        with atomic_write(path, text=True) as file_handle:
+            json.dump(data, file_handle)
+
+    Args:
+        filename (Path): Destination path.
+        text (bool): Open in UTF-8 text mode instead of binary.
+
+    Yields:
+        IO: Writable file handle.
+    """
+    with atomic_path(filename) as temp_path:
+        with open(temp_path, "w" if text else "wb", encoding="utf-8" if text else None) as file_handle:
+            yield file_handle
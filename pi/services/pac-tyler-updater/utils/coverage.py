@@ -0,0 +1,330 @@
+"""Rasterize every track into a fixed grid of web-mercator cells.
+
+Pac-Tyler is about covering the map, so this keeps the set of grid cells
+(slippy map tiles at COVERAGE_ZOOM) any track has passed through, plus the
+stats worth showing off: how many cells and how much ground that is, how
+many coarser tiles were touched, the largest fully covered square, and the
+largest cluster of cells surrounded on all four sides.
+
+A cell is counted when the line between two GPS points crosses it, not just
+when a point lands in it -- simplification leaves straightaways as a single
+long segment, so consecutive points can be cells apart. segments that stay
+within a cell or step to an edge neighbour are handled with numpy, only the
+longer ones are walked cell by cell.
+
+Runs only append to the stored GeoJSON, so the coverage file remembers how
+many features it has counted and a digest of them. if the stored file still
+starts with exactly those features only the rest are rasterized; otherwise
+(a --full-reclean, a zoom change) every track is rasterized again.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import math
+from collections import Counter
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import (
+    COVERAGE_FILE,
+    COVERAGE_SUMMARY_ZOOMS,
+    COVERAGE_VERSION,
+    COVERAGE_ZOOM,
+    DATE_TIME_OUTPUT_TIMESPEC,
+    GEOJSON_FILE,
+)
+from utils.file_utils import iter_geojson_features, save_json_data
+from utils.geojson_cleaner import EARTH_RADIUS_METERS
+from utils.tiles import tile_coordinates
+
+Cell = Tuple[int, int]
+
+# nudges a point sitting exactly on the last tile's far edge back inside it
+EDGE_EPSILON = 1e-9
+
+
+def segment_cells(x0: float, y0: float, x1: float, y1: float) -> List[Cell]:
+    """Every cell a straight segment passes through, in order.
+
+    Amanatides & Woo's grid traversal: step into whichever neighbour the
+    segment reaches first until it gets to the end point's cell. a segment
+    through a cell corner exactly picks one of the two side cells.
+
+    Args:
+        x0 (float): Start x, in tiles.
+        y0 (float): Start y, in tiles.
+        x1 (float): End x, in tiles.
+        y1 (float): End y, in tiles.
+
+    Returns:
+        list: (x, y) cells from the start point's to the end point's.
+    """
+    cell_x, cell_y = math.floor(x0), math.floor(y0)
+    end_x, end_y = math.floor(x1), math.floor(y1)
+    delta_x, delta_y = x1 - x0, y1 - y0
+    step_x = 1 if delta_x > 0 else -1
+    step_y = 1 if delta_y > 0 else -1
+    # segment length (as a fraction of it) between vertical/horizontal grid lines
+    t_delta_x = abs(1.0 / delta_x) if delta_x else math.inf
+    t_delta_y = abs(1.0 / delta_y) if delta_y else math.inf
+    # ... and until the first one
+    t_max_x = ((cell_x + 1 - x0) if delta_x > 0 else (x0 - cell_x)) * t_delta_x if delta_x else math.inf
+    t_max_y = ((cell_y + 1 - y0) if delta_y > 0 else (y0 - cell_y)) * t_delta_y if delta_y else math.inf
+
+    cells = [(cell_x, cell_y)]
+    for _ in range(abs(end_x - cell_x) + abs(end_y - cell_y)):
+        if t_max_x < t_max_y:
+            cell_x += step_x
+            t_max_x += t_delta_x
+        else:
+            cell_y += step_y
+            t_max_y += t_delta_y
+        cells.append((cell_x, cell_y))
+    return cells
+
+
+def track_cells(coordinates: List[List[float]], zoom: int = COVERAGE_ZOOM) -> Set[Cell]:
+    """Cells a track passes through.
+
+    Args:
+        coordinates (list): [lon, lat] points of a LineString.
+        zoom (int): Grid zoom level.
+
+    Returns:
+        set: (x, y) cells.
+    """
+    if not coordinates:
+        return set()
+    tile_count = 2**zoom
+    x, y = tile_coordinates(np.asarray(coordinates, dtype=float)[:, :2], zoom)
+    x = np.clip(x, 0, tile_count - EDGE_EPSILON)
+    y = np.clip(y, 0, tile_count - EDGE_EPSILON)
+    cell_x = np.floor(x).astype(np.int64)
+    cell_y = np.floor(y).astype(np.int64)
+    cells = set(zip(cell_x.tolist(), cell_y.tolist()))
+
+    # same cell or an edge neighbour means nothing in between to add
+    steps = np.abs(np.diff(cell_x)) + np.abs(np.diff(cell_y))
+    for index in np.flatnonzero(steps > 1).tolist():
+        if abs(x[index + 1] - x[index]) > tile_count / 2:
+            # crosses the antimeridian, the straight line would wrap the globe
+            continue
+        cells.update(segment_cells(x[index], y[index], x[index + 1], y[index + 1]))
+    return cells
+
+
+def feature_key(feature: Dict[str, Any]) -> bytes:
+    """What identifies a stored feature for the coverage digest.
+
+    Split tracks share their parent's properties, so the point count and end
+    points are part of it too -- they also change when a reclean re-thins
+    the tracks, which needs a full rebuild anyway.
+    """
+    coordinates = feature.get("geometry", {}).get("coordinates") or []
+    ends = [coordinates[0], coordinates[-1]] if coordinates else []
+    key = [feature.get("properties", {}), len(coordinates), ends]
+    return json.dumps(key, sort_keys=True, separators=(",", ":")).encode("utf-8") + b"\n"
+
+
+def cell_area_km2(y: int, zoom: int) -> float:
+    """Ground area of a cell in row y, which shrinks with cos(latitude)."""
+    latitude = math.atan(math.sinh(math.pi * (1 - 2 * (y + 0.5) / 2**zoom)))
+    side_km = 2 * math.pi * EARTH_RADIUS_METERS / 1000 / 2**zoom * math.cos(latitude)
+    return side_km * side_km
+
+
+def cell_corner(x: int, y: int, zoom: int) -> Tuple[float, float]:
+    """[lon, lat] of a cell's north-west corner."""
+    tile_count = 2**zoom
+    longitude = x / tile_count * 360.0 - 180.0
+    latitude = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * y / tile_count))))
+    return longitude, latitude
+
+
+def max_square(cells: Set[Cell]) -> Dict[str, Optional[int]]:
+    """Largest square of cells that are all covered.
+
+    Args:
+        cells (set): Covered (x, y) cells.
+
+    Returns:
+        dict: {"size", "x", "y"} with x/y its north-west cell. the first
+            (northmost, then westmost) wins a tie.
+    """
+    best = {"size": 0, "x": None, "y": None}
+    # side of the largest square with its south-east corner at each cell
+    sizes: Dict[Cell, int] = {}
+    for x, y in sorted(cells, key=lambda cell: (cell[1], cell[0])):
+        size = 1 + min(sizes.get((x - 1, y), 0), sizes.get((x, y - 1), 0), sizes.get((x - 1, y - 1), 0))
+        sizes[(x, y)] = size
+        if size > best["size"]:
+            best = {"size": size, "x": x - size + 1, "y": y - size + 1}
+    return best
+
+
+def max_cluster(cells: Set[Cell]) -> int:
+    """Size of the largest connected group of cells covered on all four sides."""
+    inner = {
+        (x, y) for x, y in cells
+        if (x - 1, y) in cells and (x + 1, y) in cells and (x, y - 1) in cells and (x, y + 1) in cells
+    }
+    largest = 0
+    while inner:
+        largest = max(largest, _pop_cluster(inner.pop(), inner))
+    return largest
+
+
+def _pop_cluster(start: Cell, cells: Set[Cell]) -> int:
+    """Flood-fill the group of cells connected to `start`, removing them from `cells`.
+
+    Args:
+        start (Cell): A cell already taken out of `cells`.
+        cells (set): Cells not yet assigned to a group, shrunk in place.
+
+    Returns:
+        int: Number of cells in the group, `start` included.
+    """
+    stack = [start]
+    size = 0
+    while stack:
+        x, y = stack.pop()
+        size += 1
+        for neighbour in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)):
+            if neighbour in cells:
+                cells.remove(neighbour)
+                stack.append(neighbour)
+    return size
+
+
+def coverage_stats(cells: Set[Cell], zoom: int = COVERAGE_ZOOM) -> Dict[str, Any]:
+    """Counts, area and records for a cell set.
+
+    Args:
+        cells (set): Covered (x, y) cells.
+        zoom (int): Zoom level of the cells.
+
+    Returns:
+        dict: Stats section of the coverage file.
+    """
+    bounds = None
+    if cells:
+        xs = [x for x, _ in cells]
+        ys = [y for _, y in cells]
+        west, north = cell_corner(min(xs), min(ys), zoom)
+        east, south = cell_corner(max(xs) + 1, max(ys) + 1, zoom)
+        bounds = [west, south, east, north]
+    return {
+        "cells": len(cells),
+        "area_km2": math.fsum(count * cell_area_km2(y, zoom) for y, count in Counter(y for _, y in cells).items()),
+        "tiles": {
+            str(summary_zoom): len({(x >> (zoom - summary_zoom), y >> (zoom - summary_zoom)) for x, y in cells})
+            for summary_zoom in COVERAGE_SUMMARY_ZOOMS
+            if summary_zoom <= zoom
+        },
+        "max_square": max_square(cells),
+        "max_cluster": max_cluster(cells),
+        "bounds": bounds,
+    }
+
+
+def load_coverage(path: Path = COVERAGE_FILE) -> Optional[Dict[str, Any]]:
+    """Load the previously saved coverage, or None if there isnt a readable one.
+
+    Args:
+        path (Path): Coverage file.
+
+    Returns:
+        Optional[dict]: Parsed coverage.
+    """
+    try:
+        with path.open("r", encoding="utf-8") as file_handle:
+            return json.load(file_handle)
+    except FileNotFoundError:
+        return None
+    except json.JSONDecodeError:
+        logging.warning("Couldnt parse %s, rasterizing coverage from scratch.", path)
+        return None
+
+
+def build_coverage(
+    geojson_file: Path = GEOJSON_FILE,
+    previous: Optional[Dict[str, Any]] = None,
+    zoom: int = COVERAGE_ZOOM,
+) -> Dict[str, Any]:
+    """Coverage of every track in the stored GeoJSON, reusing the previous run's cells where possible.
+
+    Takes a path rather than features because a changed archive needs a
+    second pass: whether the previous cells still apply is only known once
+    the first pass reaches the end of what they counted.
+
+    Args:
+        geojson_file (Path): Stored GeoJSON to rasterize.
+        previous (dict): The previous coverage file's contents, or None.
+        zoom (int): Grid zoom level.
+
+    Returns:
+        dict: Coverage file contents.
+    """
+    previous = previous or {}
+    reusable = previous.get("version") == COVERAGE_VERSION and previous.get("zoom") == zoom
+    source = (previous.get("source") or {}) if reusable else {}
+    previous_count = source.get("feature_count", 0)
+    digest = hashlib.sha256()
+    prefix_matches = previous_count == 0
+
+    added: Set[Cell] = set()
+    feature_count = 0
+    for feature in iter_geojson_features(geojson_file):
+        digest.update(feature_key(feature))
+        feature_count += 1
+        if feature_count == previous_count:
+            prefix_matches = digest.hexdigest() == source.get("digest")
+        elif feature_count > previous_count:
+            added |= track_cells(feature["geometry"]["coordinates"], zoom)
+
+    if prefix_matches and feature_count >= previous_count:
+        logging.info("Rasterized %s features, %s already counted in the previous coverage.",
+                     feature_count - previous_count, previous_count)
+        cells = set(map(tuple, previous.get("cells", []))) if previous_count else set()
+        cells |= added
+    else:
+        logging.info("Stored features changed since the last coverage, rasterizing all of them.")
+        cells = set()
+        for feature in iter_geojson_features(geojson_file):
+            cells |= track_cells(feature["geometry"]["coordinates"], zoom)
+
+    return {
+        "version": COVERAGE_VERSION,
+        "generated_at": datetime.now(timezone.utc).isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC),
+        "zoom": zoom,
+        "stats": coverage_stats(cells, zoom),
+        "cells": [list(cell) for cell in sorted(cells)],
+        "source": {"feature_count": feature_count, "digest": digest.hexdigest()},
+    }
+
+
+def save_coverage(geojson_file: Path = GEOJSON_FILE, output_path: Path = COVERAGE_FILE) -> Dict[str, Any]:
+    """Build and save the coverage grid, updated from the file already at output_path.
+
+    Args:
+        geojson_file (Path): Stored GeoJSON to rasterize.
+        output_path (Path): Destination file path.
+
+    Returns:
+        dict: The coverage that was written.
+    """
+    coverage = build_coverage(geojson_file, load_coverage(output_path))
+    save_json_data(coverage, output_path)
+    logging.info(
+        "Coverage: %s cells (%.1f km2), max square %s.",
+        coverage["stats"]["cells"],
+        coverage["stats"]["area_km2"],
+        coverage["stats"]["max_square"]["size"],
+    )
+    return coverage
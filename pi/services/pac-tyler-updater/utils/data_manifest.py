@@ -0,0 +1,170 @@
+"""Generation manifest, so the backend serves one consistent set of files.
+
+Each file is swapped in atomically on its own, but a run rewrites several
+(GeoJSON, .tracks, dataset, index) one after another -- in between, or after
+a crash partway through, the set on disk is a mix of two runs. So once
+every output of a save is written, they're hard-linked into
+generations/<n>/ (same inodes, no extra disk) and manifest.json is swapped
+in pointing at them. The backend serves the files the manifest names, so it
+only ever moves from one complete generation to the next. the last
+DATA_GENERATIONS_TO_KEEP generations are kept for requests still reading an
+older one.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import shutil
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from config import (
+    BROTLI_SUFFIX,
+    DATA_DIR_MODE,
+    DATA_GENERATIONS_DIR,
+    DATA_GENERATIONS_TO_KEEP,
+    DATA_MANIFEST_FILE,
+    DATE_TIME_OUTPUT_TIMESPEC,
+    GEOJSON_STREAM_CHUNK_CHARS,
+    GZIP_SUFFIX,
+)
+from utils.atomic_files import atomic_write, fsync_directory
+
+MANIFEST_VERSION = 1
+
+
+def file_sha256(path: Path) -> str:
+    """Hex sha256 of a file, read a chunk at a time."""
+    digest = hashlib.sha256()
+    with path.open("rb") as file_handle:
+        while chunk := file_handle.read(GEOJSON_STREAM_CHUNK_CHARS):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def read_manifest(manifest_file: Path = DATA_MANIFEST_FILE) -> Optional[Dict[str, Any]]:
+    """Load the current manifest, or None if there isnt a usable one.
+
+    Args:
+        manifest_file (Path): Manifest path.
+
+    Returns:
+        Optional[dict]: Parsed manifest.
+    """
+    try:
+        with manifest_file.open("r", encoding="utf-8") as file_handle:
+            return json.load(file_handle)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def remove_manifest(manifest_file: Path = DATA_MANIFEST_FILE) -> None:
+    """Drop the manifest so the backend goes back to the plain files.
+
+    Called when manifests are turned off, otherwise the backend would keep
+    serving the last generation forever.
+
+    Args:
+        manifest_file (Path): Manifest path.
+
+    Returns:
+        None
+    """
+    if manifest_file.exists():
+        manifest_file.unlink()
+        logging.info("Removed %s, generation manifests are off.", manifest_file)
+
+
+class DataGeneration:
+    """One save's worth of output files, published together by commit()."""
+
+    def __init__(
+        self,
+        manifest_file: Path = DATA_MANIFEST_FILE,
+        generations_dir: Path = DATA_GENERATIONS_DIR,
+    ) -> None:
+        """Start the generation after the one the current manifest names.
+
+        Args:
+            manifest_file (Path): Manifest path (its directory is DATA_DIR).
+            generations_dir (Path): Where generation directories are kept.
+
+        Returns:
+            None
+        """
+        self.manifest_file = manifest_file
+        self.data_dir = manifest_file.parent
+        self.generations_dir = generations_dir
+        current = read_manifest(manifest_file)
+        self.number = (current or {}).get("generation", 0) + 1
+        self.directory = generations_dir / str(self.number)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.directory_ready = False
+
+    def add(self, path: Path) -> None:
+        """Link a freshly written file (and its .gz/.br siblings) into this generation.
+
+        Args:
+            path (Path): Output file in DATA_DIR, already swapped into place.
+
+        Returns:
+            None
+        """
+        if not self.directory_ready:
+            # a run that crashed before committing leaves its links behind
+            # under the same number, start this generation from empty
+            shutil.rmtree(self.directory, ignore_errors=True)
+            self.directory.mkdir(parents=True)
+            self.directory_ready = True
+            os.chmod(self.directory, DATA_DIR_MODE)
+            os.chmod(self.generations_dir, DATA_DIR_MODE)
+
+        for candidate in (path, path.with_name(path.name + GZIP_SUFFIX), path.with_name(path.name + BROTLI_SUFFIX)):
+            if candidate.exists():
+                link = self.directory / candidate.name
+                link.unlink(missing_ok=True)
+                os.link(candidate, link)
+
+        linked = self.directory / path.name
+        self.files[path.name] = {
+            "path": linked.relative_to(self.data_dir).as_posix(),
+            "size": linked.stat().st_size,
+            "sha256": file_sha256(linked),
+        }
+
+    def commit(self, feature_count: int) -> None:
+        """Swap in a manifest naming this generation, then prune old generations.
+
+        Args:
+            feature_count (int): Features in this generation's GeoJSON, so
+                the backend can report it without reading the file.
+
+        Returns:
+            None
+        """
+        fsync_directory(self.directory)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "generation": self.number,
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC),
+            "feature_count": feature_count,
+            "files": self.files,
+        }
+        with atomic_write(self.manifest_file, text=True) as file_handle:
+            json.dump(manifest, file_handle, indent=2)
+        logging.info("Published data generation %s (%s files).", self.number, len(self.files))
+        self.prune()
+
+    def prune(self) -> None:
+        """Delete generation directories older than the last DATA_GENERATIONS_TO_KEEP.
+
+        Returns:
+            None
+        """
+        for old_directory in self.generations_dir.iterdir():
+            if old_directory.name.isdigit() and int(old_directory.name) <= self.number - DATA_GENERATIONS_TO_KEEP:
+                shutil.rmtree(old_directory, ignore_errors=True)
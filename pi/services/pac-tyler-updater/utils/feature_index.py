@@ -0,0 +1,110 @@
+"""Build the SQLite index the backend uses to answer bbox/date/type queries.
+
+One row per feature with its date, activity type, and served JSON, plus an
+R*Tree over each track's bounding box. The backend's /pac-tyler/features
+endpoint reads it so the frontend can pull a neighbourhood or a month
+without downloading and parsing every ride.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, Tuple
+
+import numpy as np
+
+from config import (
+    COMPACT_JSON_OUTPUT,
+    COORDINATE_DECIMAL_PLACES,
+    FEATURE_INDEX_FILE,
+)
+from utils.atomic_files import atomic_path
+from utils.file_utils import json_dump_kwargs, round_coordinates
+
+# the backend reads these names, keep website-backend/app/routers/pac_tyler.py in step
+SCHEMA = (
+    """
+    CREATE TABLE features (
+        id INTEGER PRIMARY KEY,
+        date TEXT,
+        type TEXT,
+        feature TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX features_date ON features (date)",
+    "CREATE INDEX features_type ON features (type COLLATE NOCASE)",
+    "CREATE VIRTUAL TABLE feature_bounds USING rtree (id, min_lon, max_lon, min_lat, max_lat)",
+)
+
+FeatureRow = Tuple[int, Any, Any, str]
+BoundsRow = Tuple[int, float, float, float, float]
+
+
+def index_rows(features: Iterable[Dict[str, Any]]) -> Iterator[Tuple[FeatureRow, BoundsRow]]:
+    """Yield the features-table and R*Tree rows for every feature with a track.
+
+    Coordinates are rounded and serialized the same way save_geojson writes
+    them, so a feature from the index matches the one in the GeoJSON file.
+
+    Args:
+        features (iterable): Cleaned GeoJSON features.
+
+    Yields:
+        tuple: ((id, date, type, feature json), (id, min_lon, max_lon, min_lat, max_lat)).
+    """
+    dump_kwargs = json_dump_kwargs(COMPACT_JSON_OUTPUT)
+    for feature_id, feature in enumerate(features, start=1):
+        geometry = feature.get("geometry") or {}
+        coordinates = geometry.get("coordinates")
+        if not coordinates:
+            continue
+        if COMPACT_JSON_OUTPUT:
+            geometry = {**geometry, "coordinates": round_coordinates(coordinates, COORDINATE_DECIMAL_PLACES)}
+        properties = feature.get("properties", {})
+        feature_json = json.dumps({**feature, "geometry": geometry}, **dump_kwargs)
+
+        points = np.asarray(coordinates, dtype=float)
+        min_lon, min_lat = points.min(axis=0).tolist()
+        max_lon, max_lat = points.max(axis=0).tolist()
+        yield (
+            (feature_id, properties.get("date"), properties.get("type"), feature_json),
+            (feature_id, min_lon, max_lon, min_lat, max_lat),
+        )
+
+
+def save_feature_index(features: Iterable[Dict[str, Any]], filename: Path = FEATURE_INDEX_FILE) -> int:
+    """Write the feature index to a temp database and rename it into place.
+
+    The backend opens the file read-only per request, so swapping in a whole
+    new file is all the coordination it needs. rows are inserted as the
+    features stream in, nothing is held for the whole collection.
+
+    Args:
+        features (iterable): Cleaned GeoJSON features.
+        filename (Path): Destination database path.
+
+    Returns:
+        int: Number of features indexed.
+    """
+    with atomic_path(filename) as temp_path:
+        connection = sqlite3.connect(temp_path)
+        try:
+            # throwaway file until the rename, no need for a journal
+            connection.execute("PRAGMA journal_mode = OFF")
+            connection.execute("PRAGMA synchronous = OFF")
+            for statement in SCHEMA:
+                connection.execute(statement)
+            row_count = 0
+            for feature_row, bounds_row in index_rows(features):
+                connection.execute("INSERT INTO features VALUES (?, ?, ?, ?)", feature_row)
+                connection.execute("INSERT INTO feature_bounds VALUES (?, ?, ?, ?, ?)", bounds_row)
+                row_count += 1
+            connection.commit()
+        finally:
+            connection.close()
+
+    logging.info("Indexed %s features in %s", row_count, filename)
+    return row_count
@@ -1,11 +1,33 @@
 """File utilities for reading and writing GeoJSON and JSON data."""
 
+import gzip
 import json
 import logging
+import zlib
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Iterable, Iterator, List, TextIO
 
-from config import GEOJSON_FILE, JSON_INDENT
+import brotli
+
+from config import (
+    BROTLI_QUALITY,
+    BROTLI_SUFFIX,
+    COMPACT_JSON_OUTPUT,
+    COMPACT_JSON_SEPARATORS,
+    COORDINATE_DECIMAL_PLACES,
+    GEOJSON_FILE,
+    GEOJSON_STREAM_CHUNK_CHARS,
+    GZIP_COMPRESSION_LEVEL,
+    GZIP_SUFFIX,
+    JSON_INDENT,
+)
+from utils.atomic_files import atomic_write
+from utils.run_report import run_profiler
+from utils.track_format import TrackWriter, tracks_path_for
+
+# gzip container around deflate, same bytes gzip.compress(mtime=0) writes
+GZIP_WBITS = 31
 
 
 def ensure_parent_dir(file_path: Path) -> None:
@@ -20,36 +42,282 @@ def ensure_parent_dir(file_path: Path) -> None:
     file_path.parent.mkdir(parents=True, exist_ok=True)
 
 
-def save_geojson(geojson: Dict[str, Any], filename: Path = GEOJSON_FILE) -> None:
-    """Save GeoJSON data to disk.
+def json_dump_kwargs(compact: bool) -> Dict[str, Any]:
+    """Build json.dump formatting kwargs for compact or indented output.
 
     Args:
-        geojson (dict): GeoJSON content to save.
+        compact (bool): True for no whitespace, False for JSON_INDENT indentation.
+
+    Returns:
+        dict: Keyword args for json.dump / json.dumps.
+    """
+    if compact:
+        return {"separators": COMPACT_JSON_SEPARATORS}
+    return {"indent": JSON_INDENT}
+
+
+def round_coordinates(coordinates: Any, decimal_places: int) -> Any:
+    """Round a GeoJSON coordinates array of any nesting depth.
+
+    Args:
+        coordinates (Any): A position ([lon, lat]) or nested list of positions.
+        decimal_places (int): Digits to keep after the decimal point.
+
+    Returns:
+        Any: Same structure with every number rounded.
+    """
+    if coordinates and isinstance(coordinates[0], (int, float)):
+        return [round(value, decimal_places) for value in coordinates]
+    return [round_coordinates(child, decimal_places) for child in coordinates]
+
+
+def round_feature_coordinates(feature: Dict[str, Any], decimal_places: int) -> Dict[str, Any]:
+    """Copy a feature with its geometry's coordinates rounded.
+
+    Args:
+        feature (dict): GeoJSON feature (left untouched).
+        decimal_places (int): Digits to keep after the decimal point.
+
+    Returns:
+        dict: New feature sharing the input's properties.
+    """
+    geometry = feature.get("geometry")
+    if geometry and "coordinates" in geometry:
+        geometry = {**geometry, "coordinates": round_coordinates(geometry["coordinates"], decimal_places)}
+    return {**feature, "geometry": geometry}
+
+
+def round_geojson_coordinates(geojson: Dict[str, Any], decimal_places: int) -> Dict[str, Any]:
+    """Copy a FeatureCollection with every geometry's coordinates rounded.
+
+    Only geometries are copied, properties are shared with the input, and
+    the input itself is left untouched.
+
+    Args:
+        geojson (dict): GeoJSON FeatureCollection.
+        decimal_places (int): Digits to keep after the decimal point.
+
+    Returns:
+        dict: New FeatureCollection with rounded coordinates.
+    """
+    features: List[Dict[str, Any]] = [
+        round_feature_coordinates(feature, decimal_places) for feature in geojson.get("features", [])
+    ]
+    return {**geojson, "features": features}
+
+
+def write_bytes_atomic(data: bytes, filename: Path) -> None:
+    """Write bytes so readers only ever see the old file or the complete new one.
+
+    See utils/atomic_files.py -- temp file, fsync, rename.
+
+    Args:
+        data (bytes): File content.
         filename (Path): Destination path.
 
     Returns:
         None
     """
+    with run_profiler.stage("write_disk"), atomic_write(filename) as file_handle:
+        file_handle.write(data)
+
+
+def compressed_variants(data: bytes) -> Dict[str, bytes]:
+    """Compress served bytes once per encoding the backend can send.
+
+    gzip mtime is pinned to 0 so unchanged data always compresses to the
+    same bytes.
+
+    Args:
+        data (bytes): Plain file content.
+
+    Returns:
+        dict: Sibling suffix (GZIP_SUFFIX / BROTLI_SUFFIX) to compressed bytes.
+    """
+    return {
+        GZIP_SUFFIX: gzip.compress(data, compresslevel=GZIP_COMPRESSION_LEVEL, mtime=0),
+        BROTLI_SUFFIX: brotli.compress(data, quality=BROTLI_QUALITY),
+    }
+
+
+def compress_file_variants(filename: Path, chunk_size: int = GEOJSON_STREAM_CHUNK_CHARS) -> Dict[str, bytes]:
+    """Same output as compressed_variants, reading the file a chunk at a time.
+
+    Only the compressed bytes are held in memory, never the whole plain file.
+
+    Args:
+        filename (Path): Plain file to compress.
+        chunk_size (int): Bytes read per chunk.
+
+    Returns:
+        dict: Sibling suffix (GZIP_SUFFIX / BROTLI_SUFFIX) to compressed bytes.
+    """
+    gzip_compressor = zlib.compressobj(GZIP_COMPRESSION_LEVEL, zlib.DEFLATED, GZIP_WBITS)
+    brotli_compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    gzip_chunks: List[bytes] = []
+    brotli_chunks: List[bytes] = []
+    with filename.open("rb") as file_handle:
+        while chunk := file_handle.read(chunk_size):
+            gzip_chunks.append(gzip_compressor.compress(chunk))
+            brotli_chunks.append(brotli_compressor.process(chunk))
+    gzip_chunks.append(gzip_compressor.flush())
+    brotli_chunks.append(brotli_compressor.finish())
+    return {GZIP_SUFFIX: b"".join(gzip_chunks), BROTLI_SUFFIX: b"".join(brotli_chunks)}
+
+
+def write_compressed_variants(filename: Path) -> None:
+    """Write pre-compressed .gz and .br siblings of a served file.
+
+    The website-backend sends these instead of the plain file when the
+    client's Accept-Encoding allows it.
+
+    Args:
+        filename (Path): The plain file that was just written.
+
+    Returns:
+        None
+    """
+    with run_profiler.stage("compress"):
+        variants = compress_file_variants(filename)
+    for suffix, compressed in variants.items():
+        write_bytes_atomic(compressed, filename.with_name(filename.name + suffix))
+    logging.info(
+        "Compressed %s: %s bytes -> gzip %s, brotli %s",
+        filename.name,
+        filename.stat().st_size,
+        len(variants[GZIP_SUFFIX]),
+        len(variants[BROTLI_SUFFIX]),
+    )
+
+
+def _write_feature_collection(
+    features: Iterable[Dict[str, Any]],
+    file_handle: TextIO,
+    compact: bool,
+) -> int:
+    """Write a FeatureCollection one feature at a time.
+
+    The text matches json.dump of the whole collection with the same
+    formatting, the features just never have to be in memory together.
+
+    Args:
+        features (iterable): GeoJSON features.
+        file_handle (TextIO): Open text file to write to.
+        compact (bool): Compact (coordinates already rounded by the caller)
+            or JSON_INDENT-indented output.
+
+    Returns:
+        int: Number of features written.
+    """
+    dump_kwargs = json_dump_kwargs(compact)
+    if compact:
+        header, separator, footer, empty_footer = '{"type":"FeatureCollection","features":[', ",", "]}", "]}"
+    else:
+        # features sit two levels deep in the indented collection
+        item_indent = "\n" + " " * (2 * JSON_INDENT)
+        header = f'{{\n{" " * JSON_INDENT}"type": "FeatureCollection",\n{" " * JSON_INDENT}"features": ['
+        separator = ","
+        footer = f'\n{" " * JSON_INDENT}]\n}}'
+        empty_footer = "]\n}"
+
+    file_handle.write(header)
+    count = 0
+    for feature in features:
+        with run_profiler.stage("serialize_json"):
+            text = json.dumps(feature, **dump_kwargs)
+            if not compact:
+                text = item_indent + text.replace("\n", item_indent)
+        file_handle.write(separator + text if count else text)
+        count += 1
+    file_handle.write(footer if count else empty_footer)
+    return count
+
+
+def save_geojson_features(
+    features: Iterable[Dict[str, Any]],
+    filename: Path = GEOJSON_FILE,
+    compact: bool = COMPACT_JSON_OUTPUT,
+    write_tracks: bool = True,
+) -> int:
+    """Stream features into a GeoJSON file and its binary .tracks copy, plus .gz/.br siblings.
+
+    Features can come straight from a generator -- only one is serialized at
+    a time. The file is written atomically (see utils/atomic_files.py), so
+    `features` can itself be streaming out of the file being replaced, and
+    the backend never reads a half-written one.
+
+    Args:
+        features (iterable): GeoJSON LineString features to save.
+        filename (Path): Destination path.
+        compact (bool): Write without whitespace and with coordinates rounded
+            to COORDINATE_DECIMAL_PLACES. False writes the full-precision
+            indented file.
+        write_tracks (bool): Also write the same tracks in the binary format
+            (utils/track_format.py) next to it, in the same pass.
+
+    Returns:
+        int: Number of features written.
+    """
+    if compact:
+        rounded = (round_feature_coordinates(feature, COORDINATE_DECIMAL_PLACES) for feature in features)
+        features = run_profiler.iter_stage("serialize_json", rounded)
     ensure_parent_dir(filename)
-    with filename.open("w", encoding="utf-8") as file_handle:
-        json.dump(geojson, file_handle, indent=JSON_INDENT)
+    tracks_filename = tracks_path_for(filename)
+    tracks_size = None
+    with TrackWriter(tracks_filename) if write_tracks else nullcontext() as track_writer:
+        if track_writer is not None:
+            features = track_writer.tee(features)
+        # serializing is charged to its own stage inside, and pulling features
+        # to theirs -- write_disk is just what's left, the writes and fsync
+        with run_profiler.stage("write_disk"), atomic_write(filename, text=True) as file_handle:
+            count = _write_feature_collection(features, file_handle, compact)
+        if track_writer is not None:
+            tracks_size = track_writer.close()
     logging.info("Saved GeoJSON to %s", filename)
+    write_compressed_variants(filename)
+    if tracks_size is not None:
+        logging.info("Saved binary tracks to %s (%s bytes)", tracks_filename, tracks_size)
+        write_compressed_variants(tracks_filename)
+    return count
 
 
-def save_json_data(data: Dict[str, Any], filename: Path) -> None:
-    """Save arbitrary JSON data to disk.
+def save_geojson(
+    geojson: Dict[str, Any],
+    filename: Path = GEOJSON_FILE,
+    compact: bool = COMPACT_JSON_OUTPUT,
+) -> None:
+    """Save GeoJSON data to disk, plus its .gz/.br siblings.
+
+    Args:
+        geojson (dict): GeoJSON content to save.
+        filename (Path): Destination path.
+        compact (bool): Write without whitespace and with coordinates rounded
+            to COORDINATE_DECIMAL_PLACES. False writes the full-precision
+            indented file.
+
+    Returns:
+        None
+    """
+    save_geojson_features(geojson.get("features", []), filename, compact)
+
+
+def save_json_data(data: Dict[str, Any], filename: Path, compact: bool = COMPACT_JSON_OUTPUT) -> None:
+    """Save arbitrary JSON data to disk atomically, plus its .gz/.br siblings.
 
     Args:
         data (dict): JSON content to save.
         filename (Path): Destination path.
+        compact (bool): Write without whitespace instead of indented.
 
     Returns:
         None
     """
-    ensure_parent_dir(filename)
-    with filename.open("w", encoding="utf-8") as file_handle:
-        json.dump(data, file_handle, indent=JSON_INDENT)
+    with run_profiler.stage("serialize_json"):
+        text = json.dumps(data, **json_dump_kwargs(compact))
+    with run_profiler.stage("write_disk"), atomic_write(filename, text=True) as file_handle:
+        file_handle.write(text)
     logging.info("Saved JSON data to %s", filename)
+    write_compressed_variants(filename)
 
 
 def load_existing_geojson(filename: Path = GEOJSON_FILE) -> Dict[str, Any]:
@@ -72,3 +340,166 @@ def load_existing_geojson(filename: Path = GEOJSON_FILE) -> Dict[str, Any]:
     except FileNotFoundError:
         logging.info("No existing GeoJSON file at %s, starting fresh.", filename)
         return {"type": "FeatureCollection", "features": []}
+
+
+class _JsonTextStream:
+    """Buffered reader that decodes one JSON value at a time from a text file."""
+
+    def __init__(self, file_handle: TextIO, chunk_size: int) -> None:
+        """Start reading at the beginning of the file.
+
+        Args:
+            file_handle (TextIO): Open text file.
+            chunk_size (int): Characters read per refill.
+
+        Returns:
+            None
+        """
+        self.file_handle = file_handle
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buffer = ""
+        self.position = 0
+        self.at_eof = False
+
+    def _refill(self, size: int) -> bool:
+        """Read more text, dropping what's already been consumed. False at EOF."""
+        if self.at_eof:
+            return False
+        chunk = self.file_handle.read(size)
+        if not chunk:
+            self.at_eof = True
+            return False
+        self.buffer = self.buffer[self.position:] + chunk
+        self.position = 0
+        return True
+
+    def next_char(self) -> str:
+        """Skip whitespace and consume the next character ("" at EOF)."""
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            if self.position < len(self.buffer):
+                self.position += 1
+                return self.buffer[self.position - 1]
+            if not self._refill(self.chunk_size):
+                return ""
+
+    def expect(self, expected: str) -> None:
+        """Consume the next character, which has to be `expected`."""
+        found = self.next_char()
+        if found != expected:
+            raise ValueError(f"Malformed GeoJSON: expected {expected!r}, found {found!r}")
+
+    def decode_value(self) -> Any:
+        """Decode the next JSON value, reading more of the file until it's complete."""
+        read_size = self.chunk_size
+        while True:
+            while self.position < len(self.buffer) and self.buffer[self.position].isspace():
+                self.position += 1
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.position)
+            except json.JSONDecodeError:
+                # value runs past the buffer. grow the read each time so one
+                # huge value doesnt get re-parsed once per chunk
+                if not self._refill(read_size):
+                    raise
+                read_size *= 2
+                continue
+            # a number ending right at the buffer edge might continue in the next chunk
+            if end == len(self.buffer) and self._refill(read_size):
+                continue
+            self.position = end
+            return value
+
+
+def iter_geojson_features(
+    filename: Path = GEOJSON_FILE,
+    chunk_size: int = GEOJSON_STREAM_CHUNK_CHARS,
+) -> Iterator[Dict[str, Any]]:
+    """Yield the features of a GeoJSON FeatureCollection without loading it all.
+
+    Only the feature being decoded (plus one chunk of text) is in memory at
+    a time, so this stays flat however big the archive gets. Top-level keys
+    other than "features" are skipped. A missing file yields nothing.
+
+    Args:
+        filename (Path): GeoJSON file path.
+        chunk_size (int): Characters read from the file at a time.
+
+    Yields:
+        dict: GeoJSON feature.
+
+    Raises:
+        ValueError: If the file isnt a JSON object (json.JSONDecodeError for
+            bad JSON inside it).
+    """
+    try:
+        file_handle = filename.open("r", encoding="utf-8")
+    except FileNotFoundError:
+        logging.info("No existing GeoJSON file at %s, starting fresh.", filename)
+        return
+
+    with file_handle:
+        stream = _JsonTextStream(file_handle, chunk_size)
+        stream.expect("{")
+        delimiter = stream.next_char()
+        while delimiter != "}":
+            if delimiter not in ('"', ","):
+                raise ValueError(f"Malformed GeoJSON: unexpected {delimiter!r}")
+            if delimiter == '"':
+                # put the quote back so the key decodes as a string
+                stream.position -= 1
+            key = stream.decode_value()
+            stream.expect(":")
+            if key == "features":
+                yield from _iter_feature_array(stream)
+            else:
+                stream.decode_value()
+            delimiter = stream.next_char()
+
+
+def _iter_feature_array(stream: _JsonTextStream) -> Iterator[Dict[str, Any]]:
+    """Yield the items of the "features" array, one decoded value at a time.
+
+    Args:
+        stream (_JsonTextStream): Stream positioned just past the "features" key's colon.
+
+    Yields:
+        dict: GeoJSON feature.
+
+    Raises:
+        ValueError: If the value isnt an array, or its items arent separated by commas.
+    """
+    stream.expect("[")
+    if stream.next_char() == "]":
+        return
+    # put back the item's first character
+    stream.position -= 1
+    while True:
+        yield stream.decode_value()
+        delimiter = stream.next_char()
+        if delimiter == "]":
+            return
+        if delimiter != ",":
+            raise ValueError(f"Malformed GeoJSON: unexpected {delimiter!r} in features")
+
+
+def load_geojson_properties(filename: Path = GEOJSON_FILE) -> Dict[str, Any]:
+    """Load just the properties of every stored feature, streaming the file.
+
+    What a normal run needs from the stored archive -- ids, dates, dedupe
+    keys -- without holding every track in memory.
+
+    Args:
+        filename (Path): GeoJSON file path.
+
+    Returns:
+        dict: FeatureCollection whose features have properties but no geometry.
+    """
+    features = [
+        {"type": "Feature", "geometry": None, "properties": feature.get("properties", {})}
+        for feature in iter_geojson_features(filename)
+    ]
+    logging.info("Loaded properties of %s existing features.", len(features))
+    return {"type": "FeatureCollection", "features": features}
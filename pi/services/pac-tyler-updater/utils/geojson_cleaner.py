@@ -5,9 +5,13 @@ from __future__ import annotations
 import math
 import re
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
 
 from config import (
+    COORDINATE_REDUCTION_MODE,
     DATE_TIME_OUTPUT_TIMESPEC,
     MAX_COORDINATES_PER_FEATURE,
     MAX_LATITUDE,
@@ -16,10 +20,18 @@ from config import (
     MIN_COORDINATES_PER_FEATURE,
     MIN_LATITUDE,
     MIN_LONGITUDE,
+    REDUCTION_MODE_DOUGLAS_PEUCKER,
+    REDUCTION_MODE_SPACING,
+    SIMPLIFY_TOLERANCE_METERS,
 )
+from utils.process_pool import iter_pool_map
 
 TYPE_ROOT_PATTERN = re.compile(r"root='([^']+)'", re.IGNORECASE)
 EARTH_RADIUS_METERS = 6371000
+# points checked per numpy call when searching for the next kept point
+SPACING_SEARCH_WINDOW = 64
+# slack for float error when using path length as a lower bound on distance
+SPACING_SEARCH_EPSILON_METERS = 1e-6
 
 
 def normalize_activity_type(value: Any) -> Optional[str]:
@@ -97,6 +109,109 @@ def haversine_meters(start: List[float], end: List[float]) -> float:
     return EARTH_RADIUS_METERS * c_value
 
 
+def haversine_meters_array(start: np.ndarray, end: np.ndarray) -> np.ndarray:
+    """Vectorized haversine_meters over arrays of [lon, lat] points.
+
+    Args:
+        start (np.ndarray): Start points, shape (n, 2) or (2,).
+        end (np.ndarray): End points, shape (n, 2). Broadcasts against start.
+
+    Returns:
+        np.ndarray: Distances in meters, shape (n,).
+    """
+    start_lon, start_lat = np.radians(start[..., 0]), np.radians(start[..., 1])
+    end_lon, end_lat = np.radians(end[..., 0]), np.radians(end[..., 1])
+
+    sin_lat = np.sin((end_lat - start_lat) / 2)
+    sin_lon = np.sin((end_lon - start_lon) / 2)
+    a_value = sin_lat ** 2 + np.cos(start_lat) * np.cos(end_lat) * sin_lon ** 2
+    c_value = 2 * np.arctan2(np.sqrt(a_value), np.sqrt(1 - a_value))
+    return EARTH_RADIUS_METERS * c_value
+
+
+def segment_lengths_meters(coordinates: Any) -> np.ndarray:
+    """Compute the length of every segment of a track in one array operation.
+
+    Args:
+        coordinates (Any): Track as a list of [lon, lat] pairs or an (n, 2) array.
+
+    Returns:
+        np.ndarray: n - 1 segment lengths in meters (empty for n < 2).
+    """
+    points = np.asarray(coordinates, dtype=float)
+    if len(points) < 2:
+        return np.empty(0)
+    return haversine_meters_array(points[:-1], points[1:])
+
+
+def _scan_for_spaced_point(points: np.ndarray, kept_index: int, start: int, min_distance_meters: float) -> int:
+    """Find the first point at or after `start` far enough from a kept point.
+
+    Fallback for the rare case (tight turns, doubling back) where the
+    cumulative-length candidate is still too close in a straight line.
+
+    Args:
+        points (np.ndarray): Track as an (n, 2) [lon, lat] array.
+        kept_index (int): Index of the last kept point.
+        start (int): First index to check.
+        min_distance_meters (float): Minimum spacing between retained points.
+
+    Returns:
+        int: Index of the next kept point, or the last index if no interior
+            point qualifies.
+    """
+    last_index = len(points) - 1
+    while start < last_index:
+        window_end = min(last_index, start + SPACING_SEARCH_WINDOW)
+        distances = haversine_meters_array(points[kept_index], points[start:window_end])
+        hits = np.flatnonzero(distances >= min_distance_meters)
+        if hits.size:
+            return start + int(hits[0])
+        start = window_end
+    return last_index
+
+
+def spaced_point_indices(coordinates: List[List[float]], min_distance_meters: float) -> List[int]:
+    """Pick the interior points reduce_coordinates keeps for a minimum spacing.
+
+    Same greedy rule as checking every point against the last kept one, but
+    vectorized: the distance along the path is an upper bound on the
+    straight-line distance, so cumulative segment lengths give, for every
+    point at once, the first later point that could possibly be far enough
+    away. One array haversine checks all those candidates, and the kept
+    chain is then just pointer-chasing. Candidates that fail the check
+    (turns) are resolved with a windowed scan.
+
+    Args:
+        coordinates (list): Coordinate list in [lon, lat] pairs.
+        min_distance_meters (float): Minimum spacing between retained points.
+
+    Returns:
+        list: Indices of kept points, starting with 0 and excluding the last point.
+    """
+    points = np.asarray(coordinates, dtype=float)
+    last_index = len(points) - 1
+    cumulative = np.concatenate(([0.0], np.cumsum(segment_lengths_meters(points))))
+
+    targets = cumulative + min_distance_meters - SPACING_SEARCH_EPSILON_METERS
+    candidates = np.searchsorted(cumulative, targets, side="left")
+    candidates = np.minimum(np.maximum(candidates, np.arange(1, len(points) + 1)), last_index)
+    candidate_ok = haversine_meters_array(points, points[candidates]) >= min_distance_meters
+
+    candidate_list = candidates.tolist()
+    candidate_ok_list = candidate_ok.tolist()
+
+    kept = [0]
+    while True:
+        kept_index = kept[-1]
+        next_index = candidate_list[kept_index]
+        if next_index < last_index and not candidate_ok_list[kept_index]:
+            next_index = _scan_for_spaced_point(points, kept_index, next_index + 1, min_distance_meters)
+        if next_index >= last_index:
+            return kept
+        kept.append(next_index)
+
+
 def reduce_coordinates(
     coordinates: List[List[float]],
     min_distance_meters: int = MIN_COORDINATE_DISTANCE_METERS,
@@ -118,11 +233,10 @@ def reduce_coordinates(
     if len(coordinates) < MIN_COORDINATES_PER_FEATURE:
         return coordinates
 
-    reduced = [coordinates[0]]
-    for point in coordinates[1:-1]:
-        if haversine_meters(reduced[-1], point) < min_distance_meters:
-            continue
-        reduced.append(point)
+    if min_distance_meters > 0:
+        reduced = [coordinates[index] for index in spaced_point_indices(coordinates, min_distance_meters)]
+    else:
+        reduced = coordinates[:-1]
 
     if reduced[-1] != coordinates[-1]:
         reduced.append(coordinates[-1])
@@ -138,6 +252,139 @@ def reduce_coordinates(
     return capped[:max_points]
 
 
+def local_planar_meters(points: np.ndarray) -> np.ndarray:
+    """Project [lon, lat] points onto a flat x/y grid in meters.
+
+    Equirectangular around the track's mean latitude -- plenty accurate over
+    the few tens of km a single activity covers.
+
+    Args:
+        points (np.ndarray): Track as an (n, 2) [lon, lat] array.
+
+    Returns:
+        np.ndarray: (n, 2) array of x/y meters relative to the first point.
+    """
+    radians = np.radians(points - points[0])
+    mean_latitude = np.radians(points[:, 1].mean())
+    return np.column_stack((
+        radians[:, 0] * np.cos(mean_latitude) * EARTH_RADIUS_METERS,
+        radians[:, 1] * EARTH_RADIUS_METERS,
+    ))
+
+
+def point_segment_distances(points: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Distance from each planar point to its own segment.
+
+    Uses the segment (not the infinite line), so loop rides that end where
+    they started still measure sensibly.
+
+    Args:
+        points (np.ndarray): (n, 2) planar points.
+        starts (np.ndarray): (n, 2) start of the segment each point is measured against.
+        ends (np.ndarray): (n, 2) matching segment ends.
+
+    Returns:
+        np.ndarray: n distances in the same units as the inputs.
+    """
+    segments = ends - starts
+    offsets = points - starts
+    length_squared = np.einsum("ij,ij->i", segments, segments)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        projection = np.einsum("ij,ij->i", offsets, segments) / length_squared
+    # zero-length segments (start == end) fall back to distance from the start
+    projection = np.clip(np.nan_to_num(projection, nan=0.0), 0, 1)
+    closest = starts + projection[:, None] * segments
+    return np.hypot(*(points - closest).T)
+
+
+def douglas_peucker_indices(coordinates: List[List[float]], tolerance_meters: float) -> List[int]:
+    """Indices of the points Douglas-Peucker keeps at a given tolerance.
+
+    Same result as the classic recursion (keep the endpoints, keep the point
+    farthest from the line between them if it's beyond the tolerance, repeat
+    on both halves), but every segment at the same depth is split in one
+    array pass instead of one numpy call per kept point.
+
+    Args:
+        coordinates (list): Coordinate list in [lon, lat] pairs.
+        tolerance_meters (float): Max distance a dropped point may sit from
+            the simplified line.
+
+    Returns:
+        list: Sorted indices of kept points, always including first and last.
+    """
+    points = local_planar_meters(np.asarray(coordinates, dtype=float))
+    point_indices = np.arange(len(points))
+    keep = np.zeros(len(points), dtype=bool)
+    keep[0] = keep[-1] = True
+    # segments that might still need splitting, by their start index
+    open_segment = np.ones(len(points), dtype=bool)
+
+    while True:
+        kept_indices = np.flatnonzero(keep)
+        # which kept-to-kept segment each point falls in
+        segment_ids = np.minimum(np.searchsorted(kept_indices, point_indices, side="right") - 1, len(kept_indices) - 2)
+        segment_starts = kept_indices[segment_ids]
+        segment_ends = kept_indices[segment_ids + 1]
+
+        distances = point_segment_distances(points, points[segment_starts], points[segment_ends])
+        distances[keep] = 0
+        distances[~open_segment[segment_starts]] = 0
+
+        segment_max = np.maximum.reduceat(distances, kept_indices[:-1])
+        splitting = segment_max > tolerance_meters
+        open_segment[kept_indices[:-1]] = splitting
+        if not splitting.any():
+            return kept_indices.tolist()
+
+        # first point hitting its segment's max, for every segment being split
+        is_farthest = (distances == segment_max[segment_ids]) & splitting[segment_ids]
+        farthest_ids, first_positions = np.unique(segment_ids[is_farthest], return_index=True)
+        new_points = np.flatnonzero(is_farthest)[first_positions]
+        keep[new_points] = True
+        # both halves of a split segment start out open
+        open_segment[new_points] = True
+
+
+def simplify_coordinates(
+    coordinates: List[List[float]],
+    tolerance_meters: float = SIMPLIFY_TOLERANCE_METERS,
+) -> List[List[float]]:
+    """Douglas-Peucker simplify a track, keeping shape-critical corners.
+
+    Args:
+        coordinates (list): Coordinate list in [lon, lat] pairs.
+        tolerance_meters (float): Max deviation from the original track; 0
+            disables simplification.
+
+    Returns:
+        list: Simplified coordinate list.
+    """
+    if tolerance_meters <= 0 or len(coordinates) <= MIN_COORDINATES_PER_FEATURE:
+        return coordinates
+    return [coordinates[index] for index in douglas_peucker_indices(coordinates, tolerance_meters)]
+
+
+def thin_coordinates(coordinates: List[List[float]], mode: str = COORDINATE_REDUCTION_MODE) -> List[List[float]]:
+    """Apply the configured reduction mode to a track.
+
+    Args:
+        coordinates (list): Valid coordinate list in [lon, lat] pairs.
+        mode (str): REDUCTION_MODE_SPACING or REDUCTION_MODE_DOUGLAS_PEUCKER.
+
+    Returns:
+        list: Reduced coordinate list.
+
+    Raises:
+        ValueError: If the mode isnt one of the known modes.
+    """
+    if mode == REDUCTION_MODE_SPACING:
+        return reduce_coordinates(coordinates)
+    if mode == REDUCTION_MODE_DOUGLAS_PEUCKER:
+        return simplify_coordinates(coordinates)
+    raise ValueError(f"Unknown coordinate reduction mode: {mode}")
+
+
 def filter_valid_coordinates(coordinates: List[List[float]]) -> List[List[float]]:
     """Remove coordinates outside valid lat/lon bounds.
 
@@ -159,11 +406,15 @@ def filter_valid_coordinates(coordinates: List[List[float]]) -> List[List[float]
     return valid
 
 
-def clean_feature(feature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+def clean_feature(
+    feature: Dict[str, Any],
+    reduction_mode: str = COORDINATE_REDUCTION_MODE,
+) -> Optional[Dict[str, Any]]:
     """Normalize and validate a single GeoJSON feature.
 
     Args:
         feature (dict): Raw GeoJSON feature.
+        reduction_mode (str): How to thin the track, see thin_coordinates.
 
     Returns:
         Optional[dict]: Cleaned feature, or None if it should be dropped.
@@ -174,7 +425,7 @@ def clean_feature(feature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
         return None
 
     cleaned_coordinates = filter_valid_coordinates(coordinates)
-    cleaned_coordinates = reduce_coordinates(cleaned_coordinates)
+    cleaned_coordinates = thin_coordinates(cleaned_coordinates, reduction_mode)
     if len(cleaned_coordinates) < MIN_COORDINATES_PER_FEATURE:
         return None
 
@@ -198,23 +449,53 @@ def clean_feature(feature: Dict[str, Any]) -> Optional[Dict[str, Any]]:
     }
 
 
-def clean_geojson(geojson: Dict[str, Any]) -> Dict[str, Any]:
+def clean_feature_chunk(features: List[Dict[str, Any]], reduction_mode: str) -> List[Dict[str, Any]]:
+    """Clean a chunk of features in-process, the task a cleaning worker runs."""
+    return list(iter_clean_features(features, reduction_mode))
+
+
+def iter_clean_features(
+    features: Iterable[Dict[str, Any]],
+    reduction_mode: str = COORDINATE_REDUCTION_MODE,
+    workers: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """Clean features one at a time, dropping the ones clean_feature rejects.
+
+    Args:
+        features (iterable): Raw GeoJSON features.
+        reduction_mode (str): How to thin each track, see thin_coordinates.
+        workers (int): Worker processes to shard the features across, see
+            utils/process_pool.py. 1 cleans in this process. same output
+            in the same order either way.
+
+    Yields:
+        dict: Cleaned feature.
+    """
+    if workers > 1:
+        yield from iter_pool_map(partial(clean_feature_chunk, reduction_mode=reduction_mode), features, workers)
+        return
+    for feature in features:
+        cleaned_feature = clean_feature(feature, reduction_mode)
+        if cleaned_feature is not None:
+            yield cleaned_feature
+
+
+def clean_geojson(
+    geojson: Dict[str, Any],
+    reduction_mode: str = COORDINATE_REDUCTION_MODE,
+    workers: int = 1,
+) -> Dict[str, Any]:
     """Normalize and reduce all features in a GeoJSON FeatureCollection.
 
     Args:
         geojson (dict): Raw GeoJSON FeatureCollection.
+        reduction_mode (str): How to thin each track, see thin_coordinates.
+        workers (int): Worker processes, see iter_clean_features.
 
     Returns:
         dict: Cleaned GeoJSON FeatureCollection.
     """
-    cleaned_features: List[Dict[str, Any]] = []
-    for feature in geojson.get("features", []):
-        cleaned_feature = clean_feature(feature)
-        if cleaned_feature is None:
-            continue
-        cleaned_features.append(cleaned_feature)
-
     return {
         "type": "FeatureCollection",
-        "features": cleaned_features,
+        "features": list(iter_clean_features(geojson.get("features", []), reduction_mode, workers)),
     }
@@ -0,0 +1,68 @@
+"""Run per-feature work on a pool of worker processes, keeping input order.
+
+Splitting and cleaning are pure per-feature functions, numpy-heavy but with
+plenty of Python around the numpy calls, so a single process only ever uses
+one of the Pi's cores. this shards a feature stream into chunks, runs each
+chunk in a worker, and yields the results back in the order the chunks went
+in -- the output is identical to the in-process run, just sooner when each
+feature is worth more work than the trip to a worker and back (see
+CLEAN_WORKERS in config.py).
+
+Only a few chunks per worker are queued at a time, so a whole-archive
+stream still isnt held in memory. workers are spawned rather than forked,
+the updater may have strava fetch threads running -- which also means they
+import config fresh, so settings patched at runtime dont reach them.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Deque, Iterable, Iterator, List
+
+from config import CLEAN_CHUNK_FEATURES, CLEAN_CHUNKS_IN_FLIGHT_PER_WORKER
+
+WORKER_START_METHOD = "spawn"
+
+
+def iter_chunks(items: Iterable[Any], chunk_size: int) -> Iterator[List[Any]]:
+    """Consecutive lists of up to chunk_size items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, chunk_size)):
+        yield chunk
+
+
+def iter_pool_map(
+    function: Callable[[List[Any]], List[Any]],
+    items: Iterable[Any],
+    workers: int,
+    chunk_size: int = CLEAN_CHUNK_FEATURES,
+) -> Iterator[Any]:
+    """Run function over chunks of items in worker processes, yielding results in input order.
+
+    Args:
+        function (callable): Takes a list of items, returns a list of results.
+            has to be picklable, i.e. a module-level function (or a partial
+            of one).
+        items (iterable): Items to process, consumed lazily.
+        workers (int): Worker processes.
+        chunk_size (int): Items per task sent to a worker.
+
+    Yields:
+        Results of every chunk, flattened, in the order the items came in.
+    """
+    max_in_flight = max(workers, 1) * CLEAN_CHUNKS_IN_FLIGHT_PER_WORKER
+    context = multiprocessing.get_context(WORKER_START_METHOD)
+    pool = ProcessPoolExecutor(max_workers=max(workers, 1), mp_context=context)
+    pending: Deque[Future] = deque()
+    try:
+        for chunk in iter_chunks(items, chunk_size):
+            pending.append(pool.submit(function, chunk))
+            if len(pending) >= max_in_flight:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+    finally:
+        pool.shutdown(wait=True, cancel_futures=True)
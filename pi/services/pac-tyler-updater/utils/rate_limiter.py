@@ -0,0 +1,256 @@
+"""Token-bucket pacing for Strava API calls, synced from Strava's usage headers.
+
+Strava counts requests in two fixed windows -- every quarter hour and every
+UTC day -- and answers 429 once either is used up. StravaRateBudget keeps a
+bucket per window: every request takes a token from both before it's sent,
+and when a bucket is empty the caller waits for that window to reset instead
+of firing a request that's going to be throttled. Usage and limits reported
+in each response's X-(Read)RateLimit-* headers overwrite the local counts, so
+requests made by anything else on the same Strava app are accounted for.
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+import requests
+from stravalib.util.limiter import get_rates_from_response_headers
+
+from config import (
+    STRAVA_BUDGET_LOG_INTERVAL_REQUESTS,
+    STRAVA_DAILY_LIMIT,
+    STRAVA_DAILY_WINDOW_SECONDS,
+    STRAVA_RATE_LIMIT_HEADROOM,
+    STRAVA_SHORT_TERM_LIMIT,
+    STRAVA_SHORT_WINDOW_SECONDS,
+)
+
+OAUTH_PATH = "/oauth/"
+
+
+class RateWindow:
+    """One of Strava's fixed rate limit windows and how much of it is used."""
+
+    def __init__(self, name: str, window_seconds: float, limit: int) -> None:
+        """Initialize an empty window.
+
+        Args:
+            name (str): Label for logs ("15-min", "daily").
+            window_seconds (float): Window length. windows start at multiples
+                of this in epoch time, which lines up with Strava's quarter
+                hours and UTC days.
+            limit (int): Requests allowed per window.
+
+        Returns:
+            None
+        """
+        self.name = name
+        self.window_seconds = window_seconds
+        self.limit = limit
+        self.used = 0
+        self.window_start: Optional[float] = None
+
+    def roll(self, now: float) -> None:
+        """Start a fresh count if a new window has begun since the last request.
+
+        Args:
+            now (float): Current epoch time.
+
+        Returns:
+            None
+        """
+        window_start = now - now % self.window_seconds
+        if window_start != self.window_start:
+            self.window_start = window_start
+            self.used = 0
+
+    def remaining(self, headroom: int) -> int:
+        """Tokens left in this window, keeping `headroom` in reserve."""
+        return self.limit - headroom - self.used
+
+    def resets_at(self) -> float:
+        """Epoch time the current window ends."""
+        return (self.window_start or 0) + self.window_seconds
+
+    def __str__(self) -> str:
+        """Usage for logs, e.g. "15-min 42/100".
+
+        Returns:
+            str: Window name, then requests used out of the limit.
+        """
+        return f"{self.name} {self.used}/{self.limit}"
+
+
+class StravaRateBudget:
+    """Thread-safe scheduler that keeps Strava calls inside both rate windows.
+
+    Call acquire() before each request and pass the instance to stravalib's
+    Client as its rate_limiter, so every response's headers update it.
+    """
+
+    def __init__(
+        self,
+        short_limit: int = STRAVA_SHORT_TERM_LIMIT,
+        daily_limit: int = STRAVA_DAILY_LIMIT,
+        headroom: int = STRAVA_RATE_LIMIT_HEADROOM,
+        short_window_seconds: float = STRAVA_SHORT_WINDOW_SECONDS,
+        daily_window_seconds: float = STRAVA_DAILY_WINDOW_SECONDS,
+        clock: Callable[[], float] = time.time,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        """Initialize the budget with limits to use until Strava reports its own.
+
+        Args:
+            short_limit (int): Requests per short window.
+            daily_limit (int): Requests per day.
+            headroom (int): Tokens held back in each window, for requests
+                already in flight and usage the headers havent caught up on.
+            short_window_seconds (float): Short window length.
+            daily_window_seconds (float): Daily window length.
+            clock (callable): Epoch time source.
+            sleep (callable): Sleep function.
+
+        Returns:
+            None
+        """
+        self.short_window = RateWindow("15-min", short_window_seconds, short_limit)
+        self.daily_window = RateWindow("daily", daily_window_seconds, daily_limit)
+        self.windows: List[RateWindow] = [self.short_window, self.daily_window]
+        self.headroom = headroom
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._announced_reset: Optional[float] = None
+        self.request_count = 0
+        self.throttled_count = 0
+        self.waited_seconds = 0.0
+
+    def _roll(self) -> float:
+        """Roll every window forward to now. Caller holds the lock."""
+        now = self._clock()
+        for window in self.windows:
+            window.roll(now)
+        return now
+
+    def acquire(self) -> None:
+        """Take a token from both windows, waiting for a reset if either is empty.
+
+        Returns:
+            None
+        """
+        while True:
+            with self._lock:
+                now = self._roll()
+                blocked = [window for window in self.windows if window.remaining(self.headroom) <= 0]
+                if not blocked:
+                    self._take_token()
+                    return
+
+                resets_at = max(window.resets_at() for window in blocked)
+                wait_seconds = max(resets_at - now, 0.0)
+                # every waiting worker lands here, only log the wait once
+                if resets_at != self._announced_reset:
+                    self._announced_reset = resets_at
+                    logging.warning(
+                        "Strava %s budget used up (%s), waiting %.0f seconds for the window to reset.",
+                        " and ".join(window.name for window in blocked),
+                        ", ".join(str(window) for window in self.windows),
+                        wait_seconds,
+                    )
+                    self.waited_seconds += wait_seconds
+            self._sleep(wait_seconds)
+
+    def _take_token(self) -> None:
+        """Count a request against every window, logging usage every so often. Caller holds the lock."""
+        for window in self.windows:
+            window.used += 1
+        self.request_count += 1
+        if self.request_count % STRAVA_BUDGET_LOG_INTERVAL_REQUESTS == 0:
+            self.log_usage()
+
+    def __call__(self, response_headers: Dict[str, str], method: str) -> None:
+        """Sync usage and limits from a response's rate limit headers.
+
+        This is the stravalib rate_limiter hook, called after every API
+        response (429s included).
+
+        Args:
+            response_headers (dict): HTTP response headers.
+            method (str): HTTP method of the request.
+
+        Returns:
+            None
+        """
+        rates = get_rates_from_response_headers(response_headers, method)
+        if rates is None:
+            return
+        with self._lock:
+            self._roll()
+            self.short_window.limit = rates.short_limit
+            self.daily_window.limit = rates.long_limit
+            # local counts include requests still in flight, keep whichever is higher
+            self.short_window.used = max(self.short_window.used, rates.short_usage)
+            self.daily_window.used = max(self.daily_window.used, rates.long_usage)
+
+    def record_throttled(self) -> None:
+        """Note a 429, treating the short window as spent until it resets.
+
+        Returns:
+            None
+        """
+        with self._lock:
+            self._roll()
+            self.throttled_count += 1
+            self.short_window.used = max(self.short_window.used, self.short_window.limit)
+
+    def log_usage(self) -> None:
+        """Log how much of each window is used and what this run has cost.
+
+        Returns:
+            None
+        """
+        logging.info(
+            "Strava API budget: %s (this run: %s requests, %s throttled, %.0f s waiting)",
+            ", ".join(str(window) for window in self.windows),
+            self.request_count,
+            self.throttled_count,
+            self.waited_seconds,
+        )
+
+
+class BudgetedSession(requests.Session):
+    """requests Session that takes a budget token before every Strava API call."""
+
+    def __init__(self, budget: StravaRateBudget) -> None:
+        """Initialize the session.
+
+        Args:
+            budget (StravaRateBudget): Budget every API request draws from.
+
+        Returns:
+            None
+        """
+        super().__init__()
+        self.budget = budget
+
+    def request(self, method, url, *args, **kwargs):
+        """Send a request, first waiting for a budget token if it's an API call.
+
+        Blocks in StravaRateBudget.acquire while both windows are used up.
+        The response's rate limit headers arent read here -- stravalib
+        passes them to the budget's __call__ hook.
+
+        Args:
+            method (str): HTTP method.
+            url (str): Request URL.
+            *args: Passed through to requests.Session.request.
+            **kwargs: Passed through to requests.Session.request.
+
+        Returns:
+            requests.Response: The response.
+        """
+        # token refreshes dont count against the API limits
+        if OAUTH_PATH not in url:
+            self.budget.acquire()
+        return super().request(method, url, *args, **kwargs)
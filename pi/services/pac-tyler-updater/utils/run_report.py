@@ -0,0 +1,381 @@
+"""Per-stage timing and memory for an updater run, saved as a JSON report.
+
+The report measures each stage of the run: wall time, CPU time and how far
+it pushed the process's peak RSS up. code marks its stages with
+run_profiler.stage("name") (or iter_stage for generators, which are only
+timed while producing items). time is exclusive: while a nested stage runs
+-- split inside clean inside the GeoJSON write -- it's charged to the
+innermost one only, so the stages add up to the run.
+
+main.py writes the report to RUN_REPORT_FILE after every run and appends it
+to RUN_HISTORY_FILE (one JSON line per run) for graphing across runs. with
+--profile the run also goes under cProfile: the dump lands in
+RUN_PROFILE_DIR and the top functions by own time go into the report.
+
+Only the main thread is timed -- strava fetch threads show up as the time
+the main thread spends waiting in strava_fetch, and process pool workers'
+CPU is in the report's children_cpu_s.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import json
+import logging
+import platform
+import pstats
+import resource
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from config import (
+    DATE_TIME_OUTPUT_TIMESPEC,
+    RUN_HISTORY_FILE,
+    RUN_HISTORY_MAX_RUNS,
+    RUN_PROFILE_DIR,
+    RUN_PROFILE_TOP_FUNCTIONS,
+    RUN_PROFILES_TO_KEEP,
+    RUN_REPORT_FILE,
+)
+from utils.atomic_files import atomic_write
+
+RUN_REPORT_VERSION = 1
+RUN_MODE_UPDATE = "update"
+RUN_MODE_FULL_RECLEAN = "full_reclean"
+RUN_MODE_REPLAY = "replay"
+BYTES_PER_MIB = 1024 * 1024
+# ru_maxrss is kilobytes on linux, bytes on macos
+MAXRSS_BYTES = 1 if sys.platform == "darwin" else 1024
+PROFILE_SUFFIX = ".prof"
+
+
+def peak_rss_bytes() -> int:
+    """High-water mark of this process's resident memory."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * MAXRSS_BYTES
+
+
+def children_cpu_seconds() -> float:
+    """User + system CPU of finished child processes (process pool workers)."""
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def empty_stage() -> Dict[str, Any]:
+    """Stage entry with nothing charged yet."""
+    return {"calls": 0, "items": 0, "wall_s": 0.0, "cpu_s": 0.0, "peak_rss_growth_bytes": 0}
+
+
+class RunProfiler:
+    """Exclusive per-stage wall/CPU/peak-memory accounting for one run."""
+
+    def __init__(self) -> None:
+        """Start inactive -- stage() costs next to nothing until start().
+
+        Returns:
+            None
+        """
+        self.active = False
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self._stack: List[str] = []
+        self._mark: Tuple[float, float, int] = (0.0, 0.0, 0)
+        self._thread_id: Optional[int] = None
+
+    def start(self) -> None:
+        """Forget any previous run and start charging time to stages.
+
+        Returns:
+            None
+        """
+        self.active = True
+        self.stages = {}
+        self._stack = []
+        self._thread_id = threading.get_ident()
+        self._mark = self._sample()
+
+    def stop(self) -> None:
+        """Charge the time since the last stage change and stop accounting.
+
+        Returns:
+            None
+        """
+        if self.active:
+            self._charge()
+        self.active = False
+
+    @staticmethod
+    def _sample() -> Tuple[float, float, int]:
+        """(wall clock, process CPU, peak RSS) right now."""
+        return time.perf_counter(), time.process_time(), peak_rss_bytes()
+
+    def _charge(self) -> None:
+        """Add everything since the last mark to the innermost open stage."""
+        now = self._sample()
+        if self._stack:
+            stage = self.stages[self._stack[-1]]
+            stage["wall_s"] += now[0] - self._mark[0]
+            stage["cpu_s"] += now[1] - self._mark[1]
+            stage["peak_rss_growth_bytes"] += now[2] - self._mark[2]
+        self._mark = now
+
+    def _enter(self, name: str) -> Dict[str, Any]:
+        """Open a stage, pausing the one it's nested in."""
+        self._charge()
+        self._stack.append(name)
+        return self.stages.setdefault(name, empty_stage())
+
+    def _exit(self) -> None:
+        """Close the innermost stage, resuming the one it was nested in."""
+        self._charge()
+        self._stack.pop()
+
+    def _timing(self) -> bool:
+        """Whether stages on the calling thread are being charged."""
+        return self.active and threading.get_ident() == self._thread_id
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Charge the block's time to a stage (minus any stages nested in it).
+
+        Args:
+            name (str): Stage name, e.g. "write_geojson".
+
+        Yields:
+            None
+        """
+        if not self._timing():
+            yield
+            return
+        self._enter(name)["calls"] += 1
+        try:
+            yield
+        finally:
+            self._exit()
+
+    def iter_stage(self, name: str, items: Iterable[Any]) -> Iterator[Any]:
+        """Pass items through, charging the time spent producing each one to a stage.
+
+        Time the consumer spends between items isnt counted, so a generator
+        pipeline splits cleanly into its steps.
+
+        Args:
+            name (str): Stage name, e.g. "clean".
+            items (iterable): Usually a generator.
+
+        Yields:
+            The same items.
+        """
+        if not self._timing():
+            yield from items
+            return
+        iterator = iter(items)
+        self.stages.setdefault(name, empty_stage())["calls"] += 1
+        while True:
+            stage = self._enter(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            finally:
+                self._exit()
+            stage["items"] += 1
+            yield item
+
+    def stage_report(self) -> Dict[str, Dict[str, Any]]:
+        """Stages in first-entered order, with rounded numbers.
+
+        Returns:
+            dict: Stage name to {calls, items, wall_s, cpu_s, peak_rss_growth_mib}.
+        """
+        return {
+            name: {
+                "calls": stage["calls"],
+                "items": stage["items"],
+                "wall_s": round(stage["wall_s"], 4),
+                "cpu_s": round(stage["cpu_s"], 4),
+                "peak_rss_growth_mib": round(stage["peak_rss_growth_bytes"] / BYTES_PER_MIB, 2),
+            }
+            for name, stage in self.stages.items()
+        }
+
+
+# the updater is one run per process, so one profiler for everything to mark
+run_profiler = RunProfiler()
+
+
+def profile_top_functions(profile: cProfile.Profile, limit: int = RUN_PROFILE_TOP_FUNCTIONS) -> List[Dict[str, Any]]:
+    """The functions a cProfile run spent the most of their own time in.
+
+    Args:
+        profile (cProfile.Profile): Finished (disabled) profile.
+        limit (int): How many to return.
+
+    Returns:
+        list: {function, calls, own_s, cumulative_s}, most own time first.
+    """
+    stats = pstats.Stats(profile).stats
+    ranked = sorted(stats.items(), key=lambda entry: entry[1][2], reverse=True)[:limit]
+    return [
+        {
+            "function": f"{Path(filename).name}:{line}({function})",
+            "calls": calls,
+            "own_s": round(own_seconds, 4),
+            "cumulative_s": round(cumulative_seconds, 4),
+        }
+        for (filename, line, function), (_, calls, own_seconds, cumulative_seconds, _) in ranked
+    ]
+
+
+def save_profile(profile: cProfile.Profile, started_at: datetime, profile_dir: Path = RUN_PROFILE_DIR) -> Path:
+    """Dump a run's cProfile stats (for snakeviz / pstats) and drop old dumps.
+
+    Args:
+        profile (cProfile.Profile): Finished (disabled) profile.
+        started_at (datetime): Run start, names the file.
+        profile_dir (Path): Where dumps are kept.
+
+    Returns:
+        Path: The dump that was written.
+    """
+    profile_dir.mkdir(parents=True, exist_ok=True)
+    path = profile_dir / f"run-{started_at.strftime('%Y%m%dT%H%M%SZ')}{PROFILE_SUFFIX}"
+    profile.dump_stats(path)
+    for old_dump in sorted(profile_dir.glob(f"run-*{PROFILE_SUFFIX}"))[:-RUN_PROFILES_TO_KEEP]:
+        old_dump.unlink(missing_ok=True)
+    return path
+
+
+def build_run_report(
+    mode: str,
+    started_at: datetime,
+    wall_seconds: float,
+    cpu_seconds: float,
+    feature_count: Optional[int],
+    error: Optional[str] = None,
+    profile: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Everything known about a finished run, from run_profiler and the caller.
+
+    Args:
+        mode (str): RUN_MODE_UPDATE, RUN_MODE_FULL_RECLEAN or RUN_MODE_REPLAY.
+        started_at (datetime): UTC start time.
+        wall_seconds (float): Whole run, wall clock.
+        cpu_seconds (float): Whole run, this process's CPU.
+        feature_count (int): Stored features after the run, None if it failed.
+        error (str): What the run failed with, if it raised.
+        profile (dict): {"path", "top"} with --profile, else None.
+
+    Returns:
+        dict: Run report.
+    """
+    stages = run_profiler.stage_report()
+    staged_seconds = sum(stage["wall_s"] for stage in stages.values())
+    return {
+        "version": RUN_REPORT_VERSION,
+        "mode": mode,
+        "status": "ok" if feature_count is not None and error is None else "failed",
+        "error": error,
+        "started_at": started_at.isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC),
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC),
+        "feature_count": feature_count,
+        "wall_s": round(wall_seconds, 4),
+        "cpu_s": round(cpu_seconds, 4),
+        "children_cpu_s": round(children_cpu_seconds(), 4),
+        "peak_rss_mib": round(peak_rss_bytes() / BYTES_PER_MIB, 2),
+        # time outside every stage: startup, auth, logging, the loop itself
+        "unstaged_s": round(max(wall_seconds - staged_seconds, 0.0), 4),
+        "stages": stages,
+        "python": platform.python_version(),
+        "profile": profile,
+    }
+
+
+def save_run_report(
+    report: Dict[str, Any],
+    report_file: Path = RUN_REPORT_FILE,
+    history_file: Path = RUN_HISTORY_FILE,
+) -> None:
+    """Write the run report and append it to the history (minus the profile's function list).
+
+    Never raises -- a report that cant be written is logged, the run's
+    outcome stands.
+
+    Args:
+        report (dict): From build_run_report.
+        report_file (Path): Latest run's report.
+        history_file (Path): One compact JSON line per run, the last
+            RUN_HISTORY_MAX_RUNS kept.
+
+    Returns:
+        None
+    """
+    try:
+        with atomic_write(report_file, text=True) as file_handle:
+            json.dump(report, file_handle, indent=2)
+
+        history_entry = {**report, "profile": (report["profile"] or {}).get("path")}
+        try:
+            lines = history_file.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            lines = []
+        lines.append(json.dumps(history_entry, separators=(",", ":")))
+        with atomic_write(history_file, text=True) as file_handle:
+            file_handle.write("\n".join(lines[-RUN_HISTORY_MAX_RUNS:]) + "\n")
+    except OSError as exc:
+        logging.warning("Couldnt write the run report: %s", exc)
+        return
+    slowest = sorted(report["stages"].items(), key=lambda entry: entry[1]["wall_s"], reverse=True)[:3]
+    logging.info(
+        "Run took %.1fs (peak RSS %.0f MiB), slowest stages: %s. report at %s",
+        report["wall_s"],
+        report["peak_rss_mib"],
+        ", ".join(f"{name} {stage['wall_s']:.1f}s" for name, stage in slowest) or "none",
+        report_file,
+    )
+
+
+@contextmanager
+def profiled_run(mode: str, with_cprofile: bool = False) -> Iterator[Dict[str, Any]]:
+    """Time a whole run's stages and save its report when the block ends, however it ends.
+
+        with profiled_run(RUN_MODE_UPDATE) as run:
+            run["feature_count"] = run_update(args)
+
+    Args:
+        mode (str): RUN_MODE_UPDATE, RUN_MODE_FULL_RECLEAN or RUN_MODE_REPLAY.
+        with_cprofile (bool): Also run the block under cProfile.
+
+    Yields:
+        dict: Set "feature_count" in it; left None the run counts as failed.
+    """
+    run: Dict[str, Any] = {"feature_count": None}
+    error = None
+    started_at = datetime.now(timezone.utc)
+    started_wall, started_cpu = time.perf_counter(), time.process_time()
+    profile = cProfile.Profile() if with_cprofile else None
+    run_profiler.start()
+    if profile is not None:
+        profile.enable()
+    try:
+        yield run
+    except BaseException as exc:
+        error = repr(exc)
+        raise
+    finally:
+        if profile is not None:
+            profile.disable()
+        run_profiler.stop()
+        wall_seconds, cpu_seconds = time.perf_counter() - started_wall, time.process_time() - started_cpu
+        profile_summary = None
+        if profile is not None:
+            profile_summary = {
+                "path": str(save_profile(profile, started_at)),
+                "top": profile_top_functions(profile),
+            }
+        save_run_report(
+            build_run_report(mode, started_at, wall_seconds, cpu_seconds, run["feature_count"], error, profile_summary)
+        )
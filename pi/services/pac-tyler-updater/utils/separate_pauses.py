@@ -1,68 +1,89 @@
 """Utilities to split activity tracks at large pauses."""
 
-from typing import Any, Dict, List
+from functools import partial
+from typing import Any, Dict, Iterable, Iterator, List
 
-from geopy.distance import geodesic
+import numpy as np
 
 from config import PAUSE_SPLIT_THRESHOLD_KM
+from utils.geojson_cleaner import segment_lengths_meters
+from utils.process_pool import iter_pool_map
 
+METERS_PER_KM = 1000
 
-def split_activities(
-    activities: Dict[str, Any],
+
+def split_feature_chunk(features: List[Dict[str, Any]], threshold_km: float) -> List[Dict[str, Any]]:
+    """Split a chunk of features in-process, the task a splitting worker runs."""
+    return list(iter_split_features(features, threshold_km))
+
+
+def iter_split_features(
+    features: Iterable[Dict[str, Any]],
     threshold_km: float = PAUSE_SPLIT_THRESHOLD_KM,
-) -> Dict[str, Any]:
-    """Split activity tracks when a large gap is detected between GPS points.
+    workers: int = 1,
+) -> Iterator[Dict[str, Any]]:
+    """Split each track where there's a large gap between GPS points.
 
     strava sometimes leaves a straight line between where you paused and
     unpaused, which would draw a fake path across the map. this removes those.
+    gaps are measured with the vectorized haversine (spherical earth), which
+    is within ~0.5% of the ellipsoidal geodesic. works one feature at a
+    time, so it can sit in a streaming pipeline.
 
     Args:
-        activities (dict): GeoJSON FeatureCollection of activity tracks.
+        features (iterable): GeoJSON activity track features.
         threshold_km (float): Gap distance in km that triggers a split.
+        workers (int): Worker processes to shard the features across, see
+            utils/process_pool.py. 1 splits in this process. same output in
+            the same order either way.
 
-    Returns:
-        dict: GeoJSON FeatureCollection with split segments as separate features.
+    Yields:
+        dict: One LineString feature per segment.
     """
-    new_activities: List[Dict[str, Any]] = []
-
-    for activity in activities.get("features", []):
+    if workers > 1:
+        yield from iter_pool_map(partial(split_feature_chunk, threshold_km=threshold_km), features, workers)
+        return
+    for activity in features:
         coordinates = activity["geometry"]["coordinates"]
         properties = activity["properties"]
 
         if len(coordinates) < 2:
             continue
 
-        new_segments: List[List[List[float]]] = []
-        current_segment = [coordinates[0]]
-
-        for index in range(1, len(coordinates)):
-            prev_point = coordinates[index - 1]
-            current_point = coordinates[index]
-            distance_km = geodesic(
-                (prev_point[1], prev_point[0]),
-                (current_point[1], current_point[0]),
-            ).km
-
-            if distance_km > threshold_km:
-                new_segments.append(current_segment)
-                current_segment = [current_point]
-                continue
-
-            current_segment.append(current_point)
-
-        new_segments.append(current_segment)
+        gap_km = segment_lengths_meters(coordinates) / METERS_PER_KM
+        # a gap after point i starts a new segment at i + 1
+        boundaries = [0, *(np.flatnonzero(gap_km > threshold_km) + 1).tolist(), len(coordinates)]
+        new_segments: List[List[List[float]]] = [
+            coordinates[start:end] for start, end in zip(boundaries, boundaries[1:])
+        ]
 
         for segment in new_segments:
-            new_activities.append({
+            yield {
                 "type": "Feature",
                 "geometry": {
                     "type": "LineString",
                     "coordinates": segment,
                 },
                 "properties": properties,
-            })
+            }
 
+
+def split_activities(
+    activities: Dict[str, Any],
+    threshold_km: float = PAUSE_SPLIT_THRESHOLD_KM,
+    workers: int = 1,
+) -> Dict[str, Any]:
+    """Split activity tracks when a large gap is detected between GPS points.
+
+    Args:
+        activities (dict): GeoJSON FeatureCollection of activity tracks.
+        threshold_km (float): Gap distance in km that triggers a split.
+        workers (int): Worker processes, see iter_split_features.
+
+    Returns:
+        dict: GeoJSON FeatureCollection with split segments as separate features.
+    """
     return {
         "type": "FeatureCollection",
-        "features": new_activities,
+        "features": list(iter_split_features(activities.get("features", []), threshold_km, workers)),
     }
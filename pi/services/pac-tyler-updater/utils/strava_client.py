@@ -3,12 +3,14 @@
 import json
 import logging
 import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
 
 from stravalib.client import Client
-from stravalib.exc import RateLimitExceeded
+from stravalib.exc import Fault, RateLimitExceeded
 
 from config import (
     BATCH_SIZE,
@@ -17,13 +19,23 @@ from config import (
     MAX_LONGITUDE,
     MIN_LATITUDE,
     MIN_LONGITUDE,
-    RATE_LIMIT_SLEEP_SECONDS,
+    STRAVA_FETCH_WORKERS,
     STRAVA_SCOPES,
     STRAVA_STREAM_RESOLUTION,
     STRAVA_STREAM_TYPES,
+    STRAVA_THROTTLE_MAX_RETRIES,
     TOKEN_REFRESH_BUFFER_SECONDS,
 )
+from utils.activity_cache import ActivityCache
 from utils.geojson_cleaner import normalize_activity_type, normalize_date
+from utils.rate_limiter import BudgetedSession, StravaRateBudget
+
+HTTP_TOO_MANY_REQUESTS = 429
+# (activity id, detail future, streams future)
+PendingActivity = Tuple[int, Future, Future]
+# queued for yielding in listing order: in-flight requests, or an activity
+# already loaded from the cache
+QueuedActivity = Union[PendingActivity, Dict[str, Any]]
 
 
 def is_valid_coordinate(coord: List[float]) -> bool:
@@ -42,19 +54,35 @@ def is_valid_coordinate(coord: List[float]) -> bool:
     return False
 
 
-def activities_to_geojson(activities: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Convert a list of activity dicts to a GeoJSON FeatureCollection.
+def is_throttled(exc: Exception) -> bool:
+    """Whether a Strava call failed because of the rate limit.
+
+    stravalib raises a plain Fault for a 429 response, RateLimitExceeded
+    only comes from its own limiter, so check for both.
 
     Args:
-        activities (list): Activity dicts with coordinates and metadata.
+        exc (Exception): Exception raised by a stravalib call.
 
     Returns:
-        dict: GeoJSON FeatureCollection.
+        bool: True for a rate limit failure.
+    """
+    if isinstance(exc, RateLimitExceeded):
+        return True
+    response = getattr(exc, "response", None) if isinstance(exc, Fault) else None
+    return response is not None and response.status_code == HTTP_TOO_MANY_REQUESTS
+
+
+def iter_activity_features(activities: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    """Convert activity dicts to GeoJSON features one at a time.
+
+    Activities without any valid coordinates are skipped.
+
+    Args:
+        activities (iterable): Activity dicts with coordinates and metadata.
+
+    Yields:
+        dict: GeoJSON LineString feature.
     """
-    geojson: Dict[str, Any] = {
-        "type": "FeatureCollection",
-        "features": [],
-    }
     for activity in activities:
         if not activity.get("coordinates"):
             continue
@@ -76,33 +104,58 @@ def activities_to_geojson(activities: List[Dict[str, Any]]) -> Dict[str, Any]:
         if activity.get("id") is not None:
             properties["activity_id"] = activity["id"]
 
-        geojson["features"].append({
+        yield {
             "type": "Feature",
             "geometry": {
                 "type": "LineString",
                 "coordinates": valid_coords,
             },
             "properties": properties,
-        })
+        }
 
-    return geojson
+
+def activities_to_geojson(activities: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Convert a list of activity dicts to a GeoJSON FeatureCollection.
+
+    Args:
+        activities (list): Activity dicts with coordinates and metadata.
+
+    Returns:
+        dict: GeoJSON FeatureCollection.
+    """
+    return {
+        "type": "FeatureCollection",
+        "features": list(iter_activity_features(activities)),
+    }
 
 
 class StravaClient:
     """Wrapper around stravalib's Client with token file support."""
 
-    def __init__(self, client_id: str, client_secret: str, redirect_uri: str) -> None:
+    def __init__(
+        self,
+        client_id: str,
+        client_secret: str,
+        redirect_uri: str,
+        cache: Optional[ActivityCache] = None,
+    ) -> None:
         """Initialize the StravaClient.
 
         Args:
             client_id (str): Strava API client ID.
             client_secret (str): Strava API client secret.
             redirect_uri (str): OAuth redirect URI.
+            cache (ActivityCache, optional): Raw activity cache. cached
+                activities are served from disk, fetched ones are added.
 
         Returns:
             None
         """
-        self.client = Client()
+        self.cache = cache
+        # every API call takes a token first, and every response's usage
+        # headers flow back into the budget
+        self.budget = StravaRateBudget()
+        self.client = Client(rate_limiter=self.budget, requests_session=BudgetedSession(self.budget))
         self.client_id = client_id
         self.client_secret = client_secret
         self.redirect_uri = redirect_uri
@@ -190,61 +243,184 @@ class StravaClient:
         logging.info("Authenticated via saved token.")
         return True
 
-    def iter_detailed_activities(self, start_date: datetime) -> Iterable[Dict[str, Any]]:
+    def _submit_activity(self, pool: ThreadPoolExecutor, activity_id: int) -> PendingActivity:
+        """Start the detail and stream requests for one activity.
+
+        The stream request only needs the id, so both go out at once instead
+        of the stream waiting on the detail.
+
+        Args:
+            pool (ThreadPoolExecutor): Fetch pool.
+            activity_id (int): Strava activity id.
+
+        Returns:
+            tuple: (activity id, detail future, streams future).
+        """
+        detail = pool.submit(self.client.get_activity, activity_id)
+        streams = pool.submit(
+            self.client.get_activity_streams,
+            activity_id,
+            types=STRAVA_STREAM_TYPES,
+            resolution=STRAVA_STREAM_RESOLUTION,
+        )
+        return activity_id, detail, streams
+
+    def _iter_summary_activities(self, start_date: datetime) -> Iterator[Any]:
+        """Page through the athlete's activities after start_date, retrying throttled pages.
+
+        stravalib's result iterator doesnt advance when a page request
+        fails, so calling next() again re-requests the same page.
+
+        Args:
+            start_date (datetime): Only list activities after this date.
+
+        Yields:
+            SummaryActivity: Activities oldest first.
+
+        Raises:
+            Fault: If a page is still throttled after STRAVA_THROTTLE_MAX_RETRIES retries.
+        """
+        summary_activities = self.client.get_activities(after=start_date)
+        attempts = 0
+        while True:
+            try:
+                summary_activity = next(summary_activities)
+            except StopIteration:
+                return
+            except (Fault, RateLimitExceeded) as exc:
+                if not is_throttled(exc) or attempts >= STRAVA_THROTTLE_MAX_RETRIES:
+                    raise
+                attempts += 1
+                self.budget.record_throttled()
+                logging.warning("Rate limited listing activities, retrying (attempt %s).", attempts + 1)
+                continue
+            attempts = 0
+            yield summary_activity
+
+    def iter_detailed_activities(
+        self,
+        start_date: datetime,
+        workers: int = STRAVA_FETCH_WORKERS,
+        skip_ids: Optional[Set[int]] = None,
+    ) -> Iterable[Dict[str, Any]]:
         """Yield detailed activity dicts for all activities after start_date.
 
+        Only the activity list comes from Strava for activities in skip_ids
+        (dropped) or in self.cache (loaded from disk) -- no detail or stream
+        requests. the rest run on a pool of `workers` threads, a few
+        activities ahead of the one being yielded, but results come out in
+        the order Strava listed the activities (oldest first), same as a
+        serial fetch. workers=1 is the old one-request-at-a-time behaviour.
+        every request is paced by self.budget, and an activity that gets
+        throttled anyway is retried once the window resets, not skipped.
+
         Args:
             start_date (datetime): Only yield activities after this date.
+            workers (int): Fetch threads, i.e. max Strava requests in flight.
+            skip_ids (set, optional): Activity ids the caller already has, or knows have no track.
 
         Yields:
             dict: Activity dict with id, name, type, date, distance, coordinates.
+
+        Raises:
+            Fault: If an activity is still throttled after
+                STRAVA_THROTTLE_MAX_RETRIES retries, so the run fails loudly
+                instead of leaving a gap in the archive.
         """
         start_timestamp = start_date.timestamp()
 
+        skip_ids = skip_ids or set()
+        skipped_count = cached_count = 0
+
+        workers = max(workers, 1)
+        pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="strava-fetch")
+        queued: Deque[QueuedActivity] = deque()
         try:
-            summary_activities = self.client.get_activities(after=start_date)
-        except RateLimitExceeded as exc:
-            logging.warning(
-                "Rate limit hit before fetching. Waiting %s seconds. Details: %s",
-                RATE_LIMIT_SLEEP_SECONDS,
-                exc,
-            )
-            time.sleep(RATE_LIMIT_SLEEP_SECONDS)
-            return
-
-        for summary_activity in summary_activities:
-            activity_date = summary_activity.start_date or summary_activity.start_date_local
-            if not activity_date or activity_date.timestamp() <= start_timestamp:
-                continue
+            for summary_activity in self._iter_summary_activities(start_date):
+                activity_date = summary_activity.start_date or summary_activity.start_date_local
+                if not activity_date or activity_date.timestamp() <= start_timestamp:
+                    continue
+                if summary_activity.id in skip_ids:
+                    skipped_count += 1
+                    continue
+
+                cached_activity = self.cache.get(summary_activity.id) if self.cache else None
+                if cached_activity is not None:
+                    cached_count += 1
+                    queued.append(cached_activity)
+                else:
+                    queued.append(self._submit_activity(pool, summary_activity.id))
+                # cached activities at the front go straight out; fetches are
+                # collected once `workers` of them are in flight
+                while queued and (
+                    isinstance(queued[0], dict) or sum(isinstance(entry, tuple) for entry in queued) >= workers
+                ):
+                    yield self._collect_activity(pool, queued.popleft())
+
+            while queued:
+                yield self._collect_activity(pool, queued.popleft())
+        finally:
+            pool.shutdown(wait=True, cancel_futures=True)
+            if skipped_count or cached_count:
+                logging.info(
+                    "Skipped %s activities already stored (or without a track) and loaded %s from the cache "
+                    "without fetching.",
+                    skipped_count,
+                    cached_count,
+                )
+            self.budget.log_usage()
+
+    def _collect_activity(self, pool: ThreadPoolExecutor, queued_activity: QueuedActivity) -> Dict[str, Any]:
+        """Wait for one activity's requests and build (and cache) its activity dict.
+
+        A throttled activity is resubmitted; the budget holds the retry back
+        until the rate window has room again.
+
+        Args:
+            pool (ThreadPoolExecutor): Fetch pool, for retries.
+            queued_activity: (activity id, detail future, streams future), or
+                an activity dict already loaded from the cache.
+
+        Returns:
+            dict: Activity dict with id, name, type, date, distance, coordinates.
+
+        Raises:
+            Fault: If still throttled after STRAVA_THROTTLE_MAX_RETRIES retries.
+        """
+        if isinstance(queued_activity, dict):
+            return queued_activity
 
+        pending_activity = queued_activity
+        attempts = 0
+        while True:
+            activity_id, detail, streams_future = pending_activity
             try:
-                full_activity = self.client.get_activity(summary_activity.id)
-                streams = self.client.get_activity_streams(
-                    full_activity.id,
-                    types=STRAVA_STREAM_TYPES,
-                    resolution=STRAVA_STREAM_RESOLUTION,
-                )
-            except RateLimitExceeded as exc:
-                logging.warning(
-                    "Rate limit hit mid-fetch. Waiting %s seconds. Details: %s",
-                    RATE_LIMIT_SLEEP_SECONDS,
-                    exc,
-                )
-                time.sleep(RATE_LIMIT_SLEEP_SECONDS)
-                continue
+                full_activity = detail.result()
+                streams = streams_future.result()
+                break
+            except (Fault, RateLimitExceeded) as exc:
+                if not is_throttled(exc) or attempts >= STRAVA_THROTTLE_MAX_RETRIES:
+                    raise
+                attempts += 1
+                self.budget.record_throttled()
+                logging.warning("Rate limited fetching activity %s, retrying (attempt %s).", activity_id, attempts + 1)
+                pending_activity = self._submit_activity(pool, activity_id)
+
+        coordinates = streams.get("latlng").data if "latlng" in streams else []
+        logging.debug(
+            "Fetched %s coordinates for activity %s",
+            len(coordinates),
+            full_activity.name,
+        )
 
-            coordinates = streams.get("latlng").data if "latlng" in streams else []
-            logging.debug(
-                "Fetched %s coordinates for activity %s",
-                len(coordinates),
-                full_activity.name,
-            )
-
-            yield {
-                "id": full_activity.id,
-                "name": full_activity.name,
-                "type": str(full_activity.type),
-                "date": full_activity.start_date_local,
-                "distance": float(full_activity.distance),
-                "coordinates": coordinates,
-            }
+        activity = {
+            "id": full_activity.id,
+            "name": full_activity.name,
+            "type": str(full_activity.type),
+            "date": full_activity.start_date_local,
+            "distance": float(full_activity.distance),
+            "coordinates": coordinates,
+        }
+        if self.cache is not None:
+            self.cache.put(activity)
+        return activity
@@ -0,0 +1,502 @@
+"""Read activities out of a Strava bulk export instead of the API.
+
+The export ("download your data" in Strava's account settings) is a zip with
+activities.csv -- one row per activity: id, UTC date, name, type, distance,
+and the track file under activities/ -- plus the original GPX, TCX or FIT
+file of each recorded activity, usually gzipped. this turns each row back
+into the dict iter_detailed_activities yields (id, name, type, local date,
+distance in meters, [lat, lon] coordinates), so iter_activity_features and
+everything after it can't tell a replayed activity from a fetched one.
+
+Track files are decoded on a process pool (utils/process_pool.py), a few
+activities per task, and come back in export order. FIT is read with a
+small decoder for the few fields needed here (positions, and the local time
+offset), so no extra dependency.
+"""
+
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+import logging
+import re
+import struct
+import zipfile
+import zlib
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+from zoneinfo import ZoneInfo
+
+from config import (
+    EXPORT_CSV_DATE_FORMAT,
+    EXPORT_CSV_FILENAME,
+    EXPORT_MAX_POINTS_PER_ACTIVITY,
+    EXPORT_PARSE_CHUNK_ACTIVITIES,
+    EXPORT_PARSE_WORKERS,
+    EXPORT_SINGLE_DISTANCE_COLUMN_METERS,
+    EXPORT_TIMEZONE,
+)
+from utils.process_pool import iter_chunks, iter_pool_map
+
+ID_COLUMN = "Activity ID"
+DATE_COLUMN = "Activity Date"
+NAME_COLUMN = "Activity Name"
+TYPE_COLUMN = "Activity Type"
+DISTANCE_COLUMN = "Distance"
+FILENAME_COLUMN = "Filename"
+REQUIRED_COLUMNS = (ID_COLUMN, DATE_COLUMN, NAME_COLUMN, TYPE_COLUMN, DISTANCE_COLUMN, FILENAME_COLUMN)
+GZIP_EXTENSION = ".gz"
+# export type names are the display names ("Virtual Ride", "E-Bike Ride"),
+# the API's are the same words run together
+TYPE_SEPARATOR_PATTERN = re.compile(r"[\s-]+")
+
+FIT_SIGNATURE = b".FIT"
+FIT_SIGNATURE_OFFSET = 8
+FIT_MIN_HEADER_SIZE = 12
+FIT_CRC_SIZE = 2
+FIT_COMPRESSED_TIMESTAMP_HEADER = 0x80
+FIT_DEFINITION_HEADER = 0x40
+FIT_DEVELOPER_DATA_HEADER = 0x20
+FIT_LOCAL_TYPE_MASK = 0x0F
+FIT_COMPRESSED_LOCAL_TYPE_SHIFT = 5
+FIT_COMPRESSED_LOCAL_TYPE_MASK = 0x03
+FIT_FIELD_DEFINITION_SIZE = 3
+FIT_RECORD_MESSAGE = 20
+FIT_ACTIVITY_MESSAGE = 34
+FIT_POSITION_LAT_FIELD = 0
+FIT_POSITION_LONG_FIELD = 1
+FIT_LOCAL_TIMESTAMP_FIELD = 5
+FIT_TIMESTAMP_FIELD = 253
+FIT_INVALID_SINT32 = 0x7FFFFFFF
+FIT_INVALID_UINT32 = 0xFFFFFFFF
+FIT_FOUR_BYTE_FIELD = 4
+SEMICIRCLES_TO_DEGREES = 180.0 / 2**31
+# real UTC offsets run -12h to +14h, anything else is a broken clock
+MAX_UTC_OFFSET = timedelta(hours=14)
+
+# a bad file costs its activity its track (like an activity without GPS), not the replay
+TRACK_FILE_ERRORS = (
+    OSError,
+    EOFError,
+    KeyError,
+    ValueError,
+    IndexError,
+    struct.error,
+    zlib.error,
+    zipfile.BadZipFile,
+    ElementTree.ParseError,
+)
+
+# (coordinates as [lat, lon], the recording's UTC offset if the file has one)
+ParsedTrack = Tuple[List[List[float]], Optional[timedelta]]
+# a FIT local message type's layout: (global message number, byte order,
+# {field number: (offset in message, size)}, message size)
+FitDefinition = Tuple[int, str, Dict[int, Tuple[int, int]], int]
+
+
+@contextmanager
+def open_export(export_path: Path) -> Iterator[Callable[[str], bytes]]:
+    """Open an export zip (or the directory it was unzipped to) for reading.
+
+    Args:
+        export_path (Path): Export zip or directory.
+
+    Yields:
+        callable: Reads a member by its path inside the export, e.g.
+            "activities/123.gpx.gz", returning the raw bytes.
+    """
+    if export_path.is_dir():
+        yield lambda member: (export_path / member).read_bytes()
+        return
+    with zipfile.ZipFile(export_path) as archive:
+        yield archive.read
+
+
+def parse_export_date(value: str) -> Any:
+    """activities.csv's UTC date as an aware datetime (the raw text if it doesnt parse)."""
+    try:
+        return datetime.strptime(value, EXPORT_CSV_DATE_FORMAT).replace(tzinfo=timezone.utc)
+    except ValueError:
+        pass
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        logging.warning("Unrecognized export date: %r", value)
+        return value
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def parse_export_number(value: str) -> float:
+    """A number from activities.csv, which can have thousands separators (0.0 if blank)."""
+    value = value.replace(",", "").strip()
+    return float(value) if value else 0.0
+
+
+def export_activity_type(value: str) -> str:
+    """The API's name for an export type, e.g. "Virtual Ride" -> "VirtualRide"."""
+    return TYPE_SEPARATOR_PATTERN.sub("", value.strip())
+
+
+def read_export_rows(export_path: Path) -> List[Dict[str, Any]]:
+    """Read activities.csv into one dict per activity, oldest first.
+
+    Args:
+        export_path (Path): Export zip or directory.
+
+    Returns:
+        list: {id, name, type, date (UTC), distance (m), filename} per
+            activity. filename is "" for manual activities.
+
+    Raises:
+        KeyError: If the zip has no activities.csv (FileNotFoundError for a
+            directory).
+        ValueError: If activities.csv is missing one of REQUIRED_COLUMNS.
+    """
+    with open_export(export_path) as read_member:
+        text = read_member(EXPORT_CSV_FILENAME).decode("utf-8-sig")
+    reader = csv.reader(io.StringIO(text, newline=""))
+    header = next(reader, [])
+    missing_columns = [name for name in REQUIRED_COLUMNS if name not in header]
+    if missing_columns:
+        raise ValueError(f"{EXPORT_CSV_FILENAME} is missing columns: {', '.join(missing_columns)}")
+    columns = {name: header.index(name) for name in REQUIRED_COLUMNS}
+    distance_columns = [index for index, name in enumerate(header) if name == DISTANCE_COLUMN]
+    # the last Distance is meters when there are two
+    distance_scale = 1.0 if len(distance_columns) > 1 else EXPORT_SINGLE_DISTANCE_COLUMN_METERS
+
+    rows = []
+    for values in reader:
+        if not values:
+            continue
+        rows.append(
+            {
+                "id": int(values[columns[ID_COLUMN]]),
+                "name": values[columns[NAME_COLUMN]],
+                "type": export_activity_type(values[columns[TYPE_COLUMN]]),
+                "date": parse_export_date(values[columns[DATE_COLUMN]]),
+                "distance": parse_export_number(values[distance_columns[-1]]) * distance_scale,
+                "filename": values[columns[FILENAME_COLUMN]].strip(),
+            }
+        )
+    rows.sort(key=export_row_order)
+    return rows
+
+
+def export_row_order(row: Dict[str, Any]) -> Tuple[bool, Any]:
+    """Sort key for export rows: by date, unparsed dates first like undated features."""
+    has_date = isinstance(row["date"], datetime)
+    return has_date, row["date"] if has_date else row["id"]
+
+
+def parse_gpx(data: bytes) -> ParsedTrack:
+    """Track points of a GPX file, in file order."""
+    # some devices write whitespace before the xml declaration, which the parser rejects
+    root = ElementTree.fromstring(data.lstrip())
+    coordinates = [[float(point.get("lat")), float(point.get("lon"))] for point in root.iterfind(".//{*}trkpt")]
+    return coordinates, None
+
+
+def parse_tcx(data: bytes) -> ParsedTrack:
+    """Positions of a TCX file's trackpoints, skipping those without one."""
+    root = ElementTree.fromstring(data.lstrip())
+    coordinates = []
+    for position in root.iterfind(".//{*}Position"):
+        latitude = position.findtext("{*}LatitudeDegrees")
+        longitude = position.findtext("{*}LongitudeDegrees")
+        if latitude is not None and longitude is not None:
+            coordinates.append([float(latitude), float(longitude)])
+    return coordinates, None
+
+
+def parse_fit(data: bytes) -> ParsedTrack:
+    """Positions of a FIT file's record messages, and its UTC offset.
+
+    Only what's needed is decoded: position_lat/position_long of record
+    messages (semicircles) and the activity message's local_timestamp minus
+    its timestamp. every other message is skipped by its definition's size.
+    CRCs arent checked. chained FIT files are read one after the other.
+
+    Args:
+        data (bytes): FIT file content.
+
+    Returns:
+        tuple: ([lat, lon] coordinates, UTC offset or None).
+
+    Raises:
+        ValueError: If the data isnt a FIT file.
+    """
+    coordinates: List[List[float]] = []
+    utc_offset: Optional[timedelta] = None
+    file_start = 0
+    while file_start + FIT_MIN_HEADER_SIZE <= len(data):
+        header_size = data[file_start]
+        signature_start = file_start + FIT_SIGNATURE_OFFSET
+        if data[signature_start:signature_start + len(FIT_SIGNATURE)] != FIT_SIGNATURE:
+            raise ValueError("Not a FIT file")
+        offset = file_start + header_size
+        end = offset + struct.unpack_from("<I", data, file_start + 4)[0]
+        definitions: Dict[int, FitDefinition] = {}
+        while offset < end:
+            record_header = data[offset]
+            offset += 1
+            if _is_fit_definition(record_header):
+                local_type, definitions[local_type], offset = _read_fit_definition(data, offset, record_header)
+                continue
+            definition = definitions[_fit_data_local_type(record_header)]
+            position, message_utc_offset = _decode_fit_message(data, offset, definition)
+            if position is not None:
+                coordinates.append(position)
+            if message_utc_offset is not None:
+                utc_offset = message_utc_offset
+            offset += definition[3]
+        file_start = end + FIT_CRC_SIZE
+    return coordinates, utc_offset
+
+
+def _is_fit_definition(record_header: int) -> bool:
+    """Whether a FIT record header starts a definition message (compressed timestamp headers never do)."""
+    return not record_header & FIT_COMPRESSED_TIMESTAMP_HEADER and bool(record_header & FIT_DEFINITION_HEADER)
+
+
+def _fit_data_local_type(record_header: int) -> int:
+    """Local message type of a FIT data message's record header, normal or compressed timestamp."""
+    if record_header & FIT_COMPRESSED_TIMESTAMP_HEADER:
+        return (record_header >> FIT_COMPRESSED_LOCAL_TYPE_SHIFT) & FIT_COMPRESSED_LOCAL_TYPE_MASK
+    return record_header & FIT_LOCAL_TYPE_MASK
+
+
+def _read_fit_definition(data: bytes, offset: int, record_header: int) -> Tuple[int, FitDefinition, int]:
+    """Read a FIT definition message.
+
+    Args:
+        data (bytes): FIT file content.
+        offset (int): Offset just past the definition's record header.
+        record_header (int): The record header byte.
+
+    Returns:
+        tuple: (local message type it defines, its FitDefinition, offset of the next record).
+    """
+    byte_order = ">" if data[offset + 1] else "<"
+    global_number = struct.unpack_from(byte_order + "H", data, offset + 2)[0]
+    field_count = data[offset + 4]
+    offset += 5
+    fields = {}
+    message_size = 0
+    for _ in range(field_count):
+        field_number, field_size = data[offset], data[offset + 1]
+        fields[field_number] = (message_size, field_size)
+        message_size += field_size
+        offset += FIT_FIELD_DEFINITION_SIZE
+    if record_header & FIT_DEVELOPER_DATA_HEADER:
+        # developer fields arent read, they just take up space in every message
+        developer_field_count = data[offset]
+        offset += 1
+        for _ in range(developer_field_count):
+            message_size += data[offset + 1]
+            offset += FIT_FIELD_DEFINITION_SIZE
+    definition = (global_number, byte_order, fields, message_size)
+    return record_header & FIT_LOCAL_TYPE_MASK, definition, offset
+
+
+def _decode_fit_message(
+    data: bytes, message_start: int, definition: FitDefinition
+) -> Tuple[Optional[List[float]], Optional[timedelta]]:
+    """The position of a record message, or the UTC offset of an activity message.
+
+    Args:
+        data (bytes): FIT file content.
+        message_start (int): Offset of the message's first field.
+        definition (FitDefinition): The message's definition.
+
+    Returns:
+        tuple: ([lat, lon] or None, UTC offset or None). both None for every
+        other message, and for ones missing the fields or holding invalid
+        markers. offsets beyond MAX_UTC_OFFSET are treated as invalid too.
+    """
+    global_number, byte_order, fields, _ = definition
+    if global_number == FIT_RECORD_MESSAGE:
+        latitude = read_fit_field(data, message_start, fields, FIT_POSITION_LAT_FIELD, byte_order + "i")
+        longitude = read_fit_field(data, message_start, fields, FIT_POSITION_LONG_FIELD, byte_order + "i")
+        if latitude in (None, FIT_INVALID_SINT32) or longitude in (None, FIT_INVALID_SINT32):
+            return None, None
+        return [latitude * SEMICIRCLES_TO_DEGREES, longitude * SEMICIRCLES_TO_DEGREES], None
+    if global_number != FIT_ACTIVITY_MESSAGE:
+        return None, None
+
+    timestamp = read_fit_field(data, message_start, fields, FIT_TIMESTAMP_FIELD, byte_order + "I")
+    local_timestamp = read_fit_field(data, message_start, fields, FIT_LOCAL_TIMESTAMP_FIELD, byte_order + "I")
+    if timestamp in (None, FIT_INVALID_UINT32) or local_timestamp in (None, FIT_INVALID_UINT32):
+        return None, None
+    utc_offset = timedelta(seconds=local_timestamp - timestamp)
+    return None, (utc_offset if abs(utc_offset) <= MAX_UTC_OFFSET else None)
+
+
+def read_fit_field(
+    data: bytes,
+    message_start: int,
+    fields: Dict[int, Tuple[int, int]],
+    field_number: int,
+    struct_format: str,
+) -> Optional[int]:
+    """A 4-byte field of a FIT data message, or None if the message doesnt have it.
+
+    Args:
+        data (bytes): FIT file content.
+        message_start (int): Offset of the message's first field.
+        fields (dict): Field number to (offset in message, size) from its definition.
+        field_number (int): Field to read.
+        struct_format (str): Byte order plus "i" or "I".
+
+    Returns:
+        Optional[int]: Raw field value (invalid markers included).
+    """
+    field = fields.get(field_number)
+    if field is None or field[1] != FIT_FOUR_BYTE_FIELD:
+        return None
+    return struct.unpack_from(struct_format, data, message_start + field[0])[0]
+
+
+TRACK_PARSERS: Dict[str, Callable[[bytes], ParsedTrack]] = {
+    ".gpx": parse_gpx,
+    ".tcx": parse_tcx,
+    ".fit": parse_fit,
+}
+
+
+def track_extension(filename: str) -> str:
+    """A track file's format extension, under any .gz, e.g. ".fit"."""
+    if filename.lower().endswith(GZIP_EXTENSION):
+        filename = filename[:-len(GZIP_EXTENSION)]
+    return Path(filename).suffix.lower()
+
+
+def downsample_coordinates(
+    coordinates: List[List[float]],
+    max_points: Optional[int] = EXPORT_MAX_POINTS_PER_ACTIVITY,
+) -> List[List[float]]:
+    """Evenly spaced points, first and last included, like a reduced-resolution Strava stream.
+
+    Args:
+        coordinates (list): Track points.
+        max_points (int): Most points to keep, None for all of them.
+
+    Returns:
+        list: The input if it's short enough, else max_points of its points.
+    """
+    if max_points is None or len(coordinates) <= max_points:
+        return coordinates
+    if max_points < 2:
+        return coordinates[:max_points]
+    last_index = len(coordinates) - 1
+    steps = max_points - 1
+    return [coordinates[(index * last_index + steps // 2) // steps] for index in range(max_points)]
+
+
+def local_start_date(date_value: Any, utc_offset: Optional[timedelta]) -> Any:
+    """The local start time the API reports, from the export's UTC date.
+
+    Args:
+        date_value (Any): Aware UTC datetime (or raw text, passed through).
+        utc_offset (timedelta): Recording's own offset, if its file has one.
+
+    Returns:
+        Any: Naive local datetime, or the raw text.
+    """
+    if not isinstance(date_value, datetime):
+        return date_value
+    if utc_offset is not None:
+        return (date_value + utc_offset).replace(tzinfo=None)
+    return date_value.astimezone(ZoneInfo(EXPORT_TIMEZONE)).replace(tzinfo=None)
+
+
+def load_track(read_member: Callable[[str], bytes], filename: str) -> ParsedTrack:
+    """Read and decode one track file, empty if it cant be.
+
+    Args:
+        read_member (callable): From open_export.
+        filename (str): Path inside the export, e.g. "activities/123.fit.gz".
+
+    Returns:
+        tuple: ([lat, lon] coordinates, UTC offset or None).
+    """
+    parser = TRACK_PARSERS.get(track_extension(filename))
+    if parser is None:
+        logging.warning("Skipping track %s, unsupported format.", filename)
+        return [], None
+    try:
+        data = read_member(filename)
+        if filename.lower().endswith(GZIP_EXTENSION):
+            data = gzip.decompress(data)
+        return parser(data)
+    except TRACK_FILE_ERRORS as exc:
+        logging.warning("Couldnt read track %s: %s", filename, exc)
+        return [], None
+
+
+def parse_export_chunk(rows: List[Dict[str, Any]], export_path: Path) -> List[Dict[str, Any]]:
+    """Turn activities.csv rows into activity dicts, reading their track files.
+
+    Module-level so it can run in a worker process, see iter_export_activities.
+
+    Args:
+        rows (list): Rows from read_export_rows.
+        export_path (Path): Export zip or directory.
+
+    Returns:
+        list: Activity dicts, same shape as iter_detailed_activities yields.
+            activities without a readable track get no coordinates and are
+            dropped by iter_activity_features.
+    """
+    activities = []
+    with open_export(export_path) as read_member:
+        for row in rows:
+            coordinates, utc_offset = load_track(read_member, row["filename"]) if row["filename"] else ([], None)
+            activities.append(
+                {
+                    "id": row["id"],
+                    "name": row["name"],
+                    "type": row["type"],
+                    "date": local_start_date(row["date"], utc_offset),
+                    "distance": row["distance"],
+                    "coordinates": downsample_coordinates(coordinates),
+                }
+            )
+    return activities
+
+
+def iter_export_activities(
+    export_path: Path,
+    rows: Optional[List[Dict[str, Any]]] = None,
+    workers: int = EXPORT_PARSE_WORKERS,
+) -> Iterator[Dict[str, Any]]:
+    """Yield every activity in an export, oldest first, as iter_detailed_activities would.
+
+    Args:
+        export_path (Path): Export zip or directory.
+        rows (list, optional): read_export_rows output, if the caller
+            already has it.
+        workers (int): Worker processes decoding track files, 1 decodes in
+            this process. same output in the same order either way.
+
+    Yields:
+        dict: Activity dict with id, name, type, date, distance, coordinates.
+    """
+    if rows is None:
+        rows = read_export_rows(export_path)
+    logging.info(
+        "Replaying %s activities (%s with a track file) from %s.",
+        len(rows),
+        sum(1 for row in rows if row["filename"]),
+        export_path,
+    )
+    parse_chunk = partial(parse_export_chunk, export_path=export_path)
+    if workers > 1:
+        yield from iter_pool_map(parse_chunk, rows, workers, EXPORT_PARSE_CHUNK_ACTIVITIES)
+        return
+    for chunk in iter_chunks(rows, EXPORT_PARSE_CHUNK_ACTIVITIES):
+        yield from parse_chunk(chunk)
@@ -0,0 +1,297 @@
+"""Cut the cleaned tracks into a z/x/y pyramid of GeoJSON tiles.
+
+The backend serves the pyramid at /pac-tyler/tiles/{z}/{x}/{y}, so a
+tile-aware map client can fetch just the tiles covering its viewport. each
+zoom level is simplified to about a pixel of error, so zoomed-out tiles
+stay small.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import shutil
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from config import (
+    COMPACT_JSON_OUTPUT,
+    COORDINATE_DECIMAL_PLACES,
+    DATA_DIR_MODE,
+    DATE_TIME_OUTPUT_TIMESPEC,
+    TILE_BUILD_DIR_PREFIX,
+    TILE_FILE_SUFFIX,
+    TILE_MAX_ZOOM,
+    TILE_METADATA_FILENAME,
+    TILE_MIN_ZOOM,
+    TILE_SIMPLIFY_PIXELS,
+    TILE_SIZE_PIXELS,
+    TILES_DIR,
+)
+from utils.atomic_files import fsync_directory
+from utils.file_utils import compressed_variants, json_dump_kwargs, round_geojson_coordinates
+from utils.geojson_cleaner import EARTH_RADIUS_METERS, simplify_coordinates
+
+# web mercator is undefined at the poles, slippy maps clip here
+MAX_MERCATOR_LATITUDE = 85.05112878
+
+TileKey = Tuple[int, int, int]
+
+
+def tile_tolerance_meters(zoom: int, pixels: float = TILE_SIMPLIFY_PIXELS) -> float:
+    """Ground distance covered by some number of pixels at a zoom level.
+
+    Measured at the equator, so it's a slight overestimate of what fits in a
+    pixel further north -- still well under a pixel on screen at San Diego.
+
+    Args:
+        zoom (int): Slippy map zoom level.
+        pixels (float): On-screen error allowed.
+
+    Returns:
+        float: Douglas-Peucker tolerance in meters.
+    """
+    meters_per_pixel = 2 * math.pi * EARTH_RADIUS_METERS / (TILE_SIZE_PIXELS * 2**zoom)
+    return pixels * meters_per_pixel
+
+
+def tile_coordinates(points: np.ndarray, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fractional slippy map x/y of each point, in tiles.
+
+    Args:
+        points (np.ndarray): (n, 2) [lon, lat] array.
+        zoom (int): Zoom level.
+
+    Returns:
+        tuple: (x, y) float arrays, unclipped in x.
+    """
+    tile_count = 2**zoom
+    latitudes = np.radians(np.clip(points[:, 1], -MAX_MERCATOR_LATITUDE, MAX_MERCATOR_LATITUDE))
+    x = (points[:, 0] + 180.0) / 360.0 * tile_count
+    y = (1.0 - np.arcsinh(np.tan(latitudes)) / math.pi) / 2.0 * tile_count
+    return x, y
+
+
+def tile_indices(points: np.ndarray, zoom: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Slippy map tile x/y containing each point.
+
+    Args:
+        points (np.ndarray): (n, 2) [lon, lat] array.
+        zoom (int): Zoom level.
+
+    Returns:
+        tuple: (x, y) integer arrays, clipped to the valid tile range.
+    """
+    tile_count = 2**zoom
+    x, y = tile_coordinates(points, zoom)
+    return (
+        np.clip(np.floor(x), 0, tile_count - 1).astype(int),
+        np.clip(np.floor(y), 0, tile_count - 1).astype(int),
+    )
+
+
+def cut_track_into_tiles(
+    coordinates: List[List[float]],
+    zoom: int,
+) -> Dict[Tuple[int, int], List[List[List[float]]]]:
+    """Split one track into the pieces that fall in each tile.
+
+    A segment goes into every tile its endpoints' bounding box touches, so a
+    piece can poke a little past its tile edge -- that way lines meet up
+    across tile borders without clipping. consecutive segments in the same
+    tile are joined back into one run.
+
+    Args:
+        coordinates (list): Track in [lon, lat] pairs (at least two points).
+        zoom (int): Zoom level.
+
+    Returns:
+        dict: (x, y) -> list of runs, each a coordinate list of 2+ points.
+    """
+    tile_x, tile_y = tile_indices(np.asarray(coordinates, dtype=float), zoom)
+    min_x = np.minimum(tile_x[:-1], tile_x[1:]).tolist()
+    max_x = np.maximum(tile_x[:-1], tile_x[1:]).tolist()
+    min_y = np.minimum(tile_y[:-1], tile_y[1:]).tolist()
+    max_y = np.maximum(tile_y[:-1], tile_y[1:]).tolist()
+
+    # segments are visited in order, so each tile's list comes out sorted
+    segments_by_tile: Dict[Tuple[int, int], List[int]] = {}
+    for segment in range(len(coordinates) - 1):
+        for x in range(min_x[segment], max_x[segment] + 1):
+            for y in range(min_y[segment], max_y[segment] + 1):
+                segments_by_tile.setdefault((x, y), []).append(segment)
+
+    runs_by_tile: Dict[Tuple[int, int], List[List[List[float]]]] = {}
+    for tile, segments in segments_by_tile.items():
+        runs = []
+        run_start = previous = segments[0]
+        for segment in segments[1:]:
+            if segment != previous + 1:
+                runs.append(coordinates[run_start:previous + 2])
+                run_start = segment
+            previous = segment
+        runs.append(coordinates[run_start:previous + 2])
+        runs_by_tile[tile] = runs
+    return runs_by_tile
+
+
+def tile_feature(runs: List[List[List[float]]], properties: Dict[str, Any]) -> Dict[str, Any]:
+    """Wrap one activity's runs in a tile as a LineString or MultiLineString.
+
+    Args:
+        runs (list): Coordinate runs from cut_track_into_tiles.
+        properties (dict): The activity's properties (shared, not copied).
+
+    Returns:
+        dict: GeoJSON feature.
+    """
+    if len(runs) == 1:
+        geometry = {"type": "LineString", "coordinates": runs[0]}
+    else:
+        geometry = {"type": "MultiLineString", "coordinates": runs}
+    return {"type": "Feature", "geometry": geometry, "properties": properties}
+
+
+def build_tile_pyramid(
+    features: Iterable[Dict[str, Any]],
+    min_zoom: int = TILE_MIN_ZOOM,
+    max_zoom: int = TILE_MAX_ZOOM,
+) -> Tuple[Dict[TileKey, List[Dict[str, Any]]], Optional[List[float]]]:
+    """Simplify every track per zoom level and bucket the pieces by tile.
+
+    Takes a single pass over the features, so they can stream from the
+    stored file -- only the (simplified) tile pieces are held. the bounding
+    box of every track is collected along the way.
+
+    Args:
+        features (iterable): Cleaned GeoJSON LineString features.
+        min_zoom (int): Lowest zoom level to build.
+        max_zoom (int): Highest zoom level to build.
+
+    Returns:
+        tuple: ((z, x, y) -> features in that tile, [west, south, east, north]
+            or None with no tracks). tiles with no tracks are left out.
+    """
+    tolerances = {zoom: tile_tolerance_meters(zoom) for zoom in range(min_zoom, max_zoom + 1)}
+    tiles: Dict[TileKey, List[Dict[str, Any]]] = {}
+    bounds: Optional[List[float]] = None
+    for feature in features:
+        coordinates = feature["geometry"]["coordinates"]
+        if coordinates:
+            points = np.asarray(coordinates, dtype=float)
+            track_bounds = [*points.min(axis=0).tolist(), *points.max(axis=0).tolist()]
+            bounds = track_bounds if bounds is None else [
+                *np.minimum(bounds[:2], track_bounds[:2]).tolist(),
+                *np.maximum(bounds[2:], track_bounds[2:]).tolist(),
+            ]
+        if len(coordinates) < 2:
+            continue
+        properties = feature.get("properties", {})
+        for zoom, tolerance in tolerances.items():
+            simplified = simplify_coordinates(coordinates, tolerance)
+            for (x, y), runs in cut_track_into_tiles(simplified, zoom).items():
+                tiles.setdefault((zoom, x, y), []).append(tile_feature(runs, properties))
+    return tiles, bounds
+
+
+def write_tile(build_dir: Path, key: TileKey, features: List[Dict[str, Any]]) -> None:
+    """Write one tile plus its .gz/.br siblings into a build directory.
+
+    Plain writes are enough here -- nothing reads the build directory until
+    save_tiles swaps it in.
+
+    Args:
+        build_dir (Path): Directory the pyramid is being built in.
+        key (tuple): (z, x, y) of the tile.
+        features (list): Features in the tile.
+
+    Returns:
+        None
+    """
+    zoom, x, y = key
+    path = build_dir / str(zoom) / str(x) / f"{y}{TILE_FILE_SUFFIX}"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    collection = {"type": "FeatureCollection", "features": features}
+    if COMPACT_JSON_OUTPUT:
+        collection = round_geojson_coordinates(collection, COORDINATE_DECIMAL_PLACES)
+    data = json.dumps(collection, **json_dump_kwargs(COMPACT_JSON_OUTPUT)).encode("utf-8")
+    path.write_bytes(data)
+    for suffix, compressed in compressed_variants(data).items():
+        path.with_name(path.name + suffix).write_bytes(compressed)
+
+
+def swap_in_tiles(build_dir: Path, tiles_dir: Path) -> None:
+    """Point the tiles symlink at a finished build and delete older builds.
+
+    The symlink is replaced with a rename, so the backend sees either the
+    whole old pyramid or the whole new one, never a mix.
+
+    Args:
+        build_dir (Path): Finished build directory, next to tiles_dir.
+        tiles_dir (Path): Symlink path the backend serves from.
+
+    Returns:
+        None
+    """
+    temp_link = tiles_dir.with_name(f".{tiles_dir.name}.tmp")
+    temp_link.unlink(missing_ok=True)
+    # relative so it still resolves inside the backend's volume mount
+    temp_link.symlink_to(build_dir.name, target_is_directory=True)
+    os.replace(temp_link, tiles_dir)
+    fsync_directory(tiles_dir.parent)
+
+    for old_build in tiles_dir.parent.glob(f"{TILE_BUILD_DIR_PREFIX}*"):
+        if old_build != build_dir and old_build.is_dir():
+            shutil.rmtree(old_build, ignore_errors=True)
+
+
+def save_tiles(
+    features: Iterable[Dict[str, Any]],
+    tiles_dir: Path = TILES_DIR,
+    min_zoom: int = TILE_MIN_ZOOM,
+    max_zoom: int = TILE_MAX_ZOOM,
+) -> int:
+    """Build the tile pyramid and swap it in for the served one.
+
+    Writes tiles_dir/{z}/{x}/{y}.geojson (plus .gz/.br) for every tile that
+    has tracks, and tiles_dir/metadata.json with the zoom range and bounds.
+
+    Args:
+        features (iterable): Cleaned GeoJSON features.
+        tiles_dir (Path): Where the backend serves tiles from.
+        min_zoom (int): Lowest zoom level to build.
+        max_zoom (int): Highest zoom level to build.
+
+    Returns:
+        int: Number of tiles written.
+    """
+    tiles, bounds = build_tile_pyramid(features, min_zoom, max_zoom)
+
+    tiles_dir.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(dir=tiles_dir.parent, prefix=TILE_BUILD_DIR_PREFIX))
+    try:
+        # mkdtemp is owner-only, the backend container reads as another user
+        os.chmod(build_dir, DATA_DIR_MODE)
+        for key, features in tiles.items():
+            write_tile(build_dir, key, features)
+        metadata = {
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec=DATE_TIME_OUTPUT_TIMESPEC),
+            "min_zoom": min_zoom,
+            "max_zoom": max_zoom,
+            "bounds": bounds,
+            "tile_count": len(tiles),
+        }
+        (build_dir / TILE_METADATA_FILENAME).write_text(json.dumps(metadata), encoding="utf-8")
+        swap_in_tiles(build_dir, tiles_dir)
+    except BaseException:
+        shutil.rmtree(build_dir, ignore_errors=True)
+        raise
+
+    logging.info("Saved %s tiles (zoom %s-%s) to %s", len(tiles), min_zoom, max_zoom, tiles_dir)
+    return len(tiles)
@@ -0,0 +1,217 @@
+"""Compact binary copy of the cleaned tracks, served next to the GeoJSON.
+
+The GeoJSON spells every coordinate out as decimal text inside nested
+arrays, which is most of the file and most of the parse time. The .tracks
+file holds the same tracks as delta-encoded int32 fixed point, so a browser
+can view the coordinates as an Int32Array and prefix-sum them instead of
+parsing text. Layout (little-endian throughout):
+
+    offset  size          field
+    0       4             magic b"PTRK"
+    4       u16           format version (TRACKS_FORMAT_VERSION)
+    6       u16           decimal places -- coordinates are int(value * 10**places)
+    8       u32           feature count
+    12      u32           properties length in bytes (padded to a multiple of 4)
+    16      ...           JSON array of each feature's properties, space-padded
+    ...     u32 * count   points per feature
+    ...     i32 * 2 * n   [lon, lat] per point. the first point of each feature
+                          is absolute, the rest are deltas from the point before
+
+Everything after the header starts on a 4-byte boundary, so the arrays can
+be viewed in place without copying.
+"""
+
+from __future__ import annotations
+
+import json
+import shutil
+import struct
+import tempfile
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Type
+
+import numpy as np
+
+from config import (
+    COMPACT_JSON_SEPARATORS,
+    COORDINATE_DECIMAL_PLACES,
+    TRACKS_FILE_SUFFIX,
+    TRACKS_FORMAT_VERSION,
+)
+from utils.atomic_files import atomic_write
+
+TRACKS_MAGIC = b"PTRK"
+HEADER = struct.Struct("<4sHHII")
+WORD_BYTES = 4
+COUNT_DTYPE = np.dtype("<u4")
+COORDINATE_DTYPE = np.dtype("<i4")
+
+
+def tracks_path_for(geojson_filename: Path) -> Path:
+    """Path of the .tracks file that goes with a GeoJSON file."""
+    return geojson_filename.with_suffix(TRACKS_FILE_SUFFIX)
+
+
+def encode_coordinates(coordinates: List[List[float]], decimal_places: int) -> np.ndarray:
+    """Fixed-point [lon, lat] deltas for one track.
+
+    Args:
+        coordinates (list): Track in [lon, lat] pairs.
+        decimal_places (int): Fixed-point precision.
+
+    Returns:
+        np.ndarray: (n, 2) int32 array, first row absolute, the rest deltas.
+    """
+    if not coordinates:
+        return np.empty((0, 2), dtype=COORDINATE_DTYPE)
+    fixed = np.round(np.asarray(coordinates, dtype=float) * 10**decimal_places).astype(np.int64)
+    return np.diff(fixed, axis=0, prepend=np.zeros((1, 2), dtype=np.int64)).astype(COORDINATE_DTYPE)
+
+
+class TrackWriter:
+    """Streams features into a .tracks file, used as a context manager.
+
+    Coordinates go to an anonymous temp file as they arrive; only the
+    properties and point counts are kept in memory until close() assembles
+    the file and renames it into place.
+    """
+
+    def __init__(self, filename: Path, decimal_places: int = COORDINATE_DECIMAL_PLACES) -> None:
+        """Start an empty track file.
+
+        Args:
+            filename (Path): Destination .tracks path (parent must exist).
+            decimal_places (int): Fixed-point precision of the coordinates.
+
+        Returns:
+            None
+        """
+        self.filename = filename
+        self.decimal_places = decimal_places
+        self.properties: List[Dict[str, Any]] = []
+        self.point_counts: List[int] = []
+        self._coordinates = tempfile.TemporaryFile(dir=filename.parent)
+
+    def __enter__(self) -> "TrackWriter":
+        """Use the writer as a context manager.
+
+        Returns:
+            TrackWriter: This writer.
+        """
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        """Discard the temp coordinates file.
+
+        Nothing is finalized here -- only close() writes the .tracks file, so
+        leaving the block without calling it (an exception mid-save) leaves
+        the previous file in place.
+
+        Args:
+            exc_type (type): Exception type, if the block raised.
+            exc_value (BaseException): The exception, if the block raised.
+            traceback (TracebackType): Its traceback, if the block raised.
+
+        Returns:
+            None
+        """
+        self._coordinates.close()
+
+    def add(self, feature: Dict[str, Any]) -> None:
+        """Append one LineString feature.
+
+        Args:
+            feature (dict): GeoJSON LineString feature.
+
+        Returns:
+            None
+        """
+        deltas = encode_coordinates(feature["geometry"]["coordinates"], self.decimal_places)
+        self._coordinates.write(deltas.tobytes())
+        self.properties.append(feature.get("properties", {}))
+        self.point_counts.append(len(deltas))
+
+    def tee(self, features: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """Pass features through unchanged, adding each one on the way.
+
+        Args:
+            features (iterable): GeoJSON LineString features.
+
+        Yields:
+            dict: The same features.
+        """
+        for feature in features:
+            self.add(feature)
+            yield feature
+
+    def close(self) -> int:
+        """Assemble the finished file and swap it in atomically (see utils/atomic_files.py).
+
+        Returns:
+            int: Size of the written file in bytes.
+        """
+        properties = json.dumps(self.properties, separators=COMPACT_JSON_SEPARATORS).encode("utf-8")
+        properties += b" " * (-len(properties) % WORD_BYTES)
+        header = HEADER.pack(
+            TRACKS_MAGIC, TRACKS_FORMAT_VERSION, self.decimal_places, len(self.point_counts), len(properties)
+        )
+
+        try:
+            with atomic_write(self.filename) as file_handle:
+                file_handle.write(header)
+                file_handle.write(properties)
+                file_handle.write(np.asarray(self.point_counts, dtype=COUNT_DTYPE).tobytes())
+                self._coordinates.seek(0)
+                shutil.copyfileobj(self._coordinates, file_handle)
+                size = file_handle.tell()
+        finally:
+            self._coordinates.close()
+        return size
+
+
+def decode_tracks(data: bytes) -> Dict[str, Any]:
+    """Turn .tracks bytes back into a GeoJSON FeatureCollection.
+
+    Args:
+        data (bytes): Contents of a .tracks file.
+
+    Returns:
+        dict: FeatureCollection of LineStrings, coordinates at the file's
+            fixed-point precision.
+
+    Raises:
+        ValueError: If the data isnt a .tracks file this version can read.
+    """
+    if len(data) < HEADER.size:
+        raise ValueError("Not a tracks file: too short")
+    magic, version, decimal_places, feature_count, properties_length = HEADER.unpack_from(data)
+    if magic != TRACKS_MAGIC:
+        raise ValueError("Not a tracks file: bad magic")
+    if version != TRACKS_FORMAT_VERSION:
+        raise ValueError(f"Unsupported tracks format version {version}")
+
+    offset = HEADER.size
+    properties = json.loads(data[offset:offset + properties_length])
+    offset += properties_length
+    point_counts = np.frombuffer(data, dtype=COUNT_DTYPE, count=feature_count, offset=offset)
+    offset += point_counts.nbytes
+    deltas = np.frombuffer(data, dtype=COORDINATE_DTYPE, offset=offset).reshape(-1, 2).astype(np.int64)
+
+    scale = 10**decimal_places
+    features = []
+    start = 0
+    for feature_properties, point_count in zip(properties, point_counts.tolist()):
+        fixed = np.cumsum(deltas[start:start + point_count], axis=0)
+        start += point_count
+        features.append({
+            "type": "Feature",
+            "geometry": {"type": "LineString", "coordinates": (fixed / scale).tolist()},
+            "properties": feature_properties,
+        })
+    return {"type": "FeatureCollection", "features": features}
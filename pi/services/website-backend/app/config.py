@@ -13,6 +13,30 @@ class Settings(BaseSettings):
     
     # Database
     DATABASE_URL: str = "sqlite:///data/website_backend.db"
+
+    # SQLite tuning, applied to every pooled connection (see database.py).
+    # WAL lets gallery/post readers keep going while a vote or RSVP write
+    # commits, which matters a lot on the Pi's USB disk.
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE_BYTES: int = 256 * 1024 * 1024
+    SQLITE_CACHE_SIZE_KIB: int = 64 * 1024
+
+    # Connection pool -- overflow connections are opened on demand and closed
+    # once they're returned, so pool size is what stays open between requests
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_S: int = 30
+
+    # N+1 tripwire -- when on, every response gets an X-Query-Count header and
+    # requests running more than the threshold log a warning. off in prod.
+    QUERY_COUNT_LOGGING: bool = False
+    QUERY_COUNT_WARN_THRESHOLD: int = 10
+
+    # In-process cache for public GET responses (see response_cache.py).
+    # write endpoints invalidate it, the TTL only matters for out-of-band edits
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL_S: int = 300
+    RESPONSE_CACHE_MAX_ENTRIES: int = 512
     
     # JWT Authentication
     JWT_SECRET: str
@@ -42,6 +66,10 @@ class Settings(BaseSettings):
 
     # Pac-Tyler data (written by pac-tyler-updater, mounted as a volume)
     PAC_TYLER_DATA_DIR: str = "/app/pac-tyler"
+    # GeoJSON/tracks/activities (and their .br/.gz) kept in memory until the
+    # file changes on disk (see pac_tyler_cache.py). bigger files stay on disk
+    PAC_TYLER_CACHE_ENABLED: bool = True
+    PAC_TYLER_CACHE_MAX_FILE_BYTES: int = 64 * 1024 * 1024
     
     # API Metadata
     API_TITLE: str = "Website Backend API"
@@ -1,24 +1,210 @@
 """
 Database configuration and session management.
 
-Provides SQLAlchemy engine, session factory, and base model class.
+Provides SQLAlchemy engines (sync + aiosqlite), session factories, and base
+model class.
 """
 
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from app.config import settings
 
+SQLITE_URL_PREFIX = "sqlite"
+SQLITE_MEMORY_MARKER = ":memory:"
+SQLITE_ASYNC_DRIVER = "sqlite+aiosqlite"
+
+# journal_mode=WAL is persisted in the db file, the rest are per-connection so
+# they have to be re-applied every time the pool opens a new connection.
+# synchronous=NORMAL is safe under WAL -- a power cut can lose the last
+# commit but never corrupts the file.
+SQLITE_JOURNAL_MODE = "WAL"
+SQLITE_SYNCHRONOUS = "NORMAL"
+
+
+class QueryCounter:
+    """
+    Running count of SQL statements executed inside a count_queries() block.
+
+    Attributes:
+        statements: Statements executed so far, across both engines.
+    """
+
+    def __init__(self) -> None:
+        """Start the count at zero."""
+        self.statements = 0
+
+
+# set only while a count_queries() block is active. contextvars follow the
+# request's task (and SQLAlchemy's async greenlets), so concurrent requests
+# each get their own count
+_active_query_counter: ContextVar[Optional[QueryCounter]] = ContextVar("active_query_counter", default=None)
+
+
+@contextmanager
+def count_queries() -> Iterator[QueryCounter]:
+    """
+    Count every SQL statement the app runs inside this block.
+
+    Handy for catching N+1s: wrap a request (see the query count middleware
+    in main.py) or a test call and assert the count doesnt grow with the
+    number of rows.
+
+    Yields:
+        QueryCounter: Live counter; read .statements after the block.
+    """
+    counter = QueryCounter()
+    token = _active_query_counter.set(counter)
+    try:
+        yield counter
+    finally:
+        _active_query_counter.reset(token)
+
+
+def _count_statement(conn, cursor, statement, parameters, context, executemany) -> None:
+    """
+    SQLAlchemy `before_cursor_execute` hook feeding the active QueryCounter.
+
+    No-op outside a count_queries() block. Args are the standard event
+    signature and are unused.
+    """
+    counter = _active_query_counter.get()
+    if counter is not None:
+        counter.statements += 1
+
+
+def _sqlite_pragmas() -> list[str]:
+    """
+    Build the PRAGMA statements applied to every new SQLite connection.
+
+    Returns:
+        PRAGMA statements, in the order they should run.
+    """
+    return [
+        f"PRAGMA journal_mode={SQLITE_JOURNAL_MODE}",
+        f"PRAGMA synchronous={SQLITE_SYNCHRONOUS}",
+        f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}",
+        f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE_BYTES}",
+        # negative cache_size means KiB instead of pages
+        f"PRAGMA cache_size=-{settings.SQLITE_CACHE_SIZE_KIB}",
+    ]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    """
+    SQLAlchemy `connect` event hook that tunes a freshly opened SQLite connection.
+
+    Args:
+        dbapi_connection: Raw sqlite3 connection the pool just opened.
+        connection_record: Pool bookkeeping record (unused).
+
+    Side Effects:
+        Switches the database file to WAL mode (persistent) and sets
+        per-connection pragmas.
+    """
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def _sqlite_engine_kwargs(database_url: str) -> dict:
+    """
+    Build create_engine kwargs for a SQLite URL, shared by the sync and async engines.
+
+    File databases get a bounded pool sized from settings. In-memory
+    databases keep SQLAlchemy's default single-connection pool since pool
+    sizing means nothing there.
+
+    Args:
+        database_url: SQLAlchemy SQLite URL.
+
+    Returns:
+        Keyword args for create_engine / create_async_engine.
+    """
+    engine_kwargs = {"connect_args": {"check_same_thread": False}}  # Required for SQLite
+    if SQLITE_MEMORY_MARKER not in database_url:
+        engine_kwargs.update(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_S,
+        )
+    return engine_kwargs
+
+
+def create_sqlite_engine(database_url: str) -> Engine:
+    """
+    Create the app's engine with the managed SQLite profile.
+
+    SQLite file databases get WAL + tuned pragmas on every connection and a
+    bounded pool (see _sqlite_engine_kwargs). Non-SQLite URLs get a plain
+    engine.
+
+    Args:
+        database_url: SQLAlchemy database URL.
+
+    Returns:
+        Configured SQLAlchemy engine.
+    """
+    if not database_url.startswith(SQLITE_URL_PREFIX):
+        return create_engine(database_url)
+
+    sqlite_engine = create_engine(database_url, **_sqlite_engine_kwargs(database_url))
+    event.listen(sqlite_engine, "connect", _apply_sqlite_pragmas)
+    event.listen(sqlite_engine, "before_cursor_execute", _count_statement)
+    return sqlite_engine
+
+
+def create_async_sqlite_engine(database_url: str) -> AsyncEngine:
+    """
+    Create the aiosqlite twin of create_sqlite_engine for async route handlers.
+
+    Points at the same database file with the same pragmas and pool bounds,
+    just swaps the driver so queries run off the event loop instead of
+    stalling it.
+
+    Args:
+        database_url: Sync SQLAlchemy SQLite URL (e.g. settings.DATABASE_URL).
+
+    Returns:
+        Configured async engine.
+    """
+    async_url = make_url(database_url).set(drivername=SQLITE_ASYNC_DRIVER)
+    engine_kwargs = _sqlite_engine_kwargs(database_url)
+    if SQLITE_MEMORY_MARKER not in database_url:
+        # aiosqlite defaults to NullPool for file dbs, which would reopen the
+        # file (and rerun every pragma) on each request
+        engine_kwargs["poolclass"] = AsyncAdaptedQueuePool
+
+    async_sqlite_engine = create_async_engine(async_url, **engine_kwargs)
+    # pool events live on the sync facade; aiosqlite's adapted connection
+    # still hands out a normal blocking-style cursor inside the hook
+    event.listen(async_sqlite_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    event.listen(async_sqlite_engine.sync_engine, "before_cursor_execute", _count_statement)
+    return async_sqlite_engine
+
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    connect_args={"check_same_thread": False}  # Required for SQLite
-)
+engine = create_sqlite_engine(settings.DATABASE_URL)
 
 # Session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine + session factory for read-heavy public endpoints. Same db file,
+# so writes through SessionLocal are visible here as soon as they commit.
+# expire_on_commit=False since async sessions cant lazy-refresh attributes.
+async_engine = create_async_sqlite_engine(settings.DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 # Base class for models
 Base = declarative_base()
 
@@ -42,6 +228,25 @@ def get_db():
         db.close()
 
 
+async def get_async_db():
+    """
+    Async counterpart of get_db for route handlers that await their queries.
+
+    Relationships dont lazy-load on an AsyncSession -- load anything the
+    response needs up front with selectinload/joinedload.
+
+    Yields:
+        AsyncSession: SQLAlchemy async database session
+
+    Usage:
+        @app.get("/items")
+        async def get_items(db: AsyncSession = Depends(get_async_db)):
+            return (await db.execute(select(Item))).scalars().all()
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """
     Initialize database by creating all tables.
@@ -0,0 +1,197 @@
+"""
+Conditional file responses shared by every endpoint that serves a file.
+
+Adds strong ETag / Last-Modified validators and Cache-Control to file
+responses and answers If-None-Match / If-Modified-Since with a bodyless 304,
+so repeat gallery visits (and the Cloudflare tunnel in front of us) stop
+re-downloading images that havent changed.
+"""
+
+import os
+import re
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Optional
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse
+
+# uploads are saved as <uuid4>.<ext> and never rewritten in place -- a new
+# upload always gets a new name -- so they can be cached for a year without
+# revalidating. anything else (pac-tyler data rewritten daily, video files
+# named by slug) is stored by caches but revalidated on every use, which
+# costs one 304 round trip instead of the whole file.
+UUID_FILENAME_PATTERN = re.compile(r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, no-cache"
+
+HTTP_NOT_MODIFIED = 304
+
+
+def file_etag(stat_result: os.stat_result) -> str:
+    """
+    Build a strong ETag from a file's identity and size.
+
+    inode + mtime (ns) + size changes whenever the file is replaced or
+    rewritten, so two responses with the same tag are byte-identical.
+
+    Args:
+        stat_result: os.stat() of the file being served.
+
+    Returns:
+        Quoted ETag value.
+    """
+    return f'"{stat_result.st_ino:x}-{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+
+
+def is_immutable_file(path: Path) -> bool:
+    """Whether a file is UUID-named, i.e. an upload whose bytes never change."""
+    return bool(UUID_FILENAME_PATTERN.match(path.stem))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an If-None-Match header against the current ETag.
+
+    Uses weak comparison like RFC 9110 asks for If-None-Match, so a W/ prefix
+    added by a proxy still matches.
+
+    Args:
+        if_none_match: Raw header value (comma-separated tags or "*").
+        etag: Current quoted ETag.
+
+    Returns:
+        True if any listed tag matches.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    return any(candidate.strip().removeprefix("W/") == etag for candidate in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, stat_result: os.stat_result) -> bool:
+    """
+    Check an If-Modified-Since header against the file's mtime.
+
+    Args:
+        if_modified_since: Raw HTTP-date header value.
+        stat_result: os.stat() of the file being served.
+
+    Returns:
+        True if the file hasnt changed since that date. Unparseable dates
+        count as modified, so the client just gets the full file.
+    """
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates only have whole seconds
+    return int(stat_result.st_mtime) <= since.timestamp()
+
+
+def validator_headers(
+    stat_result: os.stat_result,
+    immutable: bool,
+    headers: Optional[dict[str, str]] = None,
+) -> dict[str, str]:
+    """
+    Response headers carrying a file's validators and Cache-Control.
+
+    Args:
+        stat_result: os.stat() of the file being served.
+        immutable: Use the immutable Cache-Control instead of revalidate.
+        headers: Extra response headers to include (e.g. Vary).
+
+    Returns:
+        Headers with ETag, Last-Modified, and Cache-Control added.
+    """
+    response_headers = dict(headers or {})
+    response_headers.update({
+        "ETag": file_etag(stat_result),
+        "Last-Modified": formatdate(stat_result.st_mtime, usegmt=True),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+    })
+    return response_headers
+
+
+def is_not_modified(request: Request, etag: str, stat_result: os.stat_result) -> bool:
+    """
+    Whether the client's cached copy is current, per its conditional headers.
+
+    If-None-Match wins over If-Modified-Since when both are sent (RFC 9110).
+
+    Args:
+        request: Incoming request (read for the conditional headers).
+        etag: Current quoted ETag.
+        stat_result: os.stat() of the file being served.
+
+    Returns:
+        True if a 304 should be sent instead of the body.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if if_modified_since is not None:
+        return _not_modified_since(if_modified_since, stat_result)
+    return False
+
+
+def conditional_file_response(
+    request: Request,
+    path: Path,
+    media_type: Optional[str] = None,
+    headers: Optional[dict[str, str]] = None,
+    immutable: Optional[bool] = None,
+) -> Response:
+    """
+    Serve a file with validators, or a 304 if the client's copy is current.
+
+    Args:
+        request: Incoming request (read for the conditional headers).
+        path: File to serve. Caller has already checked it exists.
+        media_type: Content-Type of the file.
+        headers: Extra response headers (e.g. Accept-Ranges, Vary).
+        immutable: Force the immutable / revalidate Cache-Control. Defaults
+            to immutable for UUID-named files.
+
+    Returns:
+        FileResponse with ETag, Last-Modified, and Cache-Control, or a bare
+        304 carrying the same validators.
+    """
+    stat_result = path.stat()
+    if immutable is None:
+        immutable = is_immutable_file(path)
+
+    response_headers = validator_headers(stat_result, immutable, headers)
+    if is_not_modified(request, response_headers["ETag"], stat_result):
+        return Response(status_code=HTTP_NOT_MODIFIED, headers=response_headers)
+    return FileResponse(path, media_type=media_type, headers=response_headers, stat_result=stat_result)
+
+
+def conditional_bytes_response(
+    request: Request,
+    body: bytes,
+    stat_result: os.stat_result,
+    media_type: Optional[str] = None,
+    headers: Optional[dict[str, str]] = None,
+) -> Response:
+    """
+    Serve a file's contents already held in memory, same validators as from disk.
+
+    The validators come from the stat the bytes were read under, so a client
+    gets the same ETag whether the body came from memory or the file.
+
+    Args:
+        request: Incoming request (read for the conditional headers).
+        body: The file's contents.
+        stat_result: os.stat() of the file when `body` was read.
+        media_type: Content-Type of the file.
+        headers: Extra response headers (e.g. Vary, Content-Encoding).
+
+    Returns:
+        Response with the body and revalidate Cache-Control, or a bare 304.
+    """
+    response_headers = validator_headers(stat_result, immutable=False, headers=headers)
+    if is_not_modified(request, response_headers["ETag"], stat_result):
+        return Response(status_code=HTTP_NOT_MODIFIED, headers=response_headers)
+    return Response(content=body, media_type=media_type, headers=response_headers)
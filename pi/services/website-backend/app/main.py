@@ -5,7 +5,9 @@ Backend API providing forum (Public Square), photo gallery, and recipe box
 (The Kitchen) services.
 """
 
-from fastapi import FastAPI
+import logging
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
@@ -13,21 +15,28 @@ from contextlib import asynccontextmanager
 from datetime import datetime
 
 from app.config import settings
-from app.database import init_db
+from app.database import async_engine, count_queries, init_db
 from app.rate_limit import limiter
+from app.response_cache import response_cache
 from app.schemas import HealthCheck
 from app.routers import gallery, videos, auth, pac_tyler, rsvp, public_square, recipes
 
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT_HEADER = "X-Query-Count"
+
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """
     Application lifespan manager.
 
-    Initializes database on startup.
+    Initializes database on startup and closes pooled async connections on
+    shutdown.
     """
     init_db()
     yield
+    await async_engine.dispose()
 
 
 # Create FastAPI application
@@ -52,6 +61,36 @@ app.add_middleware(
 )
 
 
+async def log_query_counts(request: Request, call_next):
+    """
+    Count SQL statements per request and flag the ones that look like N+1s.
+
+    Only registered when settings.QUERY_COUNT_LOGGING is on -- it wraps every
+    response (video streams included) so it stays out of the prod path.
+
+    Args:
+        request: Incoming request.
+        call_next: Next ASGI handler in the chain.
+
+    Returns:
+        The response, with an X-Query-Count header added.
+    """
+    with count_queries() as counter:
+        response = await call_next(request)
+    response.headers[QUERY_COUNT_HEADER] = str(counter.statements)
+    if counter.statements > settings.QUERY_COUNT_WARN_THRESHOLD:
+        logger.warning(
+            f"{request.method} {request.url.path} ran {counter.statements} SQL statements "
+            f"(threshold {settings.QUERY_COUNT_WARN_THRESHOLD}) -- probably an N+1, "
+            f"eager-load the relationship the response serializes"
+        )
+    return response
+
+
+if settings.QUERY_COUNT_LOGGING:
+    app.middleware("http")(log_query_counts)
+
+
 # Health check endpoint
 @app.get("/health", response_model=HealthCheck, tags=["System"])
 async def health_check():
@@ -68,6 +107,18 @@ async def health_check():
     )
 
 
+# Response cache stats
+@app.get("/health/cache", tags=["System"])
+async def cache_stats():
+    """
+    Hit/miss/eviction counters for the public read response cache.
+    
+    Returns:
+        dict: Cache settings and counters (see ResponseCache.stats)
+    """
+    return response_cache.stats()
+
+
 # Root endpoint
 @app.get("/", tags=["System"])
 async def root():
@@ -0,0 +1,211 @@
+"""
+In-memory copies of the Pac-Tyler data files.
+
+The updater rewrites the GeoJSON, tracks, and activity files once a day.
+The bytes of each file (and each .br/.gz sibling, each its own entry) are
+kept in memory and served from there until the file on disk changes --
+checked per request with a stat, reloaded only when inode, mtime, or size
+differ. The updater only ever renames new files into place, so a changed
+file always shows up as a new stat.
+
+Entries are keyed by file name, so a new generation's copy replaces the
+previous one instead of piling up. Files over PAC_TYLER_CACHE_MAX_FILE_BYTES
+arent cached, the router streams them from disk on every request.
+
+Lives in its own module, like response_cache.py, so main.py can expose the
+stats without importing the router.
+"""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from app.config import settings
+
+
+@dataclass
+class CachedFile:
+    """
+    One data file's bytes as read from disk.
+
+    Attributes:
+        path: File the bytes came from.
+        body: The file's contents.
+        stat_result: fstat() of the file when it was read.
+        loaded_at: Unix time it was read.
+        hits: Requests served from this copy.
+        parsed: Decoded JSON, for files read with read_json.
+    """
+
+    path: Path
+    body: bytes
+    stat_result: os.stat_result
+    loaded_at: float
+    hits: int = 0
+    parsed: Any = None
+
+
+def _same_file(stat_result: os.stat_result, other: os.stat_result) -> bool:
+    """Whether two stats are of the same, unchanged file."""
+    return (stat_result.st_ino, stat_result.st_mtime_ns, stat_result.st_size) == (
+        other.st_ino,
+        other.st_mtime_ns,
+        other.st_size,
+    )
+
+
+def _read_file(path: Path) -> tuple[bytes, os.stat_result]:
+    """
+    Read a whole file along with the stat of what was actually read.
+
+    fstat on the open file rather than a separate stat, so a rename landing
+    between the two cant pair new bytes with the old validators.
+
+    Args:
+        path: File to read.
+
+    Returns:
+        (contents, fstat of the opened file).
+    """
+    with path.open("rb") as file_handle:
+        stat_result = os.fstat(file_handle.fileno())
+        return file_handle.read(), stat_result
+
+
+class DataFileCache:
+    """
+    Per-file cache of Pac-Tyler data, invalidated by the file's stat.
+
+    Only touched from the event loop thread; the disk read on a miss runs in
+    the threadpool, the entry is stored back on the loop.
+
+    Attributes:
+        max_file_bytes: Files bigger than this arent cached.
+        enabled: When False, every read is a pass-through miss.
+        hits: Reads served from memory.
+        loads: Reads that (re)loaded a file from disk.
+        skipped: Reads of files too big to cache (or with the cache off).
+    """
+
+    def __init__(self, max_file_bytes: int, enabled: bool = True) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_file_bytes: Largest file to hold in memory.
+            enabled: Whether files are cached at all.
+        """
+        self.max_file_bytes = max_file_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.loads = 0
+        self.skipped = 0
+        # file name -> latest copy read
+        self._entries: dict[str, CachedFile] = {}
+
+    def _current(self, path: Path, stat_result: os.stat_result) -> Optional[CachedFile]:
+        """The cached copy of `path` if it still matches the file on disk, else None."""
+        entry = self._entries.get(path.name)
+        if entry is None or entry.path != path or not _same_file(entry.stat_result, stat_result):
+            return None
+        entry.hits += 1
+        self.hits += 1
+        return entry
+
+    async def read(self, path: Path, stat_result: os.stat_result) -> Optional[CachedFile]:
+        """
+        Get a file's bytes from memory, loading them if the file changed.
+
+        Args:
+            path: File to read. Caller has already stat'ed it.
+            stat_result: That stat, compared with the cached copy's.
+
+        Returns:
+            The cached file, or None if it's too big to cache or the cache
+            is off -- the caller serves it from disk.
+        """
+        if not self.enabled or stat_result.st_size > self.max_file_bytes:
+            self.skipped += 1
+            return None
+        entry = self._current(path, stat_result)
+        if entry is not None:
+            return entry
+
+        body, read_stat = await run_in_threadpool(_read_file, path)
+        self.loads += 1
+        entry = CachedFile(path=path, body=body, stat_result=read_stat, loaded_at=time.time())
+        self._entries[path.name] = entry
+        return entry
+
+    def read_json(self, path: Path) -> Any:
+        """
+        Parse a small JSON file, reusing the last parse while it's unchanged.
+
+        For the manifest and metadata files that are read on every request.
+        Synchronous -- these are a few KB.
+
+        Args:
+            path: JSON file to read.
+
+        Returns:
+            The decoded value.
+
+        Raises:
+            FileNotFoundError: If the file doesnt exist.
+            json.JSONDecodeError: If it isnt valid JSON.
+        """
+        stat_result = path.stat()
+        if self.enabled:
+            entry = self._current(path, stat_result)
+            if entry is not None:
+                return entry.parsed
+
+        body, read_stat = _read_file(path)
+        parsed = json.loads(body)
+        if self.enabled:
+            self.loads += 1
+            self._entries[path.name] = CachedFile(
+                path=path, body=body, stat_result=read_stat, loaded_at=time.time(), parsed=parsed
+            )
+        return parsed
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Snapshot of the cache counters and what it's holding.
+
+        Returns:
+            Dict with enabled, max_file_bytes, bytes held, hits, loads,
+            skipped, hit_rate, and one row per cached file.
+        """
+        reads = self.hits + self.loads
+        return {
+            "enabled": self.enabled,
+            "max_file_bytes": self.max_file_bytes,
+            "bytes": sum(len(entry.body) for entry in self._entries.values()),
+            "hits": self.hits,
+            "loads": self.loads,
+            "skipped": self.skipped,
+            "hit_rate": self.hits / reads if reads else 0.0,
+            "files": [
+                {
+                    "name": name,
+                    "path": str(entry.path),
+                    "bytes": len(entry.body),
+                    "mtime": entry.stat_result.st_mtime,
+                    "loaded_at": entry.loaded_at,
+                    "hits": entry.hits,
+                }
+                for name, entry in sorted(self._entries.items())
+            ],
+        }
+
+
+pac_tyler_cache = DataFileCache(
+    max_file_bytes=settings.PAC_TYLER_CACHE_MAX_FILE_BYTES,
+    enabled=settings.PAC_TYLER_CACHE_ENABLED,
+)
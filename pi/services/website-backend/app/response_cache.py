@@ -0,0 +1,213 @@
+"""
+Shared in-process response cache for public read endpoints.
+
+Public GETs (gallery listings, videos, recipes, Public Square posts) only
+change when someone writes, so their serialized JSON is kept in memory and
+served straight back until a matching write invalidates it. Entries are keyed
+by path + query params and grouped into namespaces; each write endpoint
+invalidates exactly the namespaces it affects. TTL is a backstop for
+anything that changes the db behind the app's back (scripts, manual edits).
+
+Lives in its own module, like rate_limit.py, so routers can decorate
+endpoints and main.py can expose the stats without a circular import.
+"""
+
+import time
+from collections import OrderedDict
+from functools import wraps
+from typing import Any, Callable, Optional
+
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+from app.config import settings
+
+CACHE_STATUS_HEADER = "X-Cache"
+JSON_MEDIA_TYPE = "application/json"
+
+# namespaces -- one per group of endpoints that change together. comments are
+# per post so a vote on one thread doesnt flush every other thread's comments
+GALLERIES_CACHE = "galleries"
+VIDEOS_CACHE = "videos"
+RECIPES_CACHE = "recipes"
+POSTS_CACHE = "posts"
+COMMENTS_CACHE = "comments:{post_id}"
+
+
+class ResponseCache:
+    """
+    TTL + LRU cache of serialized JSON responses, grouped by namespace.
+
+    Only touched from the event loop thread (every endpoint is `async def`),
+    so there's no locking.
+
+    Attributes:
+        max_entries: Entries kept before the least recently used is evicted.
+        ttl_s: Seconds an entry stays valid without being invalidated.
+        enabled: When False, every request is a pass-through miss.
+        hits: Requests served from the cache.
+        misses: Requests that had to run the endpoint.
+        evictions: Entries dropped to stay under max_entries.
+        invalidations: Entries dropped by write endpoints.
+    """
+
+    def __init__(self, max_entries: int, ttl_s: float, enabled: bool = True) -> None:
+        """
+        Create an empty cache.
+
+        Args:
+            max_entries: LRU capacity.
+            ttl_s: Entry lifetime in seconds.
+            enabled: Whether lookups/stores actually happen.
+        """
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # (namespace, path+query) -> (expires_at, body bytes)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, bytes]] = OrderedDict()
+        # bumped on every invalidate, so a read that started before a write
+        # committed cant store its now-stale result after the flush
+        self._generations: dict[str, int] = {}
+
+    def get(self, namespace: str, key: str) -> Optional[bytes]:
+        """
+        Look up a cached body, dropping it if its TTL has passed.
+
+        Args:
+            namespace: Namespace the entry was stored under.
+            key: Path + query string.
+
+        Returns:
+            The cached JSON body, or None on a miss.
+        """
+        entry = self._entries.get((namespace, key))
+        if entry is None:
+            return None
+        expires_at, body = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[(namespace, key)]
+            return None
+        self._entries.move_to_end((namespace, key))
+        return body
+
+    def put(self, namespace: str, key: str, body: bytes, generation: int) -> None:
+        """
+        Store a body unless the namespace was invalidated since `generation`.
+
+        Args:
+            namespace: Namespace to file the entry under.
+            key: Path + query string.
+            body: Serialized JSON response body.
+            generation: Namespace generation read before the endpoint ran.
+
+        Side Effects:
+            May evict the least recently used entry.
+        """
+        if self._generations.get(namespace, 0) != generation:
+            return
+        self._entries[(namespace, key)] = (time.monotonic() + self.ttl_s, body)
+        self._entries.move_to_end((namespace, key))
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def generation(self, namespace: str) -> int:
+        """Current invalidation generation for a namespace (0 if never invalidated)."""
+        return self._generations.get(namespace, 0)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """
+        Drop every entry in the given namespaces.
+
+        Call after the write commits, so the next read sees the new data.
+
+        Args:
+            namespaces: Fully formatted namespaces, e.g. POSTS_CACHE or
+                COMMENTS_CACHE.format(post_id=3).
+        """
+        for namespace in namespaces:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            stale_keys = [entry_key for entry_key in self._entries if entry_key[0] == namespace]
+            for entry_key in stale_keys:
+                del self._entries[entry_key]
+            self.invalidations += len(stale_keys)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Snapshot of the cache counters.
+
+        Returns:
+            Dict with enabled, entries, max_entries, ttl_s, hits, misses,
+            hit_rate, evictions, and invalidations.
+        """
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_s": self.ttl_s,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+        }
+
+    def cached(self, namespace: str, response_model: Any) -> Callable:
+        """
+        Decorator that serves an endpoint's JSON from the cache when it can.
+
+        The endpoint must take a `request: Request` param (same rule slowapi's
+        @limiter.limit has). `namespace` may reference path params, e.g.
+        COMMENTS_CACHE, and is formatted with the endpoint's kwargs. Only
+        successful returns are cached -- raised HTTPExceptions pass through.
+
+        Args:
+            namespace: Namespace (or format string) the entries belong to.
+            response_model: Same type as the route's response_model, used to
+                serialize the endpoint's return value.
+
+        Returns:
+            Decorator wrapping an async endpoint.
+        """
+        adapter = TypeAdapter(response_model)
+
+        def decorator(endpoint: Callable) -> Callable:
+            """wraps one endpoint."""
+
+            @wraps(endpoint)
+            async def wrapper(*args, **kwargs):
+                """serves a cached body or runs the endpoint and stores its output."""
+                if not self.enabled:
+                    return await endpoint(*args, **kwargs)
+
+                request: Request = kwargs["request"]
+                resolved_namespace = namespace.format(**kwargs)
+                key = f"{request.url.path}?{sorted(request.query_params.multi_items())}"
+
+                body = self.get(resolved_namespace, key)
+                if body is not None:
+                    self.hits += 1
+                    return Response(body, media_type=JSON_MEDIA_TYPE, headers={CACHE_STATUS_HEADER: "HIT"})
+
+                self.misses += 1
+                generation = self.generation(resolved_namespace)
+                result = await endpoint(*args, **kwargs)
+                body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+                self.put(resolved_namespace, key, body, generation)
+                return Response(body, media_type=JSON_MEDIA_TYPE, headers={CACHE_STATUS_HEADER: "MISS"})
+
+            return wrapper
+
+        return decorator
+
+
+response_cache = ResponseCache(
+    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+    ttl_s=settings.RESPONSE_CACHE_TTL_S,
+    enabled=settings.RESPONSE_CACHE_ENABLED,
+)
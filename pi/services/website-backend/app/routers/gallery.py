@@ -4,16 +4,16 @@ Gallery router for photo management.
 Provides endpoints for creating galleries and uploading/managing photos.
 """
 
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
-from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from sqlalchemy import func
+from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import func, select
 from typing import List, Optional
 from pathlib import Path
 import logging
 import uuid
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.dependencies import require_admin
 from app.models import Gallery, GalleryPhoto
 from app.schemas import (
@@ -22,24 +22,34 @@ from app.schemas import (
 )
 from app.config import settings
 from app.image_utils import create_thumbnail, decode_and_normalize_image
+from app.file_responses import conditional_file_response
+from app.response_cache import GALLERIES_CACHE, response_cache
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/galleries", tags=["Galleries"])
 
+# GalleryWithPhotos serializes every photo and async sessions cant lazy-load,
+# so photos come back in the same query. joinedload is fine here since its
+# one gallery per request -- no parent-row fan-out to worry about
+GALLERY_WITH_PHOTOS_LOAD = (joinedload(Gallery.photos),)
+
 
 # Gallery endpoints
 @router.get("", response_model=List[GalleryRead])
+@response_cache.cached(GALLERIES_CACHE, List[GalleryRead])
 async def list_galleries(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     public_only: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all galleries.
     
     Args:
+        request: Incoming request (the response cache keys on its path/query)
         skip: Number of galleries to skip (pagination)
         limit: Maximum number of galleries to return
         public_only: If True, only return public galleries
@@ -48,38 +58,50 @@ async def list_galleries(
     Returns:
         List of galleries with photo counts
     """
-    query = db.query(Gallery)
+    # one grouped COUNT joined onto the gallery page instead of a COUNT per gallery
+    photo_counts = (
+        select(GalleryPhoto.gallery_id, func.count(GalleryPhoto.id).label("photo_count"))
+        .group_by(GalleryPhoto.gallery_id)
+        .subquery()
+    )
+    query = (
+        select(Gallery, func.coalesce(photo_counts.c.photo_count, 0))
+        .outerjoin(photo_counts, photo_counts.c.gallery_id == Gallery.id)
+    )
     if public_only:
-        query = query.filter(Gallery.is_public == True)
+        query = query.where(Gallery.is_public == True)
     
-    galleries = query.order_by(Gallery.display_order.desc(), Gallery.id.desc()).offset(skip).limit(limit).all()
+    rows = (await db.execute(
+        query.order_by(Gallery.display_order.desc(), Gallery.id.desc()).offset(skip).limit(limit)
+    )).all()
     
-    # Add photo count to each gallery
-    result = []
-    for gallery in galleries:
-        gallery_dict = GalleryRead.model_validate(gallery).model_dump()
-        photo_count = db.query(func.count(GalleryPhoto.id)).filter(
-            GalleryPhoto.gallery_id == gallery.id
-        ).scalar()
-        gallery_dict["photo_count"] = photo_count
-        result.append(GalleryRead(**gallery_dict))
+    # photo_count isnt a mapped column -- stamp it on each instance so
+    # GalleryRead picks it up via from_attributes, same as post comment counts
+    galleries = []
+    for gallery, photo_count in rows:
+        gallery.photo_count = photo_count
+        galleries.append(gallery)
     
-    return result
+    return galleries
 
 
 @router.get("/{gallery_id}", response_model=GalleryWithPhotos)
-async def get_gallery(gallery_id: int, db: Session = Depends(get_db)):
+@response_cache.cached(GALLERIES_CACHE, GalleryWithPhotos)
+async def get_gallery(request: Request, gallery_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a specific gallery with all its photos.
     
     Args:
+        request: Incoming request (the response cache keys on its path/query)
         gallery_id: Gallery ID
         db: Database session
         
     Returns:
         Gallery with all photos
     """
-    gallery = db.query(Gallery).filter(Gallery.id == gallery_id).first()
+    gallery = (await db.execute(
+        select(Gallery).options(*GALLERY_WITH_PHOTOS_LOAD).where(Gallery.id == gallery_id)
+    )).unique().scalar_one_or_none()
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -87,18 +109,22 @@ async def get_gallery(gallery_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/slug/{slug}", response_model=GalleryWithPhotos)
-async def get_gallery_by_slug(slug: str, db: Session = Depends(get_db)):
+@response_cache.cached(GALLERIES_CACHE, GalleryWithPhotos)
+async def get_gallery_by_slug(request: Request, slug: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get a gallery by its URL slug.
     
     Args:
+        request: Incoming request (the response cache keys on its path/query)
         slug: Gallery slug
         db: Database session
         
     Returns:
         Gallery with all photos
     """
-    gallery = db.query(Gallery).filter(Gallery.slug == slug).first()
+    gallery = (await db.execute(
+        select(Gallery).options(*GALLERY_WITH_PHOTOS_LOAD).where(Gallery.slug == slug)
+    )).unique().scalar_one_or_none()
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
@@ -132,6 +158,7 @@ async def create_gallery(
     db.add(db_gallery)
     db.commit()
     db.refresh(db_gallery)
+    response_cache.invalidate(GALLERIES_CACHE)
     
     return db_gallery
 
@@ -170,6 +197,7 @@ async def update_gallery(
     
     db.commit()
     db.refresh(db_gallery)
+    response_cache.invalidate(GALLERIES_CACHE)
     
     return db_gallery
 
@@ -203,6 +231,7 @@ async def delete_gallery(
     
     db.delete(db_gallery)
     db.commit()
+    response_cache.invalidate(GALLERIES_CACHE)
 
 
 # Photo endpoints
@@ -285,35 +314,40 @@ async def upload_photo(
     db.add(db_photo)
     db.commit()
     db.refresh(db_photo)
+    response_cache.invalidate(GALLERIES_CACHE)
     
     return db_photo
 
 
 @router.get("/{gallery_id}/photos", response_model=List[GalleryPhotoRead])
-async def list_gallery_photos(gallery_id: int, db: Session = Depends(get_db)):
+@response_cache.cached(GALLERIES_CACHE, List[GalleryPhotoRead])
+async def list_gallery_photos(request: Request, gallery_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     List all photos in a gallery.
     
     Args:
+        request: Incoming request (the response cache keys on its path/query)
         gallery_id: Gallery ID
         db: Database session
         
     Returns:
         List of photos ordered by display_order
     """
-    gallery = db.query(Gallery).filter(Gallery.id == gallery_id).first()
+    gallery = await db.get(Gallery, gallery_id)
     if not gallery:
         raise HTTPException(status_code=404, detail="Gallery not found")
     
-    photos = db.query(GalleryPhoto).filter(
-        GalleryPhoto.gallery_id == gallery_id
-    ).order_by(GalleryPhoto.display_order, GalleryPhoto.created_at).all()
+    photos = (await db.execute(
+        select(GalleryPhoto)
+        .where(GalleryPhoto.gallery_id == gallery_id)
+        .order_by(GalleryPhoto.display_order, GalleryPhoto.created_at)
+    )).scalars().all()
     
     return photos
 
 
 @router.get("/photos/{photo_id}", response_model=GalleryPhotoRead)
-async def get_photo(photo_id: int, db: Session = Depends(get_db)):
+async def get_photo(photo_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get photo metadata.
     
@@ -324,7 +358,7 @@ async def get_photo(photo_id: int, db: Session = Depends(get_db)):
     Returns:
         Photo metadata
     """
-    photo = db.query(GalleryPhoto).filter(GalleryPhoto.id == photo_id).first()
+    photo = await db.get(GalleryPhoto, photo_id)
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
     
@@ -332,11 +366,20 @@ async def get_photo(photo_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/photos/{photo_id}/file")
-async def get_photo_file(photo_id: int, thumbnail: bool = False, db: Session = Depends(get_db)):
+async def get_photo_file(
+    request: Request,
+    photo_id: int,
+    thumbnail: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Get photo file (original or thumbnail).
     
+    Uploads are UUID-named and never rewritten, so they go out with an
+    immutable Cache-Control plus ETag/Last-Modified for 304 revalidation.
+    
     Args:
+        request: Incoming request (read for If-None-Match/If-Modified-Since)
         photo_id: Photo ID
         thumbnail: If True, return thumbnail instead of original
         db: Database session
@@ -344,7 +387,7 @@ async def get_photo_file(photo_id: int, thumbnail: bool = False, db: Session = D
     Returns:
         Image file
     """
-    photo = db.query(GalleryPhoto).filter(GalleryPhoto.id == photo_id).first()
+    photo = await db.get(GalleryPhoto, photo_id)
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
     
@@ -358,7 +401,7 @@ async def get_photo_file(photo_id: int, thumbnail: bool = False, db: Session = D
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Photo file not found")
     
-    return FileResponse(file_path, media_type=photo.mime_type)
+    return conditional_file_response(request, file_path, media_type=photo.mime_type)
 
 
 @router.patch("/photos/{photo_id}", response_model=GalleryPhotoRead)
@@ -389,6 +432,7 @@ async def update_photo(
     
     db.commit()
     db.refresh(db_photo)
+    response_cache.invalidate(GALLERIES_CACHE)
     
     return db_photo
 
@@ -423,3 +467,4 @@ async def delete_photo(
     
     db.delete(db_photo)
     db.commit()
+    response_cache.invalidate(GALLERIES_CACHE)
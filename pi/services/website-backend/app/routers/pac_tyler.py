@@ -1,22 +1,80 @@
 """
 Pac-Tyler router for serving Strava activity data.
 
-Serves the GeoJSON track file and derived activity dataset that the
-pac-tyler-updater writes daily. data lives at PAC_TYLER_DATA_DIR on the
-host, mounted into the container as a read-only volume.
+Serves the GeoJSON track file, a compact binary copy of it, its z/x/y tile
+pyramid, a bbox/date/type query over the updater's feature index, the
+coverage grid, and the derived activity dataset (plus its aggregates on
+their own) that the pac-tyler-updater writes daily. data lives at
+PAC_TYLER_DATA_DIR on the host, mounted into the container as a read-only
+volume. the whole-file endpoints serve from memory until the files change
+(see pac_tyler_cache.py).
 """
 
+import json
+import os
+import sqlite3
+import struct
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import APIRouter, HTTPException, Query, Request, Response
 
 from app.config import settings
+from app.file_responses import (
+    REVALIDATE_CACHE_CONTROL,
+    conditional_bytes_response,
+    conditional_file_response,
+)
+from app.pac_tyler_cache import pac_tyler_cache
 
 router = APIRouter(prefix="/pac-tyler", tags=["Pac-Tyler"])
 
 GEOJSON_FILENAME = "cleaned_output.geojson"
 ACTIVITIES_FILENAME = "pac-tyler-activities.json"
+# just the dataset's precomputed aggregates, for clients that want the totals
+# without the whole activity list
+AGGREGATES_FILENAME = "pac-tyler-aggregates.json"
+# every zoom-17 web-mercator cell a track passed through, plus coverage stats
+COVERAGE_FILENAME = "pac-tyler-coverage.json"
+JSON_MEDIA_TYPE = "application/json"
+
+# same tracks as the GeoJSON in the updater's binary format (delta-encoded
+# int32 fixed point, see pac-tyler-updater/utils/track_format.py)
+TRACKS_FILENAME = "cleaned_output.tracks"
+TRACKS_MEDIA_TYPE = "application/octet-stream"
+# feature count is the u32 at offset 8 of the header (magic, version,
+# decimal places, feature count, properties length)
+TRACKS_HEADER = struct.Struct("<4sHHII")
+TRACKS_MAGIC = b"PTRK"
+
+# the updater writes tiles/{z}/{x}/{y}.geojson for every tile that has tracks,
+# plus tiles/metadata.json with the zoom range and bounds
+TILES_DIRNAME = "tiles"
+TILE_FILE_SUFFIX = ".geojson"
+TILE_METADATA_FILENAME = "metadata.json"
+EMPTY_TILE = b'{"type":"FeatureCollection","features":[]}'
+
+# sqlite index the updater builds next to the GeoJSON: a features table
+# (id, date, type, feature json) plus a feature_bounds R*Tree over each
+# track's bounding box. it's swapped in with a rename, never edited in place,
+# so it's safe to open immutable (no locking, works on the read-only mount)
+FEATURE_INDEX_FILENAME = "pac-tyler-index.sqlite"
+FEATURE_COLLECTION_PREFIX = b'{"type":"FeatureCollection","features":['
+FEATURE_COLLECTION_SUFFIX = b"]}"
+DATE_TIMESPEC = "seconds"
+
+# the updater hard-links every save's outputs into generations/<n>/ and swaps
+# in manifest.json naming them, so files are served from the manifest when
+# there is one -- a response never mixes the geojson from one run with the
+# dataset from another. the generation goes out in a header so a client can
+# tell whether two responses came from the same run
+MANIFEST_FILENAME = "manifest.json"
+GENERATION_HEADER = "X-Pac-Tyler-Generation"
+
+# pre-compressed siblings the updater writes next to each file, in order of
+# preference (brotli is ~15-20% smaller than gzip on the track file)
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
 
 
 def _get_data_file(filename: str) -> Path:
@@ -40,25 +98,493 @@ def _get_data_file(filename: str) -> Path:
     return path
 
 
+def _read_manifest() -> Optional[dict]:
+    """Load the updater's generation manifest, or None if there isnt a usable one.
+
+    Returns:
+        Optional[dict]: Parsed manifest.
+    """
+    try:
+        manifest = pac_tyler_cache.read_json(Path(settings.PAC_TYLER_DATA_DIR) / MANIFEST_FILENAME)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    return manifest if isinstance(manifest, dict) else None
+
+
+def _get_generation_file(filename: str) -> tuple[Path, Optional[int]]:
+    """Resolve a data file through the manifest's current generation.
+
+    Falls back to the top-level file when there's no manifest, it doesnt
+    list the file, or the listed copy is gone (pruned under a stale read).
+
+    Args:
+        filename (str): File name within the pac-tyler data directory.
+
+    Returns:
+        tuple: (path to serve, generation number or None for the top-level file).
+
+    Raises:
+        HTTPException: 503 if the file hasnt been generated yet.
+    """
+    manifest = _read_manifest()
+    entry = (manifest or {}).get("files", {}).get(filename)
+    if isinstance(entry, dict) and isinstance(entry.get("path"), str):
+        data_dir = Path(settings.PAC_TYLER_DATA_DIR).resolve()
+        path = (data_dir / entry["path"]).resolve()
+        # the manifest is only trusted to point inside the data dir
+        if path.is_relative_to(data_dir) and path.is_file():
+            return path, manifest.get("generation")
+    return _get_data_file(filename), None
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    """Parse an Accept-Encoding header into the codings the client will take.
+
+    Args:
+        accept_encoding (str): Raw header value, e.g. "gzip, deflate, br;q=0.5".
+
+    Returns:
+        set[str]: Lowercased codings with a non-zero q value. "*" is kept as-is.
+    """
+    accepted = set()
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        if coding and _quality_allows(params):
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _quality_allows(params: str) -> bool:
+    """Whether an Accept-Encoding entry's parameters leave it acceptable.
+
+    Args:
+        params (str): Everything after the coding's ";", e.g. "q=0.5" or "".
+
+    Returns:
+        bool: False for q=0 or an unparseable q value, True otherwise.
+    """
+    quality = params.strip().lower()
+    if not quality.startswith("q="):
+        return True
+    try:
+        return float(quality[2:]) != 0
+    except ValueError:
+        return False
+
+
+async def _serve_data_file(request: Request, filename: str, media_type: str = JSON_MEDIA_TYPE) -> Response:
+    """Serve a pac-tyler data file from memory, swapping in a pre-compressed sibling when allowed.
+
+    The file (or sibling) is read through pac_tyler_cache, so it only comes
+    off disk again once the updater replaces it. Files too big to cache are
+    streamed from disk.
+
+    Args:
+        request (Request): Incoming request (Accept-Encoding + conditional headers).
+        filename (str): File name within the pac-tyler data directory.
+        media_type (str): Content-Type of the plain file.
+
+    Returns:
+        Response: The file (possibly compressed), or 304.
+
+    Raises:
+        HTTPException: 503 if the file hasnt been generated yet.
+    """
+    path, generation = _get_generation_file(filename)
+    serve_path, stat_result, headers = _pick_precompressed(request, path)
+    if generation is not None:
+        headers[GENERATION_HEADER] = str(generation)
+
+    cached = await pac_tyler_cache.read(serve_path, stat_result)
+    if cached is None:
+        return conditional_file_response(request, serve_path, media_type=media_type, headers=headers)
+    return conditional_bytes_response(request, cached.body, cached.stat_result, media_type=media_type, headers=headers)
+
+
+def _pick_precompressed(request: Request, path: Path) -> tuple[Path, os.stat_result, dict[str, str]]:
+    """Choose the plain file or its .br/.gz sibling, whichever the client accepts.
+
+    A sibling is only used if it's at least as new as the plain file, so a
+    half-finished updater run (plain file rewritten, siblings not yet) never
+    serves stale tracks.
+
+    Args:
+        request (Request): Incoming request (Accept-Encoding).
+        path (Path): Plain file. Caller has already checked it exists.
+
+    Returns:
+        tuple: (file to send, its stat, response headers incl. Vary and any
+            Content-Encoding).
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    accepted = _accepted_encodings(request.headers.get("accept-encoding", ""))
+    plain_stat = path.stat()
+
+    for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+        if encoding not in accepted and "*" not in accepted:
+            continue
+        compressed_path = path.with_name(path.name + suffix)
+        try:
+            compressed_stat = compressed_path.stat()
+        except FileNotFoundError:
+            continue
+        if compressed_stat.st_mtime_ns < plain_stat.st_mtime_ns:
+            continue
+        headers["Content-Encoding"] = encoding
+        return compressed_path, compressed_stat, headers
+
+    return path, plain_stat, headers
+
+
+def _serve_precompressed(request: Request, path: Path, media_type: str = JSON_MEDIA_TYPE) -> Response:
+    """Serve an existing file from disk, or its .br/.gz sibling if the client accepts it.
+
+    Used for tiles -- too many small files to be worth holding in memory.
+
+    Args:
+        request (Request): Incoming request (Accept-Encoding + conditional headers).
+        path (Path): Plain file to serve. Caller has already checked it exists.
+        media_type (str): Content-Type of the plain file.
+
+    Returns:
+        Response: The file (possibly compressed), or 304.
+    """
+    serve_path, _, headers = _pick_precompressed(request, path)
+    return conditional_file_response(request, serve_path, media_type=media_type, headers=headers)
+
+
 @router.get("/geojson", summary="GeoJSON activity tracks")
-async def get_geojson() -> FileResponse:
+async def get_geojson(request: Request) -> Response:
     """
     Return the GeoJSON FeatureCollection of all Strava activity tracks.
 
+    The updater rewrites the file daily, so it's sent with ETag/Last-Modified
+    and a revalidate Cache-Control -- unchanged days cost a 304. Sent as
+    brotli/gzip when the client accepts it (see _serve_data_file).
+
+    Args:
+        request (Request): Incoming request (read for conditional headers).
+
+    Returns:
+        Response: GeoJSON file with all recorded routes, or 304.
+    """
+    return await _serve_data_file(request, GEOJSON_FILENAME)
+
+
+@router.get("/tracks", summary="Activity tracks in the compact binary format")
+async def get_tracks(request: Request) -> Response:
+    """
+    Return the same tracks as /geojson as delta-encoded int32 fixed point.
+
+    About a third the size of the GeoJSON before compression, and a client
+    can view the coordinates as an Int32Array and prefix-sum them instead of
+    parsing text. Same caching and brotli/gzip handling as /geojson.
+
+    Args:
+        request (Request): Incoming request (Accept-Encoding + conditional headers).
+
     Returns:
-        FileResponse: GeoJSON file with all recorded routes.
+        Response: Binary tracks file (possibly compressed), or 304.
     """
-    path = _get_data_file(GEOJSON_FILENAME)
-    return FileResponse(path, media_type="application/json")
+    return await _serve_data_file(request, TRACKS_FILENAME, TRACKS_MEDIA_TYPE)
 
 
 @router.get("/activities", summary="Derived activity dataset")
-async def get_activities() -> FileResponse:
+async def get_activities(request: Request) -> Response:
     """
     Return the flat activity dataset used for frontend analytics.
 
+    Args:
+        request (Request): Incoming request (read for conditional headers).
+
+    Returns:
+        Response: JSON file with activity list and summary stats, or 304.
+    """
+    return await _serve_data_file(request, ACTIVITIES_FILENAME)
+
+
+@router.get("/aggregates", summary="Precomputed activity aggregates")
+async def get_aggregates(request: Request) -> Response:
+    """
+    Return the activity dataset's aggregates without the activity list.
+
+    Per-day/week/month/year totals, per-type rollups, the cumulative
+    distance series, and the longest/latest streaks, as the updater
+    precomputed them -- a fraction of the size of /activities.
+
+    Args:
+        request (Request): Incoming request (Accept-Encoding + conditional headers).
+
     Returns:
-        FileResponse: JSON file with activity list and summary stats.
+        Response: JSON aggregates (possibly compressed), or 304.
     """
-    path = _get_data_file(ACTIVITIES_FILENAME)
-    return FileResponse(path, media_type="application/json")
+    return await _serve_data_file(request, AGGREGATES_FILENAME)
+
+
+@router.get("/coverage", summary="Grid cells covered by activity tracks")
+async def get_coverage(request: Request) -> Response:
+    """
+    Return the coverage grid the updater rasterized the tracks into.
+
+    Every slippy map cell at the grid's zoom that any track passes through,
+    as sorted [x, y] pairs, plus stats: cell count, area, coarser tiles
+    touched, the largest fully covered square, and the largest cluster.
+
+    Args:
+        request (Request): Incoming request (Accept-Encoding + conditional headers).
+
+    Returns:
+        Response: JSON coverage (possibly compressed), or 304.
+    """
+    return await _serve_data_file(request, COVERAGE_FILENAME)
+
+
+def _tracks_feature_count(path: Path) -> Optional[int]:
+    """Feature count from a .tracks header, or None if it isnt a readable tracks file.
+
+    Args:
+        path (Path): .tracks file.
+
+    Returns:
+        Optional[int]: Number of features.
+    """
+    try:
+        with path.open("rb") as file_handle:
+            header = file_handle.read(TRACKS_HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(header) < TRACKS_HEADER.size:
+        return None
+    magic, _, _, feature_count, _ = TRACKS_HEADER.unpack(header)
+    return feature_count if magic == TRACKS_MAGIC else None
+
+
+@router.get("/meta", summary="Data generation, feature count, and cache state")
+async def get_meta() -> dict:
+    """
+    Return when the served data was generated, how many tracks it has, and the cache state.
+
+    Generation, time, and count come from the updater's manifest. without
+    one, the GeoJSON's mtime and the .tracks header stand in. Fields are null
+    if the updater hasnt run yet.
+
+    Returns:
+        dict: generation, generated_at, feature_count, and cache (see
+            DataFileCache.stats).
+    """
+    manifest = _read_manifest() or {}
+    generated_at = manifest.get("generated_at")
+    feature_count = manifest.get("feature_count")
+    data_dir = Path(settings.PAC_TYLER_DATA_DIR)
+
+    if generated_at is None:
+        try:
+            mtime = (data_dir / GEOJSON_FILENAME).stat().st_mtime
+            generated_at = datetime.fromtimestamp(mtime, timezone.utc).isoformat(timespec=DATE_TIMESPEC)
+        except FileNotFoundError:
+            pass
+    if feature_count is None:
+        feature_count = _tracks_feature_count(data_dir / TRACKS_FILENAME)
+
+    return {
+        "generation": manifest.get("generation"),
+        "generated_at": generated_at,
+        "feature_count": feature_count,
+        "cache": pac_tyler_cache.stats(),
+    }
+
+
+@router.get("/tiles", summary="Tile pyramid metadata")
+async def get_tile_metadata(request: Request) -> Response:
+    """
+    Return the zoom range and bounds of the tile pyramid.
+
+    Args:
+        request (Request): Incoming request (read for conditional headers).
+
+    Returns:
+        Response: JSON with min_zoom, max_zoom, bounds, tile_count, or 304.
+    """
+    return await _serve_data_file(request, f"{TILES_DIRNAME}/{TILE_METADATA_FILENAME}")
+
+
+@router.get("/tiles/{z}/{x}/{y}", summary="GeoJSON tile of activity tracks")
+async def get_tile(request: Request, z: int, x: int, y: int) -> Response:
+    """
+    Return the tracks in one web-mercator tile, simplified for its zoom.
+
+    A tile-aware map client fetches just the tiles covering its viewport.
+    Tiles with no tracks in them arent written by the updater and come back
+    as an empty FeatureCollection.
+
+    Args:
+        request (Request): Incoming request (Accept-Encoding + conditional headers).
+        z (int): Zoom level.
+        x (int): Tile column.
+        y (int): Tile row.
+
+    Returns:
+        Response: GeoJSON FeatureCollection (possibly compressed), or 304.
+
+    Raises:
+        HTTPException: 503 if the tiles havent been generated yet, 404 for
+            coordinates outside the grid or a zoom level that wasnt built.
+    """
+    tiles_dir = _get_data_file(TILES_DIRNAME)
+    if z < 0 or not (0 <= x < 2**z and 0 <= y < 2**z):
+        raise HTTPException(status_code=404, detail=f"Tile {z}/{x}/{y} is outside the tile grid")
+    if not (tiles_dir / str(z)).is_dir():
+        raise HTTPException(
+            status_code=404,
+            detail=f"Zoom {z} isnt in the tile pyramid, see /pac-tyler/tiles for the range",
+        )
+
+    path = tiles_dir / str(z) / str(x) / f"{y}{TILE_FILE_SUFFIX}"
+    if not path.exists():
+        return Response(
+            content=EMPTY_TILE,
+            media_type=JSON_MEDIA_TYPE,
+            headers={"Cache-Control": REVALIDATE_CACHE_CONTROL},
+        )
+    return _serve_precompressed(request, path)
+
+
+def _parse_bbox(bbox: str) -> tuple[float, float, float, float]:
+    """Parse a "west,south,east,north" query value.
+
+    Args:
+        bbox (str): Raw query value in degrees.
+
+    Returns:
+        tuple: (west, south, east, north).
+
+    Raises:
+        HTTPException: 400 if it isnt four numbers describing a valid box.
+    """
+    try:
+        west, south, east, north = (float(value) for value in bbox.split(","))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north in degrees")
+    if not (-180 <= west <= east <= 180 and -90 <= south <= north <= 90):
+        raise HTTPException(status_code=400, detail="bbox must be west,south,east,north in degrees")
+    return west, south, east, north
+
+
+def _parse_date(name: str, value: str) -> str:
+    """Normalize a since/until value to the format feature dates are stored in.
+
+    Feature dates are the activity's local start time without an offset
+    (e.g. 2026-05-09T08:00:00), so any offset on the query value is dropped.
+
+    Args:
+        name (str): Query parameter name, for the error message.
+        value (str): ISO 8601 date or datetime.
+
+    Returns:
+        str: ISO datetime string comparable with stored dates.
+
+    Raises:
+        HTTPException: 400 if the value isnt ISO 8601.
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO 8601 date or datetime")
+    return parsed.replace(tzinfo=None).isoformat(timespec=DATE_TIMESPEC)
+
+
+def _query_feature_index(
+    path: Path,
+    bbox: Optional[tuple[float, float, float, float]],
+    since: Optional[str],
+    until: Optional[str],
+    activity_types: list[str],
+) -> bytes:
+    """Run a features query against the index and build the response body.
+
+    Rows already hold each feature's serialized JSON, so matches are joined
+    into the FeatureCollection as-is -- nothing gets parsed.
+
+    Args:
+        path (Path): Index database file.
+        bbox (tuple): (west, south, east, north) the track's bounding box must
+            intersect, or None for anywhere.
+        since (str): Inclusive lower bound on the feature date, or None.
+        until (str): Exclusive upper bound on the feature date, or None.
+        activity_types (list[str]): Types to match (case-insensitive), or empty for all.
+
+    Returns:
+        bytes: GeoJSON FeatureCollection, features ordered by date.
+    """
+    sql = "SELECT f.feature FROM features AS f"
+    conditions: list[str] = []
+    params: list = []
+    if bbox is not None:
+        west, south, east, north = bbox
+        sql += " JOIN feature_bounds AS b ON b.id = f.id"
+        conditions.append("b.min_lon <= ? AND b.max_lon >= ? AND b.min_lat <= ? AND b.max_lat >= ?")
+        params.extend([east, west, north, south])
+    if since is not None:
+        conditions.append("f.date >= ?")
+        params.append(since)
+    if until is not None:
+        conditions.append("f.date < ?")
+        params.append(until)
+    if activity_types:
+        placeholders = ",".join("?" * len(activity_types))
+        conditions.append(f"f.type COLLATE NOCASE IN ({placeholders})")
+        params.extend(activity_types)
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY f.date, f.id"
+
+    connection = sqlite3.connect(f"{path.as_uri()}?mode=ro&immutable=1", uri=True)
+    try:
+        rows = connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+    return FEATURE_COLLECTION_PREFIX + b",".join(row[0].encode("utf-8") for row in rows) + FEATURE_COLLECTION_SUFFIX
+
+
+@router.get("/features", summary="Query activity tracks by area, date, and type")
+def get_features(
+    bbox: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    activity_type: Optional[str] = Query(None, alias="type"),
+) -> Response:
+    """
+    Return only the tracks matching a bounding box, date range, and/or type.
+
+    Backed by the updater's SQLite index (R*Tree over each track's bounding
+    box), so the map can pull a neighbourhood or a month without the whole
+    GeoJSON. A plain def -- FastAPI runs it in the threadpool, so the sqlite
+    call doesnt block the event loop.
+
+    Args:
+        bbox (str): "west,south,east,north" in degrees. Tracks whose bounding
+            box intersects it match (a track passing near a corner can match
+            without entering the box).
+        since (str): ISO date/datetime, tracks starting at or after it.
+        until (str): ISO date/datetime, tracks starting before it.
+        activity_type (str): Comma-separated activity types (query param `type`),
+            e.g. "Ride,Run".
+
+    Returns:
+        Response: GeoJSON FeatureCollection of matching features, oldest first.
+
+    Raises:
+        HTTPException: 400 for malformed parameters, 503 if the index hasnt
+            been generated yet.
+    """
+    parsed_bbox = _parse_bbox(bbox) if bbox else None
+    parsed_since = _parse_date("since", since) if since else None
+    parsed_until = _parse_date("until", until) if until else None
+    activity_types = [value.strip() for value in (activity_type or "").split(",") if value.strip()]
+
+    path, generation = _get_generation_file(FEATURE_INDEX_FILENAME)
+    body = _query_feature_index(path, parsed_bbox, parsed_since, parsed_until, activity_types)
+    headers = {"Cache-Control": REVALIDATE_CACHE_CONTROL}
+    if generation is not None:
+        headers[GENERATION_HEADER] = str(generation)
+    return Response(content=body, media_type=JSON_MEDIA_TYPE, headers=headers)
@@ -8,17 +8,19 @@ require_admin) can hard-delete posts/comments as a moderation kill switch.
 """
 
 import hashlib
-from typing import List
+from typing import List, Optional
 
 from fastapi import APIRouter, Depends, HTTPException, Request, status
-from sqlalchemy import func
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.dependencies import require_admin
 from app.models import Comment, CommentVote, Post, PostVote
 from app.rate_limit import get_client_ip, limiter
+from app.response_cache import COMMENTS_CACHE, POSTS_CACHE, response_cache
 from app.schemas import (
     CommentCreate,
     CommentRead,
@@ -96,15 +98,48 @@ def _apply_vote(db: Session, vote_model, filter_kwargs: dict, target, value: int
     return VoteResult(score=target.score, your_vote=your_vote)
 
 
-def _get_post_or_404(db: Session, post_id: int) -> Post:
-    """Fetch a post by id or raise 404."""
-    post = db.query(Post).filter(Post.id == post_id).first()
+def _post_lookup(post_id: int):
+    """
+    Build the one-post select shared by the sync and async lookups.
+
+    Args:
+        post_id: Post ID.
+
+    Returns:
+        Select over Post for that id.
+    """
+    return select(Post).where(Post.id == post_id)
+
+
+def _post_or_404(post: Optional[Post]) -> Post:
+    """
+    Pass a looked-up post through, or raise 404 if there wasnt one.
+
+    Args:
+        post: Result of executing _post_lookup.
+
+    Returns:
+        The post.
+
+    Raises:
+        HTTPException: 404 if post is None.
+    """
     if not post:
         raise HTTPException(status_code=404, detail="Post not found")
     return post
 
 
-def _attach_comment_counts(db: Session, posts: list[Post]) -> None:
+def _get_post_or_404(db: Session, post_id: int) -> Post:
+    """Fetch a post by id or raise 404 (see _post_lookup)."""
+    return _post_or_404(db.scalar(_post_lookup(post_id)))
+
+
+async def _get_post_or_404_async(db: AsyncSession, post_id: int) -> Post:
+    """Fetch a post by id on an async session or raise 404 (see _post_lookup)."""
+    return _post_or_404(await db.scalar(_post_lookup(post_id)))
+
+
+async def _attach_comment_counts(db: AsyncSession, posts: list[Post]) -> None:
     """
     Set a non-persisted `comment_count` on each post so PostRead can include it.
 
@@ -119,12 +154,11 @@ def _attach_comment_counts(db: Session, posts: list[Post]) -> None:
     """
     if not posts:
         return
-    counts = dict(
-        db.query(Comment.post_id, func.count(Comment.id))
-        .filter(Comment.post_id.in_([p.id for p in posts]))
+    counts = dict((await db.execute(
+        select(Comment.post_id, func.count(Comment.id))
+        .where(Comment.post_id.in_([p.id for p in posts]))
         .group_by(Comment.post_id)
-        .all()
-    )
+    )).all())
     for post in posts:
         post.comment_count = counts.get(post.id, 0)
 
@@ -139,16 +173,19 @@ def _get_comment_or_404(db: Session, comment_id: int) -> Comment:
 
 # Post endpoints
 @router.get("/posts", response_model=PostList)
+@response_cache.cached(POSTS_CACHE, PostList)
 async def list_posts(
+    request: Request,
     sort: PostSortLiteral = "top",
     page: int = 1,
     page_size: int = DEFAULT_PAGE_SIZE,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List published posts, sorted by top score or most recent.
 
     Args:
+        request: Incoming request (the response cache keys on its path/query).
         sort: "top" (score desc, then newest) or "new" (newest first).
         page: 1-indexed page number.
         page_size: Posts per page, capped at MAX_PAGE_SIZE.
@@ -160,26 +197,29 @@ async def list_posts(
     page = max(page, 1)
     page_size = min(max(page_size, 1), MAX_PAGE_SIZE)
 
-    query = db.query(Post).filter(Post.is_published == True)
+    query = select(Post).where(Post.is_published == True)
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+
     if sort == "top":
         query = query.order_by(Post.score.desc(), Post.created_at.desc())
     else:
         query = query.order_by(Post.created_at.desc())
 
-    total = query.count()
-    posts = query.offset((page - 1) * page_size).limit(page_size).all()
-    _attach_comment_counts(db, posts)
+    posts = (await db.execute(query.offset((page - 1) * page_size).limit(page_size))).scalars().all()
+    await _attach_comment_counts(db, posts)
     total_pages = (total + page_size - 1) // page_size if total else 0
 
     return PostList(posts=posts, total=total, page=page, page_size=page_size, total_pages=total_pages)
 
 
 @router.get("/posts/{post_id}", response_model=PostRead)
-async def get_post(post_id: int, db: Session = Depends(get_db)):
+@response_cache.cached(POSTS_CACHE, PostRead)
+async def get_post(request: Request, post_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a single post by id.
 
     Args:
+        request: Incoming request (the response cache keys on its path/query).
         post_id: Post ID.
         db: Database session.
 
@@ -189,8 +229,8 @@ async def get_post(post_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: 404 if no post with that id exists.
     """
-    post = _get_post_or_404(db, post_id)
-    _attach_comment_counts(db, [post])
+    post = await _get_post_or_404_async(db, post_id)
+    await _attach_comment_counts(db, [post])
     return post
 
 
@@ -215,6 +255,7 @@ async def create_post(request: Request, post: PostCreate, db: Session = Depends(
     db.add(db_post)
     db.commit()
     db.refresh(db_post)
+    response_cache.invalidate(POSTS_CACHE)
     db_post.comment_count = 0  # brand new post, nothing to count yet
     return db_post
 
@@ -240,19 +281,23 @@ async def delete_post(
     db_post = _get_post_or_404(db, post_id)
     db.delete(db_post)
     db.commit()
+    response_cache.invalidate(POSTS_CACHE, COMMENTS_CACHE.format(post_id=post_id))
 
 
 # Comment endpoints
 @router.get("/posts/{post_id}/comments", response_model=List[CommentRead])
+@response_cache.cached(COMMENTS_CACHE, List[CommentRead])
 async def list_comments(
+    request: Request,
     post_id: int,
     sort: PostSortLiteral = "top",
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List a post's comments, flat (no nested replies), sorted by top score or most recent.
 
     Args:
+        request: Incoming request (the response cache keys on its path/query).
         post_id: Post ID.
         sort: "top" (score desc, then newest) or "new" (newest first).
         db: Database session.
@@ -263,14 +308,14 @@ async def list_comments(
     Raises:
         HTTPException: 404 if no post with that id exists.
     """
-    _get_post_or_404(db, post_id)
+    await _get_post_or_404_async(db, post_id)
 
-    query = db.query(Comment).filter(Comment.post_id == post_id)
+    query = select(Comment).where(Comment.post_id == post_id)
     if sort == "top":
         query = query.order_by(Comment.score.desc(), Comment.created_at.desc())
     else:
         query = query.order_by(Comment.created_at.desc())
-    return query.all()
+    return (await db.execute(query)).scalars().all()
 
 
 @router.post("/posts/{post_id}/comments", response_model=CommentRead, status_code=status.HTTP_201_CREATED)
@@ -300,6 +345,8 @@ async def create_comment(request: Request, post_id: int, comment: CommentCreate,
     db.add(db_comment)
     db.commit()
     db.refresh(db_comment)
+    # posts carry a comment_count, so the post listings go stale too
+    response_cache.invalidate(POSTS_CACHE, COMMENTS_CACHE.format(post_id=post_id))
     return db_comment
 
 
@@ -322,8 +369,10 @@ async def delete_comment(
         HTTPException: 404 if no comment with that id exists.
     """
     db_comment = _get_comment_or_404(db, comment_id)
+    post_id = db_comment.post_id
     db.delete(db_comment)
     db.commit()
+    response_cache.invalidate(POSTS_CACHE, COMMENTS_CACHE.format(post_id=post_id))
 
 
 # Vote endpoints
@@ -351,7 +400,9 @@ async def vote_on_post(request: Request, post_id: int, vote: VoteRequest, db: Se
     """
     post = _get_post_or_404(db, post_id)
     ip_hash = hash_ip(get_client_ip(request))
-    return _apply_vote(db, PostVote, {"post_id": post_id, "ip_hash": ip_hash}, post, vote.value)
+    result = _apply_vote(db, PostVote, {"post_id": post_id, "ip_hash": ip_hash}, post, vote.value)
+    response_cache.invalidate(POSTS_CACHE)
+    return result
 
 
 @router.post("/comments/{comment_id}/vote", response_model=VoteResult)
@@ -376,4 +427,6 @@ async def vote_on_comment(request: Request, comment_id: int, vote: VoteRequest,
     """
     comment = _get_comment_or_404(db, comment_id)
     ip_hash = hash_ip(get_client_ip(request))
-    return _apply_vote(db, CommentVote, {"comment_id": comment_id, "ip_hash": ip_hash}, comment, vote.value)
+    result = _apply_vote(db, CommentVote, {"comment_id": comment_id, "ip_hash": ip_hash}, comment, vote.value)
+    response_cache.invalidate(COMMENTS_CACHE.format(post_id=comment.post_id))
+    return result
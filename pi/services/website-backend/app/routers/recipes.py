@@ -13,16 +13,18 @@ from pathlib import Path
 from typing import List, Optional
 
 from fastapi import APIRouter, Depends, File, Form, HTTPException, Request, UploadFile, status
-from fastapi.responses import FileResponse
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
 
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.dependencies import require_admin
+from app.file_responses import conditional_file_response
 from app.image_utils import create_thumbnail, decode_and_normalize_image
 from app.models import Recipe, RecipePhoto, Tag
 from app.rate_limit import limiter
+from app.response_cache import RECIPES_CACHE, response_cache
 from app.schemas import (
     MAX_PHOTOS_PER_RECIPE,
     MAX_RECIPE_LINK_LENGTH,
@@ -43,6 +45,12 @@ router = APIRouter(prefix="/recipes", tags=["Recipes"])
 RECIPE_CREATE_RATE_LIMIT = "10/hour"
 RECIPE_PHOTO_ADD_RATE_LIMIT = "30/hour"
 
+# RecipeRead serializes photos and tags. selectinload keeps a 200-recipe page
+# at three queries total (recipes, then one IN-batch per collection) instead
+# of two lazy loads per recipe, and avoids the photos x tags row explosion a
+# double joinedload would cause
+RECIPE_READ_LOAD = (selectinload(Recipe.photos), selectinload(Recipe.tags))
+
 
 def _split_tag_names(raw: Optional[str]) -> List[str]:
     """
@@ -98,7 +106,7 @@ def _apply_recipe_filters(query, search: Optional[str], tags: Optional[str]):
     Apply search/tag filters shared by list and random endpoints.
 
     Args:
-        query: Base SQLAlchemy query over Recipe.
+        query: Base SQLAlchemy select (or legacy Query) over Recipe.
         search: Substring to match against name or description (case-insensitive).
         tags: Comma-separated tag names the recipe must have all of.
 
@@ -162,17 +170,20 @@ def _save_recipe_photo(recipe_id: int, file_content: bytes, filename: str) -> Re
 
 
 @router.get("", response_model=List[RecipeRead])
+@response_cache.cached(RECIPES_CACHE, List[RecipeRead])
 async def list_recipes(
+    request: Request,
     search: Optional[str] = None,
     tags: Optional[str] = None,
     skip: int = 0,
     limit: int = 200,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List recipes, newest first, optionally filtered by search text and/or tags.
 
     Args:
+        request: Incoming request (the response cache keys on its path/query).
         search: Substring to match against recipe name or description.
         tags: Comma-separated tag names -- recipes must have all of them.
         skip: Number of recipes to skip (pagination).
@@ -182,15 +193,15 @@ async def list_recipes(
     Returns:
         Matching recipes with their tags and photos.
     """
-    query = _apply_recipe_filters(db.query(Recipe), search, tags)
-    return query.order_by(Recipe.created_at.desc()).offset(skip).limit(limit).all()
+    query = _apply_recipe_filters(select(Recipe).options(*RECIPE_READ_LOAD), search, tags)
+    return (await db.execute(query.order_by(Recipe.created_at.desc()).offset(skip).limit(limit))).scalars().all()
 
 
 @router.get("/random", response_model=RecipeRead)
 async def random_recipe(
     search: Optional[str] = None,
     tags: Optional[str] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Pick one random recipe, optionally within the same search/tag filters.
@@ -206,15 +217,16 @@ async def random_recipe(
     Raises:
         HTTPException: 404 if no recipe matches the filters.
     """
-    query = _apply_recipe_filters(db.query(Recipe), search, tags)
-    recipe = query.order_by(func.random()).first()
+    query = _apply_recipe_filters(select(Recipe).options(*RECIPE_READ_LOAD), search, tags)
+    recipe = await db.scalar(query.order_by(func.random()).limit(1))
     if not recipe:
         raise HTTPException(status_code=404, detail="No recipes match those filters")
     return recipe
 
 
 @router.get("/tags", response_model=List[TagWithCount])
-async def list_tags(db: Session = Depends(get_db)):
+@response_cache.cached(RECIPES_CACHE, List[TagWithCount])
+async def list_tags(request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     List every tag currently in use, alphabetically, with recipe counts.
 
@@ -222,27 +234,29 @@ async def list_tags(db: Session = Depends(get_db)):
     chips on the browse view.
 
     Args:
+        request: Incoming request (the response cache keys on its path/query).
         db: Database session.
 
     Returns:
         All tags with how many recipes use each one.
     """
-    rows = (
-        db.query(Tag, func.count(Recipe.id).label("recipe_count"))
+    rows = (await db.execute(
+        select(Tag, func.count(Recipe.id).label("recipe_count"))
         .outerjoin(Tag.recipes)
         .group_by(Tag.id)
         .order_by(Tag.name)
-        .all()
-    )
+    )).all()
     return [TagWithCount(id=tag.id, name=tag.name, recipe_count=count) for tag, count in rows]
 
 
 @router.get("/{recipe_id}", response_model=RecipeRead)
-async def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
+@response_cache.cached(RECIPES_CACHE, RecipeRead)
+async def get_recipe(request: Request, recipe_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a single recipe with its tags and photos.
 
     Args:
+        request: Incoming request (the response cache keys on its path/query).
         recipe_id: Recipe ID.
         db: Database session.
 
@@ -252,7 +266,7 @@ async def get_recipe(recipe_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: 404 if not found.
     """
-    recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
+    recipe = await db.scalar(select(Recipe).options(*RECIPE_READ_LOAD).where(Recipe.id == recipe_id))
     if not recipe:
         raise HTTPException(status_code=404, detail="Recipe not found")
     return recipe
@@ -314,6 +328,7 @@ async def create_recipe(
 
     db.commit()
     db.refresh(recipe)
+    response_cache.invalidate(RECIPES_CACHE)
     return recipe
 
 
@@ -351,6 +366,7 @@ async def update_recipe(
 
     db.commit()
     db.refresh(recipe)
+    response_cache.invalidate(RECIPES_CACHE)
     return recipe
 
 
@@ -380,6 +396,7 @@ async def delete_recipe(
 
     db.delete(recipe)
     db.commit()
+    response_cache.invalidate(RECIPES_CACHE)
 
 
 @router.post("/{recipe_id}/photos", response_model=RecipeRead)
@@ -428,6 +445,7 @@ async def add_recipe_photos(
 
     db.commit()
     db.refresh(recipe)
+    response_cache.invalidate(RECIPES_CACHE)
     return recipe
 
 
@@ -460,6 +478,7 @@ async def delete_recipe_photo(
     _delete_photo_files(Path(settings.RECIPE_PHOTOS_DIR), photo)
     db.delete(photo)
     db.commit()
+    response_cache.invalidate(RECIPES_CACHE)
 
 
 @router.post("/{recipe_id}/photos/{photo_id}/thumbnail", response_model=RecipeRead)
@@ -504,6 +523,7 @@ async def set_recipe_thumbnail(
     if photo.display_order > min_order:
         photo.display_order = min_order - 1
         db.commit()
+        response_cache.invalidate(RECIPES_CACHE)
 
     recipe = db.query(Recipe).filter(Recipe.id == recipe_id).first()
     return recipe
@@ -527,11 +547,20 @@ def _delete_photo_files(photos_base: Path, photo: RecipePhoto) -> None:
 
 
 @router.get("/photos/{photo_id}/file")
-async def get_recipe_photo_file(photo_id: int, thumbnail: bool = False, db: Session = Depends(get_db)):
+async def get_recipe_photo_file(
+    request: Request,
+    photo_id: int,
+    thumbnail: bool = False,
+    db: AsyncSession = Depends(get_async_db),
+):
     """
     Serve a recipe photo file (original or thumbnail).
 
+    Cached like gallery photos -- immutable, with ETag/Last-Modified so
+    revalidation gets a 304.
+
     Args:
+        request: Incoming request (read for If-None-Match/If-Modified-Since).
         photo_id: Photo ID.
         thumbnail: If True, return the thumbnail instead of the original.
         db: Database session.
@@ -542,7 +571,7 @@ async def get_recipe_photo_file(photo_id: int, thumbnail: bool = False, db: Sess
     Raises:
         HTTPException: 404 if the photo record or its file is missing.
     """
-    photo = db.query(RecipePhoto).filter(RecipePhoto.id == photo_id).first()
+    photo = await db.get(RecipePhoto, photo_id)
     if not photo:
         raise HTTPException(status_code=404, detail="Photo not found")
 
@@ -552,4 +581,4 @@ async def get_recipe_photo_file(photo_id: int, thumbnail: bool = False, db: Sess
     if not file_path.exists():
         raise HTTPException(status_code=404, detail="Photo file not found")
 
-    return FileResponse(file_path, media_type=photo.mime_type)
+    return conditional_file_response(request, file_path, media_type=photo.mime_type)
@@ -6,7 +6,9 @@ video content with support for range requests (seeking).
 """
 
 from fastapi import APIRouter, Depends, HTTPException, Request, UploadFile, File, Form, status
-from fastapi.responses import StreamingResponse, FileResponse
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from pathlib import Path
@@ -14,11 +16,13 @@ import shutil
 import subprocess
 import json
 
-from app.database import get_db
+from app.database import get_async_db, get_db
 from app.dependencies import require_admin
 from app.models import Video
 from app.schemas import VideoCreate, VideoUpdate, VideoRead
 from app.config import settings
+from app.file_responses import conditional_file_response
+from app.response_cache import VIDEOS_CACHE, response_cache
 
 
 router = APIRouter(prefix="/videos", tags=["Videos"])
@@ -116,16 +120,19 @@ def generate_video_thumbnail(video_path: Path, thumbnail_path: Path, time_offset
 
 
 @router.get("", response_model=List[VideoRead])
+@response_cache.cached(VIDEOS_CACHE, List[VideoRead])
 async def list_videos(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     public_only: bool = True,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     List all videos.
     
     Args:
+        request: Incoming request (the response cache keys on its path/query)
         skip: Number of videos to skip (pagination)
         limit: Maximum number of videos to return
         public_only: If True, only return public videos
@@ -134,27 +141,29 @@ async def list_videos(
     Returns:
         List of videos
     """
-    query = db.query(Video)
+    query = select(Video)
     if public_only:
-        query = query.filter(Video.is_public == True)
+        query = query.where(Video.is_public == True)
     
-    videos = query.offset(skip).limit(limit).all()
+    videos = (await db.execute(query.offset(skip).limit(limit))).scalars().all()
     return videos
 
 
 @router.get("/{video_id}", response_model=VideoRead)
-async def get_video(video_id: int, db: Session = Depends(get_db)):
+@response_cache.cached(VIDEOS_CACHE, VideoRead)
+async def get_video(request: Request, video_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a specific video by ID.
     
     Args:
+        request: Incoming request (the response cache keys on its path/query)
         video_id: Video ID
         db: Database session
         
     Returns:
         Video metadata
     """
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await db.get(Video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
@@ -162,18 +171,20 @@ async def get_video(video_id: int, db: Session = Depends(get_db)):
 
 
 @router.get("/slug/{slug}", response_model=VideoRead)
-async def get_video_by_slug(slug: str, db: Session = Depends(get_db)):
+@response_cache.cached(VIDEOS_CACHE, VideoRead)
+async def get_video_by_slug(request: Request, slug: str, db: AsyncSession = Depends(get_async_db)):
     """
     Get a video by its URL slug.
     
     Args:
+        request: Incoming request (the response cache keys on its path/query)
         slug: Video slug
         db: Database session
         
     Returns:
         Video metadata
     """
-    video = db.query(Video).filter(Video.slug == slug).first()
+    video = await db.scalar(select(Video).where(Video.slug == slug))
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
@@ -247,6 +258,7 @@ async def upload_video(
     db.add(db_video)
     db.commit()
     db.refresh(db_video)
+    response_cache.invalidate(VIDEOS_CACHE)
     
     return db_video
 
@@ -285,6 +297,7 @@ async def update_video(
     
     db.commit()
     db.refresh(db_video)
+    response_cache.invalidate(VIDEOS_CACHE)
     
     return db_video
 
@@ -317,13 +330,14 @@ async def delete_video(
     
     db.delete(db_video)
     db.commit()
+    response_cache.invalidate(VIDEOS_CACHE)
 
 
 STREAM_CHUNK_SIZE_BYTES = 64 * 1024
 
 
 @router.get("/{video_id}/stream")
-async def stream_video(video_id: int, request: Request, db: Session = Depends(get_db)):
+async def stream_video(video_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Stream video content with proper HTTP range request support for seeking.
 
@@ -336,9 +350,10 @@ async def stream_video(video_id: int, request: Request, db: Session = Depends(ge
         db: Database session
 
     Returns:
-        StreamingResponse with 206 for range requests, FileResponse for full requests.
+        StreamingResponse with 206 for range requests, the whole file (or a 304
+        if the client's copy is current) for full requests.
     """
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await db.get(Video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
 
@@ -351,8 +366,9 @@ async def stream_video(video_id: int, request: Request, db: Session = Depends(ge
     range_header = request.headers.get("range")
 
     if not range_header:
-        return FileResponse(
-            path=str(video_path),
+        return conditional_file_response(
+            request,
+            video_path,
             media_type=mime_type,
             headers={"Accept-Ranges": "bytes"},
         )
@@ -398,18 +414,22 @@ async def stream_video(video_id: int, request: Request, db: Session = Depends(ge
 
 
 @router.get("/{video_id}/thumbnail")
-async def get_video_thumbnail(video_id: int, db: Session = Depends(get_db)):
+async def get_video_thumbnail(video_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
     """
     Get video thumbnail image.
     
+    Thumbnails are named after the video slug, not a UUID, so caches have to
+    revalidate -- a repeat visit costs a 304 instead of the image.
+    
     Args:
         video_id: Video ID
+        request: Incoming request (read for If-None-Match/If-Modified-Since)
         db: Database session
         
     Returns:
         Thumbnail image file
     """
-    video = db.query(Video).filter(Video.id == video_id).first()
+    video = await db.get(Video, video_id)
     if not video:
         raise HTTPException(status_code=404, detail="Video not found")
     
@@ -420,7 +440,4 @@ async def get_video_thumbnail(video_id: int, db: Session = Depends(get_db)):
     if not thumbnail_path.exists():
         raise HTTPException(status_code=404, detail="Thumbnail file not found")
     
-    return FileResponse(
-        path=str(thumbnail_path),
-        media_type="image/jpeg"
-    )
+    return conditional_file_response(request, thumbnail_path, media_type="image/jpeg")
@@ -0,0 +1,303 @@
+"""Benchmark the API against a throwaway SQLite database.
+
+Spins up the app in-process, seeds some galleries and Public Square posts,
+then fires a mix of reads (GET /galleries, GET /public-square/posts) and
+writes (post votes from different fake visitor IPs) at it. Two modes:
+
+throughput -- a few clients (default 4), run twice:
+    - baseline: plain engines with no pragmas (rollback journal)
+    - tuned:    the managed profile from app.database (WAL + pragmas + pool)
+  so you can see what the tuning buys.
+
+latency -- lots of clients (default 50) on the tuned setup. a handler that
+  blocks the event loop shows up here as a fat p99.
+
+clients are async and share one event loop with the app, the same way
+uvicorn runs it. every run prints req/s plus p50/p99 latency per path.
+
+    python scripts/benchmark_api.py throughput --seconds 20
+    python scripts/benchmark_api.py latency --clients 50
+
+Needs the app's requirements installed. Doesnt touch the real database.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# make app importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# settings refuses to load without these -- the benchmark never issues JWTs
+# or persists IP hashes, so throwaway values are fine
+os.environ.setdefault("JWT_SECRET", "benchmark-only-secret")
+os.environ.setdefault("IP_HASH_SALT", "benchmark-only-salt")
+
+import httpx
+from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.database import (
+    SQLITE_ASYNC_DRIVER,
+    Base,
+    create_async_sqlite_engine,
+    create_sqlite_engine,
+    get_async_db,
+    get_db,
+)
+from app.main import app
+from app.models import Gallery, GalleryPhoto, Post
+from app.rate_limit import limiter
+
+DEFAULT_DURATION_S = 10
+DEFAULT_WRITE_RATIO = 0.2
+DEFAULT_THROUGHPUT_CLIENTS = 4
+DEFAULT_LATENCY_CLIENTS = 50
+HTTP_ERROR_STATUS = 400
+SEED_GALLERY_COUNT = 30
+SEED_PHOTOS_PER_GALLERY = 20
+SEED_POST_COUNT = 200
+FAKE_IP_POOL_SIZE = 5000
+MS_PER_S = 1000
+P50 = 0.50
+P99 = 0.99
+BENCHMARK_BASE_URL = "http://benchmark"
+
+READ_PATHS = ("/galleries", "/public-square/posts")
+VOTE_PATH_LABEL = "/public-square/posts/{id}/vote"
+
+
+def seed_database(session_factory) -> None:
+    """
+    Fill a fresh database with galleries, photos, and posts to read and vote on.
+
+    Args:
+        session_factory: sessionmaker bound to the benchmark engine.
+
+    Side Effects:
+        Inserts rows into the benchmark database.
+    """
+    db = session_factory()
+    try:
+        for gallery_index in range(SEED_GALLERY_COUNT):
+            gallery = Gallery(name=f"gallery {gallery_index}", slug=f"gallery-{gallery_index}")
+            gallery.photos = [
+                GalleryPhoto(filename=f"{photo_index}.jpg", file_path=f"g{gallery_index}/{photo_index}.jpg")
+                for photo_index in range(SEED_PHOTOS_PER_GALLERY)
+            ]
+            db.add(gallery)
+        for post_index in range(SEED_POST_COUNT):
+            db.add(Post(title=f"post {post_index}", content="benchmark post"))
+        db.commit()
+    finally:
+        db.close()
+
+
+def pick_request(rng: random.Random, write_ratio: float) -> tuple[str, str, dict]:
+    """
+    Choose the next request in the mixed workload.
+
+    Args:
+        rng: Per-worker random source, so runs are reproducible.
+        write_ratio: Fraction of requests that are votes (writes).
+
+    Returns:
+        (label, path, httpx request kwargs). label groups votes on different
+        posts under one name for reporting.
+    """
+    if rng.random() >= write_ratio:
+        path = rng.choice(READ_PATHS)
+        return path, path, {"method": "GET"}
+
+    post_id = rng.randint(1, SEED_POST_COUNT)
+    fake_ip = f"10.0.{rng.randrange(FAKE_IP_POOL_SIZE) // 256}.{rng.randrange(256)}"
+    return VOTE_PATH_LABEL, f"/public-square/posts/{post_id}/vote", {
+        "method": "POST",
+        "json": {"value": rng.choice((1, -1))},
+        "headers": {"X-Forwarded-For": fake_ip},
+    }
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile of an already-sorted list.
+
+    Args:
+        sorted_values: Values sorted ascending.
+        fraction: Percentile as 0..1 (e.g. 0.99).
+
+    Returns:
+        The value at that rank.
+    """
+    rank = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[rank]
+
+
+async def run_clients(clients: int, duration_s: float, write_ratio: float) -> dict:
+    """
+    Run concurrent async clients against the app on this event loop.
+
+    Args:
+        clients: Number of concurrent clients, each sending requests back to back.
+        duration_s: How long to keep issuing requests.
+        write_ratio: Fraction of requests that are votes (writes).
+
+    Returns:
+        Dict with "latencies" (path label -> list of ms), "errors" (count of
+        4xx/5xx responses), and "elapsed_s".
+    """
+    latencies: dict[str, list[float]] = {}
+    errors = 0
+    deadline = time.perf_counter() + duration_s
+    # unhandled app errors (e.g. "database is locked") become 500s and count
+    # as errors instead of killing the run
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+
+    async def client_loop(seed: int, client: httpx.AsyncClient) -> None:
+        """sends requests until the deadline and records each latency."""
+        nonlocal errors
+        rng = random.Random(seed)
+        while time.perf_counter() < deadline:
+            label, path, request_kwargs = pick_request(rng, write_ratio)
+            started = time.perf_counter()
+            response = await client.request(url=path, **request_kwargs)
+            latencies.setdefault(label, []).append((time.perf_counter() - started) * MS_PER_S)
+            if response.status_code >= HTTP_ERROR_STATUS:
+                errors += 1
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient(transport=transport, base_url=BENCHMARK_BASE_URL) as client:
+        await asyncio.gather(*(client_loop(seed, client) for seed in range(clients)))
+    return {"latencies": latencies, "errors": errors, "elapsed_s": time.perf_counter() - started}
+
+
+def print_results(label: str, results: dict) -> None:
+    """
+    Print req/s plus p50/p99 per path label and overall.
+
+    Args:
+        label: Run name shown in the header (e.g. "baseline").
+        results: Output of run_clients.
+    """
+    latencies = results["latencies"]
+    everything = sorted(value for values in latencies.values() for value in values)
+    print(
+        f"{label}: {len(everything) / results['elapsed_s']:.1f} req/s "
+        f"({len(everything)} requests, {results['errors']} errors)"
+    )
+    rows = [(path, sorted(values)) for path, values in sorted(latencies.items())] + [("all", everything)]
+    for path, values in rows:
+        print(
+            f"  {path:>32}: n={len(values):5d}  p50={percentile(values, P50):7.1f} ms  "
+            f"p99={percentile(values, P99):7.1f} ms"
+        )
+
+
+def use_engines(engine, async_engine) -> sessionmaker:
+    """
+    Create tables, seed data, and route the app's db dependencies to these engines.
+
+    Args:
+        engine: Sync engine backing get_db.
+        async_engine: Async engine backing get_async_db (same db file).
+
+    Returns:
+        Sync session factory bound to `engine`.
+
+    Side Effects:
+        Overrides app's get_db and get_async_db dependencies until
+        app.dependency_overrides is cleared.
+    """
+    Base.metadata.create_all(bind=engine)
+    session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    seed_database(session_factory)
+
+    def override_get_db():
+        """yields sessions bound to the benchmark engine instead of the app's."""
+        db = session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    async def override_get_async_db():
+        """yields async sessions bound to the benchmark engine instead of the app's."""
+        async with async_session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    return session_factory
+
+
+def run_benchmark(label: str, engine, async_engine, clients: int, args: argparse.Namespace) -> None:
+    """
+    Seed a database on the given engines, run the clients against it, and print results.
+
+    Args:
+        label: Run name shown in the output.
+        engine: Sync engine backing get_db.
+        async_engine: Async engine backing get_async_db (same db file).
+        clients: Number of concurrent clients.
+        args: Parsed CLI args (seconds, write ratio).
+    """
+    use_engines(engine, async_engine)
+
+    async def run() -> dict:
+        """runs the clients and disposes the async pool on the same loop."""
+        try:
+            return await run_clients(clients, args.seconds, args.write_ratio)
+        finally:
+            await async_engine.dispose()
+
+    try:
+        results = asyncio.run(run())
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+    print_results(f"{label} ({clients} clients)", results)
+
+
+def main() -> None:
+    """Parse args and run the chosen benchmark mode."""
+    parser = argparse.ArgumentParser(description="SQLite throughput/latency benchmark for the website backend")
+    parser.add_argument("mode", choices=("throughput", "latency"), help="which benchmark to run")
+    parser.add_argument("--seconds", type=float, default=DEFAULT_DURATION_S, help="duration of each run")
+    parser.add_argument("--write-ratio", type=float, default=DEFAULT_WRITE_RATIO, help="fraction of requests that vote")
+    parser.add_argument("--clients", type=int, help="concurrent clients (default depends on mode)")
+    args = parser.parse_args()
+
+    # votes come from thousands of fake IPs, the per-IP vote cap would just 429 them
+    limiter.enabled = False
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        if args.mode == "latency":
+            url = f"sqlite:///{Path(temp_dir) / 'latency.db'}"
+            clients = args.clients or DEFAULT_LATENCY_CLIENTS
+            run_benchmark("tuned", create_sqlite_engine(url), create_async_sqlite_engine(url), clients, args)
+            return
+
+        clients = args.clients or DEFAULT_THROUGHPUT_CLIENTS
+        baseline_url = f"sqlite:///{Path(temp_dir) / 'baseline.db'}"
+        run_benchmark(
+            "baseline",
+            create_engine(baseline_url, connect_args={"check_same_thread": False}),
+            create_async_engine(make_url(baseline_url).set(drivername=SQLITE_ASYNC_DRIVER)),
+            clients,
+            args,
+        )
+        tuned_url = f"sqlite:///{Path(temp_dir) / 'tuned.db'}"
+        run_benchmark("tuned", create_sqlite_engine(tuned_url), create_async_sqlite_engine(tuned_url), clients, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Measure bytes on the wire and time-to-first-byte for the Pac-Tyler files.
+
+Requests /pac-tyler/geojson and /pac-tyler/activities with each
+Accept-Encoding the backend can answer -- identity (the plain file), gzip,
+and br (the pre-compressed siblings) -- and prints the transferred size plus
+median/p90 TTFB for each.
+
+Run it against a live backend, ideally through the public URL so the tunnel
+is part of the measurement:
+
+    python scripts/benchmark_pac_tyler.py --base-url http://localhost:8000
+    python scripts/benchmark_pac_tyler.py --base-url https://api.example.com --repeats 20
+
+Only needs httpx.
+"""
+
+import argparse
+import statistics
+import time
+
+import httpx
+
+DEFAULT_BASE_URL = "http://localhost:8000"
+DEFAULT_REPEATS = 10
+PATHS = ("/pac-tyler/geojson", "/pac-tyler/activities")
+ENCODINGS = ("identity", "gzip", "br")
+MS_PER_S = 1000
+BYTES_PER_KIB = 1024
+P90 = 0.90
+
+
+def measure(client: httpx.Client, path: str, encoding: str) -> tuple[int, float, str]:
+    """
+    Fetch a path once and time it.
+
+    Args:
+        client: Shared client (keeps the connection warm between requests).
+        path: API path to fetch.
+        encoding: Accept-Encoding value to send.
+
+    Returns:
+        (bytes received on the wire, TTFB in ms, Content-Encoding served).
+    """
+    started = time.perf_counter()
+    with client.stream("GET", path, headers={"Accept-Encoding": encoding}) as response:
+        response.raise_for_status()
+        raw_chunks = response.iter_raw()
+        first_chunk = next(raw_chunks, b"")
+        ttfb_ms = (time.perf_counter() - started) * MS_PER_S
+        wire_bytes = len(first_chunk) + sum(len(chunk) for chunk in raw_chunks)
+        return wire_bytes, ttfb_ms, response.headers.get("content-encoding", "identity")
+
+
+def main() -> None:
+    """Parse args and print a size/TTFB table per path and encoding."""
+    parser = argparse.ArgumentParser(description="Pac-Tyler compressed vs uncompressed transfer benchmark")
+    parser.add_argument("--base-url", default=DEFAULT_BASE_URL, help="backend to measure")
+    parser.add_argument("--repeats", type=int, default=DEFAULT_REPEATS, help="requests per path/encoding")
+    args = parser.parse_args()
+
+    with httpx.Client(base_url=args.base_url, timeout=60) as client:
+        for path in PATHS:
+            print(path)
+            identity_bytes = None
+            for encoding in ENCODINGS:
+                samples = [measure(client, path, encoding) for _ in range(args.repeats)]
+                wire_bytes, _, served = samples[-1]
+                ttfbs = sorted(ttfb for _, ttfb, _ in samples)
+                identity_bytes = identity_bytes or wire_bytes
+                print(
+                    f"  {encoding:>8} (served {served:>8}): {wire_bytes / BYTES_PER_KIB:9.1f} KiB "
+                    f"({wire_bytes / identity_bytes:6.1%})  "
+                    f"ttfb p50={statistics.median(ttfbs):7.1f} ms  "
+                    f"p90={ttfbs[min(len(ttfbs) - 1, int(P90 * len(ttfbs)))]:7.1f} ms"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Check that public read endpoints run the same number of SQL statements no matter how many rows they return.
+
+Each check seeds a throwaway SQLite database twice -- once with a single
+row, once with SEED_LARGE_COUNT (galleries for the listing, photos for one
+gallery, recipes with that many photos and tags each for the recipe list)
+-- requests the endpoint in-process, and counts statements with
+app.database.count_queries(). a count that grows with the data is an N+1
+(a relationship loaded lazily per row). on an AsyncSession a relationship
+that isnt eager-loaded raises instead, so an endpoint that errors fails
+too. any failure exits non-zero.
+
+    python scripts/check_query_counts.py
+
+Needs the app's requirements installed. Doesnt touch the real database.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# make app importable when run from the project root
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+# settings refuses to load without these -- the check never issues JWTs or
+# persists IP hashes, so throwaway values are fine
+os.environ.setdefault("JWT_SECRET", "query-count-check-only-secret")
+os.environ.setdefault("IP_HASH_SALT", "query-count-check-only-salt")
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.database import Base, count_queries, create_async_sqlite_engine, create_sqlite_engine, get_async_db
+from app.main import app
+from app.models import Gallery, GalleryPhoto, Recipe, RecipePhoto, Tag
+from app.response_cache import response_cache
+
+SEED_SMALL_COUNT = 1
+SEED_LARGE_COUNT = 25
+PHOTOS_PER_LISTED_GALLERY = 3
+CHECK_BASE_URL = "http://query-count-check"
+SINGLE_GALLERY_SLUG = "gallery"
+
+
+def seed_galleries(db: Session, count: int) -> None:
+    """
+    Add `count` public galleries with a few photos each.
+
+    Args:
+        db: Session on the check database.
+        count: Number of galleries to add.
+
+    Side Effects:
+        Adds rows to the session (caller commits).
+    """
+    for gallery_index in range(count):
+        gallery = Gallery(name=f"gallery {gallery_index}", slug=f"gallery-{gallery_index}")
+        gallery.photos = [
+            GalleryPhoto(filename=f"{photo_index}.jpg", file_path=f"g{gallery_index}/{photo_index}.jpg")
+            for photo_index in range(PHOTOS_PER_LISTED_GALLERY)
+        ]
+        db.add(gallery)
+
+
+def seed_gallery_photos(db: Session, count: int) -> None:
+    """
+    Add one gallery (id 1, slug SINGLE_GALLERY_SLUG) holding `count` photos.
+
+    Args:
+        db: Session on the check database.
+        count: Number of photos to add.
+
+    Side Effects:
+        Adds rows to the session (caller commits).
+    """
+    gallery = Gallery(name="gallery", slug=SINGLE_GALLERY_SLUG)
+    gallery.photos = [
+        GalleryPhoto(filename=f"{photo_index}.jpg", file_path=f"g/{photo_index}.jpg") for photo_index in range(count)
+    ]
+    db.add(gallery)
+
+
+def seed_recipes(db: Session, count: int) -> None:
+    """
+    Add `count` recipes, each with `count` photos and `count` tags.
+
+    Tags are shared between recipes, like real ones are.
+
+    Args:
+        db: Session on the check database.
+        count: Number of recipes, and photos/tags per recipe.
+
+    Side Effects:
+        Adds rows to the session (caller commits).
+    """
+    tags = [Tag(name=f"tag {tag_index}") for tag_index in range(count)]
+    for recipe_index in range(count):
+        recipe = Recipe(name=f"recipe {recipe_index}", tags=tags)
+        recipe.photos = [
+            RecipePhoto(filename=f"{photo_index}.jpg", file_path=f"r{recipe_index}/{photo_index}.jpg")
+            for photo_index in range(count)
+        ]
+        db.add(recipe)
+
+
+# (label, path, seed function taking a session and a row count)
+CHECKS = (
+    ("list_galleries", "/galleries", seed_galleries),
+    ("get_gallery", "/galleries/1", seed_gallery_photos),
+    ("get_gallery_by_slug", f"/galleries/slug/{SINGLE_GALLERY_SLUG}", seed_gallery_photos),
+    ("list_recipes", "/recipes", seed_recipes),
+)
+
+
+async def count_request_statements(path: str) -> int:
+    """
+    GET a path in-process and count the SQL statements it ran.
+
+    Args:
+        path: API path to request.
+
+    Returns:
+        Statements executed while handling the request.
+
+    Raises:
+        httpx.HTTPStatusError: If the endpoint didnt answer 2xx.
+    """
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url=CHECK_BASE_URL) as client:
+        with count_queries() as counter:
+            response = await client.get(path)
+    response.raise_for_status()
+    return counter.statements
+
+
+def measure(path: str, seed, count: int, database_path: Path) -> int:
+    """
+    Seed a fresh database with `count` rows and count the statements behind one request.
+
+    Args:
+        path: API path to request.
+        seed: Function adding `count` rows to a session.
+        count: Row count passed to seed.
+        database_path: SQLite file to create (must not exist yet).
+
+    Returns:
+        Statements the request ran.
+
+    Side Effects:
+        Overrides the app's get_async_db until the request finishes.
+    """
+    url = f"sqlite:///{database_path}"
+    engine = create_sqlite_engine(url)
+    async_engine = create_async_sqlite_engine(url)
+    Base.metadata.create_all(bind=engine)
+    with sessionmaker(bind=engine)() as db:
+        seed(db, count)
+        db.commit()
+
+    async_session_factory = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_async_db():
+        """yields async sessions bound to the check database instead of the app's."""
+        async with async_session_factory() as db:
+            yield db
+
+    async def run() -> int:
+        """runs the request and disposes the async pool on the same loop."""
+        try:
+            return await count_request_statements(path)
+        finally:
+            await async_engine.dispose()
+
+    app.dependency_overrides[get_async_db] = override_get_async_db
+    try:
+        return asyncio.run(run())
+    finally:
+        app.dependency_overrides.clear()
+        engine.dispose()
+
+
+def run_check(label: str, path: str, seed, temp_dir: Path) -> bool:
+    """
+    Measure one endpoint with the small and large seed and print the counts.
+
+    Args:
+        label: Check name shown in the output, also names its database files.
+        path: API path to request.
+        seed: Function adding rows to a session (see CHECKS).
+        temp_dir: Directory for the check's throwaway databases.
+
+    Returns:
+        True if both requests succeeded with the same statement count.
+    """
+    try:
+        small = measure(path, seed, SEED_SMALL_COUNT, temp_dir / f"{label}-small.db")
+        large = measure(path, seed, SEED_LARGE_COUNT, temp_dir / f"{label}-large.db")
+    except Exception as exc:
+        print(f"{label:>20}: GET {path} failed ({exc!r}) -- is a relationship it serializes not eager-loaded?")
+        return False
+
+    status = "ok" if small == large else "GROWS WITH ROWS"
+    print(f"{label:>20}: {small} statements with {SEED_SMALL_COUNT}, {large} with {SEED_LARGE_COUNT}  {status}")
+    return small == large
+
+
+def main() -> None:
+    """Run every check and exit 1 if any grew with the data or failed."""
+    # every check requests the same paths against different databases, a
+    # cached response would skip the queries entirely
+    response_cache.enabled = False
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        results = [run_check(label, path, seed, Path(temp_dir)) for label, path, seed in CHECKS]
+
+    sys.exit(0 if all(results) else 1)
+
+
+if __name__ == "__main__":
+    main()